@@ -1,3 +1,11 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ("model", "object_id", "deleted_at")
+    list_filter = ("model",)
+    search_fields = ("object_id",)
@@ -0,0 +1,98 @@
+"""
+JWT authentication backed by a user cache.
+
+JWTAuthentication loads the user row on every request. Here the user (with
+its company, for plan throttling and tenant scoping) is kept in the
+worker's local-memory "auth" cache for API_AUTH_CACHE_TIMEOUT seconds, so a
+busy scanner authenticates without any query. (A database cache entry
+costs a query per request, as much as loading the user.) Entries are filled
+at token issue and on the first miss, and dropped on user / company / group
+changes (api.signals) in the worker that makes them; other workers' copies
+expire within API_AUTH_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import cache as response_cache
+
+AUTH_CACHE_ALIAS = getattr(settings, "API_AUTH_CACHE_ALIAS", "auth")
+AUTH_CACHE_TIMEOUT = getattr(settings, "API_AUTH_CACHE_TIMEOUT", 60)
+
+
+def get_auth_cache():
+    return caches[AUTH_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    # The token claim may carry the id as a string: both give the same key
+    return f"api-auth:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    # Local memory pickles entries, so each request gets its own instance
+    user = get_auth_cache().get(user_key(user_id))
+    response_cache.record("auth", "miss" if user is None else "hit")
+    return user
+
+
+def cache_user(user):
+    user_id = getattr(user, api_settings.USER_ID_FIELD)
+    if getattr(user, "company_id", None):
+        user.company  # load it now, so it is cached with the user
+    get_auth_cache().set(user_key(user_id), user, AUTH_CACHE_TIMEOUT)
+
+
+def forget_users(user_ids, using=None):
+    """
+    Drop cached users from this worker. Other workers' copies expire within
+    AUTH_CACHE_TIMEOUT. The entries are deleted again after commit, in case
+    a concurrent request re-cached the pre-commit row.
+    """
+    keys = [user_key(user_id) for user_id in user_ids]
+    get_auth_cache().delete_many(keys)
+    transaction.on_commit(lambda: get_auth_cache().delete_many(keys), using=using)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through the user cache."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related("company").get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache_user(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class CachingTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token issue also warms the user cache, so the first API call is a hit."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        cache_user(self.user)
+        return data
@@ -0,0 +1,204 @@
+"""
+Batch endpoint: run several API calls in one HTTP request.
+
+POST /api/v1/batch/
+{
+    "requests": [
+        {"id": "order", "method": "GET", "path": "/api/v1/orders/5/"},
+        {"id": "customer", "method": "GET", "path": "/api/v1/customers/{order.body.customer}/"},
+        {"id": "items", "method": "GET", "path": "/api/v1/items/", "params": {"supplier": "{order.body.supplier}"}}
+    ]
+}
+
+Each sub-request is resolved against the URLconf and dispatched to the
+existing view with the caller's already-authenticated user, so JWT auth,
+throttling and middleware run once for the whole batch (the batch is
+charged one throttle token per operation).
+
+A string "{id.body.field}" refers to the response of an earlier operation;
+as a whole string it keeps the referenced value's type, inside a longer
+string (or as a query parameter) it is substituted as JSON text: strings
+as they are, null / true / 12.5 for the rest. A path may carry its own
+query string ("/api/v1/items/?supplier={order.body.supplier}"), merged
+with "params". An operation whose reference can't be
+resolved, or refers to a failed operation, gets 424 and is not run.
+
+All operations share one transaction. If any operation fails and the
+batch contains a write, everything is rolled back ("rolled_back": true).
+"""
+import io
+import json
+import re
+from urllib.parse import urlencode
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.views import APIView
+
+REFERENCE = re.compile(r"\{(\w+)((?:\.\w+)+)\}")
+BATCH_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+# Request headers a sub-request inherits from the batch request (auth is passed on separately)
+INHERITED_META = ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT", "HTTP_HOST", "HTTP_ACCEPT_LANGUAGE")
+
+
+class UnresolvedReference(Exception):
+    pass
+
+
+def lookup_reference(results, op_id, path):
+    if op_id not in results:
+        raise UnresolvedReference(f"Unknown operation '{op_id}'.")
+    result = results[op_id]
+    if result["status"] >= 400:
+        raise UnresolvedReference(f"Operation '{op_id}' failed.")
+    value = result
+    for part in path.strip(".").split("."):
+        if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        elif isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            raise UnresolvedReference(f"'{op_id}{path}' not found.")
+    return value
+
+
+def as_text(value):
+    """A value substituted into a string: strings as they are, anything else as JSON."""
+    return value if isinstance(value, str) else json.dumps(value, cls=JSONEncoder)
+
+
+def query_string(query, params):
+    """The path's own query string followed by `params` (lists repeat the key)."""
+    pairs = [
+        (key, as_text(item))
+        for key, value in params.items()
+        for item in (value if isinstance(value, list) else [value])
+    ]
+    return "&".join(part for part in (query, urlencode(pairs)) if part)
+
+
+def resolve_references(value, results):
+    """Replace {id.body...} references in strings, lists and dicts."""
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    if not isinstance(value, str):
+        return value
+
+    whole = REFERENCE.fullmatch(value)
+    if whole:
+        return lookup_reference(results, *whole.groups())
+    return REFERENCE.sub(lambda match: as_text(lookup_reference(results, *match.groups())), value)
+
+
+def response_body(response):
+    data = getattr(response, "data", None)
+    if data is not None or not response.content:
+        return data
+    if "json" in response.get("Content-Type", ""):
+        return json.loads(response.content)
+    return response.content.decode(response.charset or "utf-8")
+
+
+class BatchView(APIView):
+    """
+    Dispatch a list of sub-requests (method, path, params, body) through the
+    API views in one request and one transaction. See module docstring.
+    """
+    permission_classes = [IsAuthenticated]
+    batch_max_requests = 25
+    # No nested batches
+    excluded_url_names = {"api_batch"}
+
+    def get_throttle_cost(self, request):
+        operations = request.data.get("requests") if isinstance(request.data, dict) else None
+        return max(1, min(len(operations), self.batch_max_requests)) if isinstance(operations, list) else 1
+
+    def post(self, request):
+        operations = request.data.get("requests") if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return Response({"detail": "Expected {\"requests\": [...]}."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > self.batch_max_requests:
+            return Response(
+                {"detail": f"At most {self.batch_max_requests} requests per batch."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = {}
+        responses = []
+        failed = writes = False
+        with transaction.atomic():
+            for index, operation in enumerate(operations):
+                op_id = str(operation.get("id", index)) if isinstance(operation, dict) else str(index)
+                result = self.run_operation(request, operation, results, writes)
+                wrote = result.pop("write", False)
+                writes = writes or wrote
+                failed = failed or result["status"] >= 400
+                results[op_id] = result
+                responses.append({"id": op_id, **result})
+            rolled_back = failed and writes
+            if rolled_back:
+                transaction.set_rollback(True)
+
+        return Response({"responses": responses, "rolled_back": rolled_back})
+
+    def run_operation(self, request, operation, results, after_writes):
+        if not isinstance(operation, dict):
+            return {"status": 400, "body": {"detail": "Each request must be an object."}}
+
+        method = str(operation.get("method", "GET")).upper()
+        if method not in BATCH_METHODS:
+            return {"status": 405, "body": {"detail": f"Method \"{method}\" not allowed."}}
+        try:
+            path = resolve_references(operation.get("path", ""), results)
+            params = resolve_references(operation.get("params") or {}, results)
+            body = resolve_references(operation.get("body"), results)
+        except UnresolvedReference as exc:
+            return {"status": 424, "body": {"detail": str(exc)}}
+        if not isinstance(params, dict):
+            return {"status": 400, "body": {"detail": "\"params\" must be an object."}}
+
+        path, _, query = path.partition("?") if isinstance(path, str) else (None, "", "")
+        try:
+            match = resolve(path) if path is not None else None
+        except Resolver404:
+            match = None
+        if match is None or match.url_name in self.excluded_url_names or not path.startswith(reverse("api-root")):
+            return {"status": 404, "body": {"detail": "Not found."}}
+
+        sub_request = self.build_request(request, method, path, query_string(query, params), body)
+        # Uncommitted writes must not end up in the response cache (see CachedResponseMixin)
+        sub_request.batch_has_writes = after_writes
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if getattr(response, "streaming", False):
+            return {"status": 400, "body": {"detail": "Streaming endpoints can't be batched."}}
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        return {"status": response.status_code, "body": response_body(response), "write": method not in SAFE_METHODS}
+
+    def build_request(self, request, method, path, query, body):
+        content = b"" if body is None else json.dumps(body, cls=JSONEncoder).encode()
+        environ = {key: request.META[key] for key in INHERITED_META if key in request.META}
+        environ.update({
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": io.BytesIO(content),
+            "wsgi.url_scheme": request.scheme,
+        })
+        sub_request = WSGIRequest(environ)
+        # Reuse the batch request's authentication and skip throttling (charged on the batch)
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        sub_request.batched = True
+        return sub_request
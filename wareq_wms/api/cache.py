@@ -0,0 +1,130 @@
+"""
+Response cache for the API viewsets.
+
+Entries are keyed by path, normalized query params, tenant scope and the
+current generation of every model the response depends on. post_save /
+post_delete bump a model's generation (see api.signals), so stale entries
+are never looked up again and simply age out after API_CACHE_TIMEOUT.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = getattr(settings, "API_CACHE_ALIAS", "default")
+CACHE_TIMEOUT = getattr(settings, "API_CACHE_TIMEOUT", 300)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def generation_key(model):
+    return f"api-gen:{model._meta.label_lower}"
+
+
+def get_generations(models):
+    """Current generation of each model (one get_many round trip)."""
+    cache = get_cache()
+    keys = [generation_key(model) for model in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump_generation(model):
+    # A fresh timestamp rather than incr(): concurrent bumps can't collapse
+    # into the same value, and evicted counters never restart at an old one.
+    get_cache().set(generation_key(model), time.time_ns(), None)
+
+
+# Hit/miss counts are buffered per process and flushed to the shared cache
+# in batches, so recording a hit doesn't cost a cache write per request.
+_counts = Counter()
+_recorded = 0  # record() calls since the last flush
+_counts_lock = threading.Lock()
+_last_flush = time.monotonic()
+FLUSH_EVERY = 100
+FLUSH_INTERVAL = 10  # seconds
+
+
+def counter_key(resource, outcome):
+    return f"api-cache:{outcome}:{resource}"
+
+
+def flush_counters():
+    global _last_flush, _recorded
+    with _counts_lock:
+        pending = dict(_counts)
+        _counts.clear()
+        _recorded = 0
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+
+    cache = get_cache()
+    keys = [counter_key(*key) for key in pending]
+    current = cache.get_many(keys)
+    cache.set_many(
+        {key: current.get(key, 0) + count for key, count in zip(keys, pending.values())},
+        None,
+    )
+
+
+def record(resource, outcome, amount=1):
+    """
+    Count a cache "hit" or "miss" for a resource (viewset basename, or
+    "widget:<name>" for template fragments), or add `amount` to another
+    counter such as "render_ms".
+    """
+    global _recorded
+    with _counts_lock:
+        _counts[(resource, outcome)] += amount
+        _recorded += 1
+        due = _recorded >= FLUSH_EVERY or time.monotonic() - _last_flush >= FLUSH_INTERVAL
+    if due:
+        flush_counters()
+
+
+def get_stats(resources):
+    flush_counters()
+    cache = get_cache()
+    keys = [counter_key(resource, outcome) for resource in resources for outcome in ("hit", "miss", "render_ms")]
+    values = cache.get_many(keys)
+
+    stats = {}
+    for resource in resources:
+        hits = values.get(counter_key(resource, "hit"), 0)
+        misses = values.get(counter_key(resource, "miss"), 0)
+        total = hits + misses
+        stats[resource] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else None,
+        }
+        render_ms = values.get(counter_key(resource, "render_ms"))
+        if render_ms is not None:
+            # Fragments: average time to render on a miss
+            stats[resource]["avg_render_ms"] = round(render_ms / misses, 2) if misses else None
+    return stats
+
+
+def response_key(request, models):
+    """Key a GET by path, normalized query params, tenant scope and model generations."""
+    user = request.user
+    company_id = getattr(user, "company_id", None)
+    scope = f"company-{company_id}" if company_id else f"user-{user.pk}"
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = repr((request.path, params, scope, request.accepted_renderer.format, get_generations(models)))
+    return "api-cache:response:" + hashlib.md5(raw.encode()).hexdigest()
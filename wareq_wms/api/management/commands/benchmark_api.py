@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from api.views import CustomerViewSet, SupplierViewSet, ItemViewSet, OrderViewSet
+
+VIEWSETS = {
+    "customers": CustomerViewSet,
+    "suppliers": SupplierViewSet,
+    "items": ItemViewSet,
+    "orders": OrderViewSet,
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark API list routes: regular serializer path vs fast read path (requests/sec)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per measurement")
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--resources", nargs="+", choices=list(VIEWSETS), default=list(VIEWSETS))
+        parser.add_argument("--query", default="", help="Extra query string, e.g. 'fields=id,sku'")
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        # Unsaved user: the views only check is_authenticated / is_staff
+        user = User(username="benchmark", is_staff=True, is_superuser=True)
+        pagination = type("BenchmarkPagination", (PageNumberPagination,), {"page_size": options["page_size"]})
+
+        self.stdout.write(f"{'resource':<12}{'regular req/s':>15}{'fast req/s':>15}{'speedup':>10}  output")
+        for name in options["resources"]:
+            url = f"/api/v1/{name}/?{options['query']}"
+            results = {}
+            for fast in (False, True):
+                view = VIEWSETS[name].as_view(
+                    {"get": "list"},
+                    fast_list=fast,
+                    pagination_class=pagination,
+                    throttle_classes=[],
+                    cache_dependencies=[],
+                )
+
+                def call():
+                    request = factory.get(url, HTTP_ACCEPT="application/json", HTTP_HOST="localhost")
+                    force_authenticate(request, user=user)
+                    response = view(request)
+                    response.render()
+                    return response.content
+
+                body = call()  # warm-up
+                start = time.perf_counter()
+                for _ in range(options["requests"]):
+                    call()
+                elapsed = time.perf_counter() - start
+                results[fast] = (options["requests"] / elapsed, body)
+
+            regular, fast = results[False], results[True]
+            same = "identical" if regular[1] == fast[1] else self.style.ERROR("DIFFERS")
+            self.stdout.write(
+                f"{name:<12}{regular[0]:>15.1f}{fast[0]:>15.1f}{fast[0] / regular[0]:>9.2f}x  {same}"
+            )
@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.throttling import UserRateThrottle
+
+from accounts.models import User
+from api.models import ThrottleBucket
+from api import throttling
+from api.throttling import PlanTokenBucketThrottle
+from api import cache as response_cache
+
+
+class Command(BaseCommand):
+    help = "Benchmark throttle overhead per request: DRF's cache-backed UserRateThrottle vs token buckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        user = User.objects.filter(is_active=True).first()
+        if user is None:
+            self.stderr.write("Needs at least one user.")
+            return
+        wsgi_request = factory.get("/api/v1/items/", HTTP_HOST="localhost")
+        force_authenticate(wsgi_request, user=user)
+        request = Request(wsgi_request)
+        request.user = user
+
+        def drf_throttle(alias):
+            def make():
+                throttle = UserRateThrottle()
+                throttle.cache = caches[alias]
+                throttle.rate = "1000000/hour"
+                throttle.num_requests, throttle.duration = throttle.parse_rate(throttle.rate)
+                return throttle
+            return make
+
+        def token_bucket():
+            throttle = PlanTokenBucketThrottle()
+            throttle.get_request_rate = lambda request: "1000000/hour"
+            return throttle
+
+        candidates = [
+            ("UserRateThrottle (default cache)", drf_throttle("default")),
+            (f"UserRateThrottle ({response_cache.CACHE_ALIAS} cache)", drf_throttle(response_cache.CACHE_ALIAS)),
+            ("PlanTokenBucketThrottle (db, leased)", token_bucket),
+        ]
+
+        self.stdout.write(f"{'throttle':<40}{'us/request':>12}")
+        for label, make in candidates:
+            # Start each run from empty state so earlier runs don't lengthen the history lists
+            key = make().get_cache_key(request, None)
+            for alias in ("default", response_cache.CACHE_ALIAS):
+                caches[alias].delete(key)
+            ThrottleBucket.objects.filter(key=key).delete()
+            throttling._leases.pop(key, None)
+            make().allow_request(request, None)  # warm-up
+
+            start = time.perf_counter()
+            for _ in range(options["requests"]):
+                make().allow_request(request, None)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label:<40}{elapsed / options['requests'] * 1e6:>12.1f}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.schema import ARTIFACTS, SCHEMA_DIR, etag_for, write_artifacts
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema and the Swagger UI / ReDoc pages into API_SCHEMA_DIR (run at deploy)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output-dir", default=SCHEMA_DIR)
+
+    def handle(self, *args, **options):
+        artifacts = write_artifacts(options["output_dir"])
+        for name, content in artifacts.items():
+            self.stdout.write(f"{ARTIFACTS[name][0]:<14}{len(content):>9} bytes  ETag {etag_for(content)}")
+        self.stdout.write(self.style.SUCCESS(f"API schema written to {options['output_dir']}"))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.settings import api_settings
+
+from api.models import ThrottleBucket
+from api.throttling import TokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = "Delete throttle buckets that have refilled completely (same as having no row)."
+
+    def handle(self, *args, **options):
+        parse_rate = TokenBucketThrottle.parse_rate
+        # Any bucket is full again after one period of its rate
+        longest = max(parse_rate(None, rate)[1] for rate in api_settings.DEFAULT_THROTTLE_RATES.values() if rate)
+        deleted, _ = ThrottleBucket.objects.filter(refilled_at__lt=time.time() - longest).delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} idle throttle buckets."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('key', models.CharField(max_length=150, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('refilled_at', models.FloatField(help_text='Unix time of the last refill')),
+            ],
+        ),
+    ]
@@ -1,3 +1,33 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Tombstone(models.Model):
+    """
+    Marker left behind when a synced row is hard-deleted,
+    so delta-sync clients (api sync endpoints) learn about the deletion.
+    """
+    model = models.CharField(max_length=100, help_text="app_label.model_name of the deleted row")
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "deleted_at", "id"], name="tombstone_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class ThrottleBucket(models.Model):
+    """
+    Token bucket for one throttle key (see api.throttling).
+    Kept in the database so every worker shares the same counters.
+    """
+    key = models.CharField(max_length=150, primary_key=True)
+    tokens = models.FloatField()
+    refilled_at = models.FloatField(help_text="Unix time of the last refill")
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.2f} tokens"
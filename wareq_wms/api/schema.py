@@ -0,0 +1,116 @@
+"""
+OpenAPI schema and docs pages served from build artifacts.
+
+`manage.py build_api_schema` (run at deploy) generates the drf-spectacular
+schema once and writes it, together with the pre-rendered Swagger UI and
+ReDoc pages, to API_SCHEMA_DIR. The views below only read those files
+(once per process) and answer with a content-hash ETag, so serving the
+docs never introspects the viewsets or loads the drf-spectacular views.
+
+If an artifact is missing (e.g. local development), it is built in-process
+on first use.
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIR = getattr(settings, "API_SCHEMA_DIR", os.path.join(settings.BASE_DIR, "api_schema"))
+
+# name -> (file name, content type)
+ARTIFACTS = {
+    "yaml": ("openapi.yaml", "application/vnd.oai.openapi; charset=utf-8"),
+    "json": ("openapi.json", "application/vnd.oai.openapi+json; charset=utf-8"),
+    "swagger": ("swagger.html", "text/html; charset=utf-8"),
+    "redoc": ("redoc.html", "text/html; charset=utf-8"),
+}
+
+_loaded = {}
+
+
+def build_artifacts():
+    """Generate every artifact with drf-spectacular: {name: bytes}."""
+    from drf_spectacular.generators import SchemaGenerator
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+    from drf_spectacular.views import SpectacularRedocView, SpectacularSwaggerView
+    from rest_framework.test import APIRequestFactory
+
+    from . import schema_extensions  # noqa: F401  (registers the auth scheme)
+
+    schema = SchemaGenerator().get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+    artifacts = {
+        "yaml": OpenApiYamlRenderer().render(schema, renderer_context={}),
+        "json": OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+    factory = APIRequestFactory()
+    host = next((host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+    for name, view in (("swagger", SpectacularSwaggerView), ("redoc", SpectacularRedocView)):
+        request = factory.get("/", HTTP_HOST=host)
+        response = view.as_view(url_name="schema")(request)
+        response.render()
+        artifacts[name] = response.content
+    return artifacts
+
+
+def write_artifacts(directory=SCHEMA_DIR):
+    os.makedirs(directory, exist_ok=True)
+    artifacts = build_artifacts()
+    for name, content in artifacts.items():
+        with open(os.path.join(directory, ARTIFACTS[name][0]), "wb") as f:
+            f.write(content)
+    return artifacts
+
+
+def load_artifact(name):
+    """(content, etag) for an artifact, read once per process."""
+    if name not in _loaded:
+        try:
+            with open(os.path.join(SCHEMA_DIR, ARTIFACTS[name][0]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            logger.warning("API schema artifacts missing in %s, run `manage.py build_api_schema`.", SCHEMA_DIR)
+            for built_name, built in build_artifacts().items():
+                _loaded.setdefault(built_name, (built, etag_for(built)))
+        else:
+            _loaded[name] = (content, etag_for(content))
+    return _loaded[name]
+
+
+def etag_for(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def serve_artifact(request, name):
+    content, etag = load_artifact(name)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=ARTIFACTS[name][1])
+    response["ETag"] = etag
+    # Clients may keep it, but must revalidate (a 304 costs nothing here)
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@require_safe
+def openapi_schema(request):
+    """OpenAPI document: YAML by default, JSON with ?format=json or Accept: ...json."""
+    wants_json = request.GET.get("format") == "json" or "json" in request.headers.get("Accept", "")
+    return serve_artifact(request, "json" if wants_json else "yaml")
+
+
+@require_safe
+def swagger_ui(request):
+    return serve_artifact(request, "swagger")
+
+
+@require_safe
+def redoc(request):
+    return serve_artifact(request, "redoc")
@@ -0,0 +1,9 @@
+"""
+drf-spectacular extensions, imported only while generating the schema
+(api.schema.build_artifacts), never on the request path.
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = "api.authentication.CachedJWTAuthentication"
@@ -1,31 +1,214 @@
+from collections import defaultdict
+
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from customers.models import Customer
 from suppliers.models import Supplier, Item
-from orders.models import Order
+from orders.models import Order, OrderItem
 
 
 # ----------------------
 # Expandable Base
 # ----------------------
+def split_query_param(request, name):
+    """Return the comma-separated values of a query param as a list."""
+    if request is None:
+        return []
+    value = request.query_params.get(name, "")
+    return [f.strip() for f in value.split(",") if f.strip()]
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that first looks the pk up in a per-batch
+    cache filled by BulkListSerializer (one IN query instead of one per record).
+    """
+    prefetched = None
+
+    def to_internal_value(self, data):
+        if self.prefetched is not None and str(data) in self.prefetched:
+            return self.prefetched[str(data)]
+        return super().to_internal_value(data)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True serializer used by the bulk endpoints.
+
+    - Unique fields are checked with one IN query per batch instead of one
+      query per record; duplicates inside the payload are reported too.
+    - Updates match each record to its instance by "id".
+    - Writes go through bulk_create / bulk_update in batches.
+    """
+    batch_size = 500
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unique_validators = {}
+        for name, field in self.child.fields.items():
+            validators = [v for v in field.validators if isinstance(v, UniqueValidator)]
+            if validators:
+                field.validators = [v for v in field.validators if not isinstance(v, UniqueValidator)]
+                self.unique_validators[name] = validators[0]
+
+    @property
+    def instance_map(self):
+        if not hasattr(self, "_instance_map"):
+            self._instance_map = {str(obj.pk): obj for obj in (self.instance or [])}
+        return self._instance_map
+
+    def record_instance(self, record):
+        if self.instance is None or not isinstance(record, dict):
+            return None
+        return self.instance_map.get(str(record.get("id")))
+
+    def prefetch_related_fields(self, data):
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            pks = {
+                str(record[name]) for record in data
+                if isinstance(record, dict) and str(record.get(name, "")).isdigit()
+            }
+            objs = field.get_queryset().in_bulk([int(pk) for pk in pks]) if pks else {}
+            field.prefetched = {str(pk): obj for pk, obj in objs.items()}
+
+    def batch_errors(self, data):
+        """Per-record errors for unknown/duplicate ids and unique fields."""
+        model = self.child.Meta.model
+        errors = [{} for _ in data]
+
+        if self.instance is not None:
+            seen = set()
+            for index, record in enumerate(data):
+                if self.record_instance(record) is None:
+                    errors[index]["id"] = ["Unknown or missing id."]
+                elif str(record["id"]) in seen:
+                    errors[index]["id"] = ["Duplicate id in this batch."]
+                seen.add(str(record.get("id")) if isinstance(record, dict) else None)
+
+        for name, validator in self.unique_validators.items():
+            source = self.child.fields[name].source
+            positions = defaultdict(list)
+            for index, record in enumerate(data):
+                if isinstance(record, dict) and record.get(name) not in (None, ""):
+                    positions[str(record[name]).strip()].append(index)
+
+            values = list(positions)
+            taken = {}
+            for start in range(0, len(values), self.batch_size):
+                taken.update(
+                    model._default_manager
+                    .filter(**{f"{source}__in": values[start:start + self.batch_size]})
+                    .values_list(source, "pk")
+                )
+
+            for value, indexes in positions.items():
+                for index in indexes:
+                    instance = self.record_instance(data[index])
+                    if len(indexes) > 1:
+                        errors[index][name] = ["Duplicate value in this batch."]
+                    elif value in taken and (instance is None or taken[value] != instance.pk):
+                        errors[index][name] = [validator.message]
+        return errors
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            self.child.instance = self.record_instance(data)
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        self.prefetch_related_fields(data)
+        errors = self.batch_errors(data)
+        try:
+            value = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            raise serializers.ValidationError(
+                [{**batch, **record} for batch, record in zip(errors, exc.detail)]
+            )
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return value
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = model._default_manager.bulk_create(
+            [model(**attrs) for attrs in validated_data], batch_size=self.batch_size
+        )
+
+        # Backends without RETURNING (MySQL) leave pk unset - look them up by a unique field
+        if objs and objs[0].pk is None and self.unique_validators:
+            source = self.child.fields[next(iter(self.unique_validators))].source
+            for start in range(0, len(objs), self.batch_size):
+                batch = objs[start:start + self.batch_size]
+                pks = dict(
+                    model._default_manager
+                    .filter(**{f"{source}__in": [getattr(obj, source) for obj in batch]})
+                    .values_list(source, "pk")
+                )
+                for obj in batch:
+                    obj.pk = pks.get(getattr(obj, source))
+        return objs
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        objs, fields = [], set()
+        for record, attrs in zip(self.initial_data, validated_data):
+            obj = self.record_instance(record)
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+                fields.add(attr)
+            objs.append(obj)
+
+        if fields:
+            # bulk_update() skips pre_save(), so refresh auto_now fields by hand
+            now = timezone.now()
+            for field in model._meta.concrete_fields:
+                if getattr(field, "auto_now", False):
+                    for obj in objs:
+                        setattr(obj, field.attname, now)
+                    fields.add(field.name)
+            model._default_manager.bulk_update(objs, sorted(fields), batch_size=self.batch_size)
+        return objs
+
+
 class ExpandableSerializerMixin(serializers.ModelSerializer):
     """
     Allows ?expand=field1,field2 to include nested serializers.
     Example: /api/v1/orders/1/?expand=customer,supplier
+
+    Also supports sparse fieldsets: ?fields= keeps only the listed
+    fields, ?omit= drops the listed fields.
+    Example: /api/v1/items/?fields=id,sku,quantity
     """
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
     def __init__(self, *args, **kwargs):
-        expand = None
-        request = self.context.get("request")
-        if request:
-            expand = request.query_params.get("expand", "")
-            expand = [f.strip() for f in expand.split(",") if f.strip()]
-
+        # Expanded (nested) serializers are built with sparse=False so the
+        # top-level ?fields= / ?omit= params don't strip their fields too.
+        sparse = kwargs.pop("sparse", True)
         super().__init__(*args, **kwargs)
 
+        request = self.context.get("request")
+        expand = split_query_param(request, "expand")
         if expand:
             for field in expand:
                 if hasattr(self, "expandable_fields") and field in self.expandable_fields:
-                    self.fields[field] = self.expandable_fields[field](context=self.context)
+                    self.fields[field] = self.expandable_fields[field](context=self.context, sparse=False)
+
+        if sparse:
+            requested = split_query_param(request, "fields")
+            omitted = split_query_param(request, "omit")
+            for name in list(self.fields):
+                if (requested and name not in requested) or name in omitted:
+                    self.fields.pop(name)
 
     class Meta:
         abstract = True
@@ -36,11 +219,17 @@ class ExpandableSerializerMixin(serializers.ModelSerializer):
 # ----------------------
 class CustomerSerializer(ExpandableSerializerMixin):
     created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
+    # Stored lifetime figures (customers.lifetime), not computed per request
+    last_order_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
 
     class Meta:
         model = Customer
-        fields = ["id", "name", "email", "phone", "address", "created_at"]
-        read_only_fields = ["id", "created_at"]
+        fields = [
+            "id", "name", "email", "phone", "address", "created_at",
+            "order_count", "lifetime_value", "last_order_at",
+        ]
+        read_only_fields = ["id", "created_at", "order_count", "lifetime_value", "last_order_at"]
+        list_serializer_class = BulkListSerializer
 
     expandable_fields = {}
 
@@ -49,7 +238,7 @@ class CustomerSerializer(ExpandableSerializerMixin):
 # Supplier
 # ----------------------
 class SupplierSerializer(ExpandableSerializerMixin):
-    item_count = serializers.IntegerField(source="supplier_items.count", read_only=True)
+    item_count = serializers.IntegerField(read_only=True)  # Supplier.item_count: active items
     created_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
 
     class Meta:
@@ -88,9 +277,11 @@ class ItemSerializer(ExpandableSerializerMixin):
             "quantity",
             "supplier",
             "supplier_name",
+            "is_active",
             "created_at",
         ]
         read_only_fields = ["id", "supplier_name", "created_at"]
+        list_serializer_class = BulkListSerializer
 
     def validate_quantity(self, value):
         if value < 0:
@@ -130,3 +321,11 @@ class OrderSerializer(ExpandableSerializerMixin):
         "customer": lambda **kwargs: CustomerSerializer(read_only=True, **kwargs),
         "supplier": lambda **kwargs: SupplierSerializer(read_only=True, **kwargs),
     }
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    """Order line, used for the nested "lines" of the NDJSON export."""
+
+    class Meta:
+        model = OrderItem
+        fields = ["id", "item", "quantity", "price"]
@@ -0,0 +1,67 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from accounts.models import Company, User
+from customers.models import Customer
+from inventory.models import Item as InventoryItem, StockMovement
+from suppliers.models import Supplier, Item
+from orders.models import Order, OrderItem
+from .authentication import forget_users
+from .cache import bump_generation
+from .models import Tombstone
+
+# Models whose changes invalidate cached API responses and template fragments (core.fragments)
+CACHED_MODELS = [Customer, Supplier, Item, Order, OrderItem, InventoryItem, StockMovement]
+
+# Models served by the delta-sync endpoints (hard deletes leave a Tombstone)
+SYNCED_MODELS = [Customer, Supplier, Item, Order]
+
+
+def invalidate_api_cache(sender, using=None, **kwargs):
+    # Bump after commit, so a concurrent request can't cache pre-commit data under the new generation
+    transaction.on_commit(partial(bump_generation, sender), using=using)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_api_cache, sender=model, dispatch_uid=f"api-cache-save-{model._meta.label_lower}")
+    post_delete.connect(invalidate_api_cache, sender=model, dispatch_uid=f"api-cache-delete-{model._meta.label_lower}")
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+for model in SYNCED_MODELS:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"api-tombstone-{model._meta.label_lower}")
+
+
+# Cached JWT users (api.authentication): role, active flag, password, groups and company plan
+def invalidate_user(sender, instance, using=None, **kwargs):
+    forget_users([instance.pk], using=using)
+
+
+def invalidate_user_relations(sender, instance, action, reverse, pk_set, using=None, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            forget_users([instance.pk], using=using)
+    elif action == "pre_clear":
+        # group.user_set.clear() doesn't pass the users, look them up before they go
+        field = "groups" if sender is User.groups.through else "user_permissions"
+        forget_users(User.objects.filter(**{field: instance}).values_list("pk", flat=True), using=using)
+    elif action.startswith("post_") and pk_set:
+        forget_users(pk_set, using=using)
+
+
+def invalidate_company_users(sender, instance, using=None, **kwargs):
+    forget_users(User.objects.filter(company=instance).values_list("pk", flat=True), using=using)
+
+
+post_save.connect(invalidate_user, sender=User, dispatch_uid="api-auth-user-save")
+post_delete.connect(invalidate_user, sender=User, dispatch_uid="api-auth-user-delete")
+m2m_changed.connect(invalidate_user_relations, sender=User.groups.through, dispatch_uid="api-auth-user-groups")
+m2m_changed.connect(
+    invalidate_user_relations, sender=User.user_permissions.through, dispatch_uid="api-auth-user-permissions"
+)
+post_save.connect(invalidate_company_users, sender=Company, dispatch_uid="api-auth-company-save")
@@ -1,3 +1,265 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse_lazy
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.factories import UserFactory
+from customers.models import Customer
+from suppliers.factories import ItemFactory, SupplierFactory
+from . import cache as response_cache
+from .authentication import CachedJWTAuthentication
+from .models import Tombstone
+from .views import SYNC_OVERLAP, SYNC_TOMBSTONE_RETENTION, decode_sync_cursor, encode_sync_cursor
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.user = UserFactory(is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def customer(self, number, **fields):
+        return Customer.objects.create(name=f"Customer {number}", email=f"c{number}@example.com", **fields)
+
+
+class AuthenticationCacheTests(APITestCase):
+    def test_cached_user_needs_no_query(self):
+        token, auth = AccessToken.for_user(self.user), CachedJWTAuthentication()
+        self.assertEqual(auth.get_user(token), self.user)  # miss: loaded and cached
+        with mock.patch.object(response_cache, "record"), self.assertNumQueries(0):
+            self.assertEqual(auth.get_user(token), self.user)
+
+    def test_user_change_drops_the_entry(self):
+        token, auth = AccessToken.for_user(self.user), CachedJWTAuthentication()
+        auth.get_user(token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            auth.get_user(token)
+
+
+class BulkTests(APITestCase):
+    url = reverse_lazy("customers-bulk")
+
+    def test_create(self):
+        records = [{"name": "Ann", "email": "ann@example.com"}, {"name": "Bo", "email": "bo@example.com"}]
+        response = self.client.post(self.url, records, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(set(Customer.objects.values_list("email", flat=True)), {"ann@example.com", "bo@example.com"})
+        # Search keys are derived for bulk-created customers too
+        self.assertEqual(Customer.objects.get(email="ann@example.com").search_name, "ann")
+
+    def test_errors_are_aligned_and_nothing_is_saved(self):
+        self.customer(1)
+        records = [
+            {"name": "Ok", "email": "ok@example.com"},
+            {"name": "Taken", "email": "c1@example.com"},
+            {"name": "Twice", "email": "twice@example.com"},
+            {"name": "Twice", "email": "twice@example.com"},
+            {"email": "noname@example.com"},
+        ]
+        response = self.client.post(self.url, records, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.data), len(records))
+        self.assertEqual(response.data[0], {})
+        self.assertIn("email", response.data[1])
+        self.assertEqual(response.data[2]["email"], ["Duplicate value in this batch."])
+        self.assertEqual(response.data[3]["email"], ["Duplicate value in this batch."])
+        self.assertIn("name", response.data[4])
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_update(self):
+        first, second = self.customer(1), self.customer(2)
+        records = [{"id": first.pk, "name": "Renamed"}, {"id": str(second.pk), "phone": "555-0100"}]
+        response = self.client.patch(self.url, records, format="json")
+        self.assertEqual(response.status_code, 200)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.name, second.phone), ("Renamed", "555-0100"))
+
+    def test_update_unknown_or_repeated_id(self):
+        customer = self.customer(1)
+        records = [
+            {"id": customer.pk, "name": "Renamed"},
+            {"id": customer.pk + 1000, "name": "Ghost"},
+            {"name": "No id"},
+            {"id": customer.pk, "name": "Again"},
+        ]
+        response = self.client.patch(self.url, records, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(response.data[1]["id"], ["Unknown or missing id."])
+        self.assertEqual(response.data[2]["id"], ["Unknown or missing id."])
+        self.assertEqual(response.data[3]["id"], ["Duplicate id in this batch."])
+        customer.refresh_from_db()
+        self.assertEqual(customer.name, "Customer 1")
+
+    def test_delete(self):
+        first, second = self.customer(1), self.customer(2)
+        missing = second.pk + 1000
+        response = self.client.delete(self.url, [first.pk, str(second.pk), missing], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], ["deleted", "deleted", "not_found"]
+        )
+        self.assertFalse(Customer.objects.exists())
+        self.assertEqual(
+            set(Tombstone.objects.filter(model="customers.customer").values_list("object_id", flat=True)),
+            {first.pk, second.pk},
+        )
+
+    def test_delete_malformed_ids(self):
+        customer = self.customer(1)
+        response = self.client.delete(self.url, [customer.pk, "x", True, 1.5, "١", {"id": 1}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0], {})
+        for error in response.data[1:]:
+            self.assertEqual(error, {"id": ["A valid integer is required."]})
+        self.assertTrue(Customer.objects.filter(pk=customer.pk).exists())
+
+    def test_delete_needs_staff(self):
+        customer = self.customer(1)
+        self.client.force_authenticate(UserFactory(is_staff=False, is_superuser=False))
+        response = self.client.delete(self.url, [customer.pk], format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Customer.objects.filter(pk=customer.pk).exists())
+
+    def test_payload_shape_and_size(self):
+        response = self.client.post(self.url, {"name": "Ann", "email": "ann@example.com"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Expected a list of records.")
+
+        response = self.client.delete(self.url, list(range(1, 5002)), format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "At most 5000 records per request.")
+
+
+class SupplierItemTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.supplier = SupplierFactory(is_active=True)
+        self.active = ItemFactory(supplier=self.supplier, is_active=True)
+        self.inactive = ItemFactory(supplier=self.supplier, is_active=False)
+
+    def results(self, data):
+        return data["results"] if isinstance(data, dict) else data
+
+    def test_item_count_is_active_items(self):
+        listed = self.results(self.client.get(reverse_lazy("suppliers-list")).data)
+        self.assertEqual([row["item_count"] for row in listed], [1])
+        detail = self.client.get(reverse_lazy("suppliers-detail", args=[self.supplier.pk])).data
+        self.assertEqual(detail["item_count"], 1)
+
+    def test_filter_items_on_is_active(self):
+        for value, item in (("true", self.active), ("false", self.inactive)):
+            with self.subTest(is_active=value):
+                response = self.client.get(reverse_lazy("items-list"), {"is_active": value})
+                self.assertEqual([row["id"] for row in self.results(response.data)], [item.pk])
+
+
+class SyncTests(APITestCase):
+    url = reverse_lazy("customers-sync")
+
+    def sync(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_pages_then_catches_up(self):
+        customers = [self.customer(number) for number in range(5)]
+        # Older than the overlap, so the last page moves the cursor past them
+        Customer.objects.update(updated_at=timezone.now() - 2 * SYNC_OVERLAP)
+
+        first = self.sync(limit=2)
+        second = self.sync(limit=2, cursor=first["cursor"])
+        third = self.sync(limit=2, cursor=second["cursor"])
+        self.assertEqual((first["has_more"], second["has_more"], third["has_more"]), (True, True, False))
+        synced = [row["id"] for page in (first, second, third) for row in page["results"]]
+        self.assertEqual(synced, [customer.pk for customer in customers])
+
+        caught_up = self.sync(limit=2, cursor=third["cursor"])
+        self.assertEqual((caught_up["results"], caught_up["deleted"], caught_up["has_more"]), ([], [], False))
+
+        # An update after the cursor comes back on the next call
+        customers[1].name = "Renamed"
+        customers[1].save()
+        changed = self.sync(cursor=caught_up["cursor"])
+        self.assertEqual([(row["id"], row["name"]) for row in changed["results"]], [(customers[1].pk, "Renamed")])
+
+    def test_cursor_held_behind_the_overlap(self):
+        self.customer(1)
+        first = self.sync()
+        self.assertEqual(len(first["results"]), 1)
+        # Caught up on a recent row: the cursor stays SYNC_OVERLAP behind now, so it is sent again
+        position = decode_sync_cursor(first["cursor"])["changes"]
+        self.assertLessEqual(position[0], timezone.now() - SYNC_OVERLAP)
+        self.assertEqual(len(self.sync(cursor=first["cursor"])["results"]), 1)
+
+    def test_deactivated_and_deleted(self):
+        kept, deactivated, deleted = self.customer(1), self.customer(2), self.customer(3)
+        start = self.sync()["cursor"]
+
+        deactivated.is_active = False
+        deactivated.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        data = self.sync(cursor=start)
+        self.assertEqual([row["id"] for row in data["results"]], [kept.pk])
+        self.assertCountEqual(
+            data["deleted"], [{"id": deactivated.pk, "reason": "deactivated"}, {"id": deleted_pk, "reason": "deleted"}]
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ("garbage", encode_sync_cursor({"changes": None, "deleted": None})[:-2] + "!!"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data["detail"], "Invalid sync cursor.")
+
+    def test_invalid_limit(self):
+        for limit in ("0", "-1", "abc", "1.5"):
+            with self.subTest(limit=limit):
+                response = self.client.get(self.url, {"limit": limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("limit", response.data)
+
+    def test_limit_is_capped(self):
+        self.customer(1)
+        self.assertEqual(len(self.sync(limit=10**9)["results"]), 1)
+
+    def test_regular_client_never_expires(self):
+        kept, deleted = self.customer(1), self.customer(2)
+        deleted_pk = deleted.pk
+        start = timezone.now()
+        cursor = self.sync()["cursor"]
+        # Syncing every 20 days, well past the tombstone retention since the first sync
+        for days in range(20, 2 * SYNC_TOMBSTONE_RETENTION.days, 20):
+            now = start + timedelta(days=days)
+            if days == 60:
+                deleted.delete()
+                Tombstone.objects.update(deleted_at=now - timedelta(hours=1))
+            with mock.patch("django.utils.timezone.now", return_value=now):
+                data = self.sync(cursor=cursor)
+            expected = [{"id": deleted_pk, "reason": "deleted"}] if days == 60 else []
+            self.assertEqual(data["deleted"], expected, f"day {days}")
+            cursor = data["cursor"]
+        self.assertGreater(decode_sync_cursor(cursor)["deleted"][0], start + SYNC_TOMBSTONE_RETENTION)
+        self.assertTrue(Customer.objects.filter(pk=kept.pk).exists())
 
-# Create your tests here.
+    def test_expired_cursor(self):
+        expired = timezone.now() - SYNC_TOMBSTONE_RETENTION - timedelta(days=1)
+        for positions in ({"changes": None, "deleted": (expired, 0)}, {"changes": None, "deleted": None}):
+            with self.subTest(positions=positions):
+                response = self.client.get(self.url, {"cursor": encode_sync_cursor(positions)})
+                self.assertEqual(response.status_code, 410)
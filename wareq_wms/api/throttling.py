@@ -0,0 +1,182 @@
+"""
+Token-bucket throttles with shared state.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per key in
+the cache, which is per-process with the local-memory backend and is
+rewritten on every check. Here each key is one ThrottleBucket row
+(tokens + last refill time), updated with a single conditional UPDATE:
+
+    tokens = min(capacity, tokens + elapsed * refill) - n
+    WHERE  min(capacity, tokens + elapsed * refill) >= n
+
+Workers don't take tokens one request at a time: each takes a lease of n
+tokens and serves the key's next requests from it in memory until it runs
+out or LEASE_SECONDS pass. A lease used up in time doubles the next one (up
+to LEASE_FRACTION of the capacity, at most LEASE_MAX), an expired one
+starts over at a single token, so a busy key costs one UPDATE per lease
+rather than per request, while a slow one never strands tokens. A lease
+is taken out of the bucket, so no key gets past its rate; other workers
+can be refused while one still holds up to a lease of tokens.
+
+Rates use the usual "500/hour" syntax: 500 is the burst capacity and the
+bucket refills at 500 tokens per hour.
+"""
+import threading
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from rest_framework.throttling import SimpleRateThrottle
+
+from .models import ThrottleBucket
+
+LEASE_SECONDS = 10
+LEASE_FRACTION = 0.05  # of the capacity
+LEASE_MAX = 100
+MAX_LEASES = 10000  # per process; expired ones are dropped beyond this
+
+
+def bucket_level(capacity, refill, now):
+    """Tokens available at `now`, as a SQL expression over the bucket row."""
+    return Least(Value(float(capacity)), F("tokens") + (Value(now) - F("refilled_at")) * Value(refill))
+
+
+def take_from_bucket(key, capacity, refill, cost):
+    """
+    Take `cost` tokens from the bucket row at `key`.
+    Returns (allowed, seconds until enough tokens are available).
+    """
+    now = time.time()
+    taken = (
+        ThrottleBucket.objects.filter(key=key)
+        .alias(level=bucket_level(capacity, refill, now))
+        .filter(level__gte=cost)
+        .update(tokens=bucket_level(capacity, refill, now) - cost, refilled_at=now)
+    )
+    if taken:
+        return True, 0
+
+    bucket = ThrottleBucket.objects.filter(key=key).values_list("tokens", "refilled_at").first()
+    if bucket is None:
+        try:
+            with transaction.atomic():
+                ThrottleBucket.objects.create(key=key, tokens=capacity - cost, refilled_at=now)
+            return True, 0
+        except IntegrityError:
+            # Another worker created it first: take from that bucket instead
+            return take_from_bucket(key, capacity, refill, cost)
+
+    tokens, refilled_at = bucket
+    level = min(capacity, tokens + (now - refilled_at) * refill)
+    return False, max(0.0, (cost - level) / refill)
+
+
+class Lease:
+    __slots__ = ("tokens", "size", "expires")
+
+    def __init__(self, tokens, size, expires):
+        self.tokens, self.size, self.expires = tokens, size, expires
+
+
+_leases = {}
+_leases_lock = threading.Lock()
+
+
+def take_token(key, capacity, refill, cost=1):
+    """
+    Take `cost` tokens for `key`, from this worker's lease when it has them.
+    Returns (allowed, seconds until enough tokens are available).
+    """
+    now = time.monotonic()
+    with _leases_lock:
+        lease = _leases.get(key)
+        if lease is not None and lease.expires > now:
+            if lease.tokens >= cost:
+                lease.tokens -= cost
+                return True, 0
+            # Used up before expiring: the key is busy, lease more
+            size = lease.size * 2
+        else:
+            size = 1
+    size = max(cost, min(size, int(capacity * LEASE_FRACTION), LEASE_MAX))
+
+    allowed, wait = take_from_bucket(key, capacity, refill, size)
+    if not allowed and size > cost:
+        size = cost
+        allowed, wait = take_from_bucket(key, capacity, refill, size)
+    if not allowed:
+        return False, wait
+
+    with _leases_lock:
+        if len(_leases) >= MAX_LEASES:
+            for stale in [k for k, value in _leases.items() if value.expires <= now]:
+                del _leases[stale]
+        # Tokens left on a live lease (another thread's, or fewer than cost) stay usable
+        current = _leases.get(key)
+        carried = current.tokens if current is not None and current.expires > now else 0
+        _leases[key] = Lease(carried + size - cost, size, now + LEASE_SECONDS)
+    return True, 0
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base class: subclasses set `scope` and get_cache_key() as with DRF's throttles.
+
+    A view can charge more than one token per request with
+    get_throttle_cost(request) (e.g. the batch endpoint, one per operation).
+    Sub-requests dispatched by the batch endpoint are not charged again.
+    """
+
+    def get_request_rate(self, request):
+        return self.rate
+
+    def allow_request(self, request, view):
+        if getattr(request, "batched", False):
+            return True
+        rate = self.get_request_rate(request)
+        if rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity, duration = self.parse_rate(rate)
+        cost = view.get_throttle_cost(request) if hasattr(view, "get_throttle_cost") else 1
+        allowed, self.wait_seconds = take_token(self.key, capacity, capacity / duration, min(cost, capacity))
+        return allowed
+
+    def wait(self):
+        return getattr(self, "wait_seconds", None)
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Anonymous requests, keyed by client IP (rate: "anon")."""
+    scope = "anon"
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
+
+
+class PlanTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Authenticated requests, keyed by user, at the rate of their company's
+    plan: "plan_free", "plan_pro", "plan_enterprise" ("user" without a company
+    or a configured plan rate).
+    """
+    scope = "user"
+
+    def get_request_rate(self, request):
+        company = getattr(request.user, "company", None)
+        if company is not None:
+            rate = self.THROTTLE_RATES.get(f"plan_{company.plan.lower()}")
+            if rate is not None:
+                return rate
+        return self.rate
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {"scope": self.scope, "ident": request.user.pk}
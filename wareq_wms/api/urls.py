@@ -1,7 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import CustomerViewSet, SupplierViewSet, ItemViewSet, OrderViewSet
+from .views import CustomerViewSet, SupplierViewSet, ItemViewSet, OrderViewSet, cache_stats, kpis
+from .batch import BatchView
 
 # Router for CRUD endpoints
 router = DefaultRouter()
@@ -15,6 +16,15 @@ urlpatterns = [
     path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
+    # Response cache hit/miss metrics (admin only)
+    path("cache/stats/", cache_stats, name="api_cache_stats"),
+
+    # KPI time series (hourly/daily rollups)
+    path("kpis/", kpis, name="api_kpis"),
+
+    # Several API calls in one request / transaction
+    path("batch/", BatchView.as_view(), name="api_batch"),
+
     # API Endpoints
     path("", include(router.urls)),
 ]
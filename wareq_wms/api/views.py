@@ -1,11 +1,45 @@
-from rest_framework import viewsets, filters
-from rest_framework.permissions import IsAuthenticated, SAFE_METHODS, BasePermission
+from rest_framework import viewsets, filters, serializers, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, SAFE_METHODS, BasePermission
 from django_filters.rest_framework import DjangoFilterBackend
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.conf import settings
+from django.db.models import Count, DecimalField, F, Max, Q, Sum
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date, parse_http_date_safe, urlsafe_base64_decode, urlsafe_base64_encode
+from collections import defaultdict
+from datetime import timedelta
+import hashlib
+import json
 
+from customers import search as customer_search
 from customers.models import Customer
+from suppliers import catalog, scorecards
 from suppliers.models import Supplier, Item
-from orders.models import Order
-from .serializers import CustomerSerializer, SupplierSerializer, ItemSerializer, OrderSerializer
+from orders.models import Order, OrderItem
+from core import fragments
+from core.counters import reconcile as reconcile_counters
+from dashboard import rollups
+from .serializers import (
+    CustomerSerializer,
+    SupplierSerializer,
+    ItemSerializer,
+    OrderSerializer,
+    OrderItemSerializer,
+    BulkListSerializer,
+    split_query_param,
+)
+from .models import Tombstone
+from .renderers import FastJSONRenderer
+from . import cache as response_cache
 
 
 # Custom permission: only admins can delete
@@ -22,7 +56,631 @@ class IsAdminOrReadUpdate(BasePermission):
         return False
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+def column_path(model, source):
+    """
+    Return the values() lookup for a serializer source that ends on a
+    column ("sku" → "sku", "supplier.name" → "supplier__name"), else None.
+    """
+    attrs = source.split(".")
+    if len(attrs) > 2:
+        return None
+    try:
+        model_field = model._meta.get_field(attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if getattr(model_field, "column", None) is None:
+        return None
+    if len(attrs) == 1:
+        return model_field.name
+    if not model_field.many_to_one:
+        return None
+    try:
+        related_field = model_field.related_model._meta.get_field(attrs[1])
+    except FieldDoesNotExist:
+        return None
+    if getattr(related_field, "column", None) is None:
+        return None
+    return f"{attrs[0]}__{attrs[1]}"
+
+
+def is_reverse_relation(model, source):
+    try:
+        return getattr(model._meta.get_field(source.split(".")[0]), "column", None) is None
+    except FieldDoesNotExist:
+        return False
+
+
+def sparse_columns(model, serializer_fields):
+    """
+    Map serializer fields to the model columns they read.
+    Returns (only_fields, select_related) or None when a field reads
+    something that isn't a plain column (property, nested serializer),
+    in which case the queryset must stay untouched.
+    """
+    only, related = {model._meta.pk.name}, set()
+    for field in serializer_fields:
+        if isinstance(field, serializers.BaseSerializer) or field.source == "*":
+            return None
+        path = column_path(model, field.source)
+        if path is None:
+            # Reverse relation (e.g. supplier_items.count) - no local column
+            if is_reverse_relation(model, field.source):
+                continue
+            return None
+        only.add(path)
+        if "__" in path:
+            related.add(path.split("__")[0])
+    return only, related
+
+
+class SparseFieldsetMixin:
+    """
+    Fetch only the columns needed for ?fields= / ?omit= requests,
+    so unrequested fields are neither loaded nor serialized.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        if not (split_query_param(self.request, "fields") or split_query_param(self.request, "omit")):
+            return queryset
+
+        columns = sparse_columns(queryset.model, self.get_serializer().fields.values())
+        if columns is None:
+            return queryset
+        only, related = columns
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*only)
+
+
+class ConditionalGetMixin:
+    """
+    Emit ETag / Last-Modified validators on GET and answer
+    If-None-Match / If-Modified-Since with 304 before serializing.
+
+    - Detail: validators come from the row's updated_at.
+    - List: validators come from max(updated_at) + count of the filtered queryset.
+    """
+    # Relations whose rows also show up in the payload (e.g. item_count)
+    conditional_relations = []
+
+    def get_fingerprint(self, queryset):
+        aggregates = {"last": Max("updated_at"), "count": Count("pk", distinct=True)}
+        for relation in self.conditional_relations:
+            aggregates[f"{relation}_last"] = Max(f"{relation}__updated_at")
+            aggregates[f"{relation}_count"] = Count(relation, distinct=True)
+        return queryset.order_by().aggregate(**aggregates)
+
+    def conditional_response(self, request, queryset):
+        """
+        Return (not_modified_response, validators).
+        Validators are None when the payload can't be fingerprinted.
+        """
+        # Expanded objects change independently of the rows we fingerprint
+        if split_query_param(request, "expand"):
+            return None, None
+
+        fingerprint = self.get_fingerprint(queryset)
+        if not fingerprint["count"]:
+            return None, None
+
+        label = queryset.model._meta.label_lower
+        raw = ":".join([label] + [str(fingerprint[key]) for key in sorted(fingerprint)])
+        etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+        stamps = [value for key, value in fingerprint.items() if key.endswith("last") and value]
+        last_modified = int(max(stamps).timestamp()) if stamps else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        return not_modified, (etag, last_modified)
+
+    def with_validators(self, response, validators):
+        if validators and response.status_code == 200:
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        not_modified, validators = self.conditional_response(request, queryset)
+        if not_modified is not None:
+            return not_modified
+        return self.with_validators(super().list(request, *args, **kwargs), validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+            not_modified, validators = self.conditional_response(request, queryset)
+        except (TypeError, ValueError, DjangoValidationError):
+            # A pk of the wrong type, as DRF's get_object_or_404() treats it
+            raise Http404
+        if not_modified is not None:
+            return not_modified
+        return self.with_validators(super().retrieve(request, *args, **kwargs), validators)
+
+
+def none_safe(convert):
+    """DRF leaves None as None instead of calling to_representation()."""
+    return lambda value: None if value is None else convert(value)
+
+
+class FastListMixin:
+    """
+    Opt-in read path for list routes (fast_list = True).
+
+    Rows come straight from values_list() tuples through precompiled
+    per-field converters (each serializer field's own to_representation),
+    skipping model instances and field-by-field serialization, and are
+    rendered with FastJSONRenderer. Output matches the serializer schema.
+
+    Falls back to the regular list() when a field can't be read as a column
+    (nested ?expand= serializers, properties without a fast_annotations entry).
+    """
+    fast_list = False
+    # Fields computed in SQL: name -> expression or (expression, converter)
+    fast_annotations = {}
+
+    def get_fast_plan(self, model, serializer=None, fast_annotations=None):
+        """Return (names, lookups, converters, annotations) or None."""
+        serializer = self.get_serializer() if serializer is None else serializer
+        fast_annotations = self.fast_annotations if fast_annotations is None else fast_annotations
+        names, lookups, converters, annotations = [], [], [], {}
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if field.field_name in fast_annotations:
+                spec = fast_annotations[field.field_name]
+                expression, convert = spec if isinstance(spec, tuple) else (spec, none_safe(field.to_representation))
+                lookup = f"fast_{field.field_name}"
+                annotations[lookup] = expression
+            elif isinstance(field, serializers.BaseSerializer) or field.source == "*":
+                return None
+            else:
+                lookup = column_path(model, field.source)
+                if lookup is None:
+                    return None
+                if isinstance(field, serializers.PrimaryKeyRelatedField):
+                    convert = lambda value: value  # values() already yields the pk
+                else:
+                    convert = none_safe(field.to_representation)
+            names.append(field.field_name)
+            lookups.append(lookup)
+            converters.append(convert)
+        return names, lookups, converters, annotations
+
+    def build_fast_rows(self, plan, rows):
+        """values_list() tuples → serializer-shaped dicts (extra trailing values are ignored)."""
+        names, lookups, converters, annotations = plan
+        return [
+            {name: convert(value) for name, convert, value in zip(names, converters, row)}
+            for row in rows
+        ]
+
+    def list(self, request, *args, **kwargs):
+        if not self.fast_list or type(request.accepted_renderer) is not JSONRenderer:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = self.get_fast_plan(queryset.model)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        names, lookups, converters, annotations = plan
+
+        rows = queryset.annotate(**annotations).values_list(*lookups)
+        page = self.paginate_queryset(rows)
+        data = self.build_fast_rows(plan, rows if page is None else page)
+
+        request.accepted_renderer = FastJSONRenderer()
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+
+SYNC_OVERLAP = timedelta(seconds=getattr(settings, "SYNC_OVERLAP_SECONDS", 300))
+SYNC_TOMBSTONE_RETENTION = timedelta(days=getattr(settings, "SYNC_TOMBSTONE_DAYS", 90))
+
+
+def encode_sync_cursor(positions):
+    """{"changes": (datetime, id) | None, "deleted": (datetime, id)} → opaque token."""
+    raw = {key: [pos[0].isoformat(), pos[1]] if pos else None for key, pos in positions.items()}
+    return urlsafe_base64_encode(json.dumps(raw, separators=(",", ":")).encode())
+
+
+def decode_sync_cursor(token):
+    try:
+        raw = json.loads(urlsafe_base64_decode(token))
+        positions = {}
+        for key in ("changes", "deleted"):
+            pos = raw.get(key)
+            positions[key] = (parse_datetime(pos[0]), int(pos[1])) if pos else None
+            if pos and positions[key][0] is None:
+                raise ValueError
+        return positions
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise ValueError("Invalid sync cursor.")
+
+
+def after_position(queryset, field, position):
+    """Keyset filter: rows strictly after (field, id) = position."""
+    if position is None:
+        return queryset
+    stamp, pk = position
+    return queryset.filter(Q(**{f"{field}__gt": stamp}) | Q(**{field: stamp, "pk__gt": pk}))
+
+
+class DeltaSyncMixin:
+    """
+    Incremental sync for offline clients: /<resource>/sync/?cursor=...&limit=...
+
+    - results: rows created/updated since the cursor (serializer schema)
+    - deleted: [{"id", "reason"}] for hard deletes (Tombstone) and
+      soft deletes (is_active=False)
+    - cursor:  pass back on the next call; has_more → keep paging
+
+    Rows are walked in (updated_at, id) order on an index, so same-timestamp
+    ties page stably. Once caught up, the cursor moves to SYNC_OVERLAP behind
+    now: rows committed late with an older updated_at (long transactions,
+    clock skew between workers) are picked up next time. Clients upsert by
+    id, so re-sent rows are harmless. Both positions move forward on every
+    caught-up call, so only a client that hasn't synced for
+    SYNC_TOMBSTONE_DAYS (tombstones it may have missed are gone) gets 410.
+    """
+    sync_limit = 500
+    sync_max_limit = 5000
+
+    @action(detail=False, methods=["get"], url_path="sync")
+    def sync(self, request):
+        queryset = self.get_queryset()
+        model = queryset.model
+        now = timezone.now()
+        horizon = (now - SYNC_OVERLAP, 0)
+
+        token = request.query_params.get("cursor")
+        try:
+            positions = decode_sync_cursor(token) if token else {"changes": None, "deleted": horizon}
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Above sync_max_limit is capped rather than refused
+            limit = serializers.IntegerField(min_value=1).run_validation(
+                request.query_params.get("limit", self.sync_limit)
+            )
+        except serializers.ValidationError as exc:
+            return Response({"limit": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.sync_max_limit)
+        if positions["deleted"] is None or positions["deleted"][0] < now - SYNC_TOMBSTONE_RETENTION:
+            return Response(
+                {"detail": "Sync cursor expired, start a full sync without a cursor."},
+                status=status.HTTP_410_GONE,
+            )
+
+        has_active = any(field.name == "is_active" for field in model._meta.concrete_fields)
+        extra = ["pk", "updated_at"] + (["is_active"] if has_active else [])
+        rows = after_position(queryset.order_by(), "updated_at", positions["changes"]).order_by("updated_at", "pk")
+
+        plan = self.get_fast_plan(model) if getattr(self, "fast_list", False) else None
+        if plan is not None:
+            changed = list(rows.annotate(**plan[3]).values_list(*plan[1], *extra)[:limit + 1])
+            states = [row[-len(extra):] for row in changed[:limit]]
+            data = self.build_fast_rows(plan, changed[:limit])
+        else:
+            changed = list(rows[:limit + 1])
+            states = [tuple(getattr(obj, name) for name in extra) for obj in changed[:limit]]
+            data = self.get_serializer(changed[:limit], many=True).data
+
+        results, deleted = [], []
+        for row, state in zip(data, states):
+            if has_active and not state[2]:
+                deleted.append({"id": state[0], "reason": "deactivated"})
+            else:
+                results.append(row)
+
+        tombstones = list(
+            after_position(
+                Tombstone.objects.filter(model=model._meta.label_lower), "deleted_at", positions["deleted"]
+            )
+            .order_by("deleted_at", "pk")
+            .values_list("pk", "object_id", "deleted_at")[:limit + 1]
+        )
+        deleted += [{"id": object_id, "reason": "deleted"} for _, object_id, _ in tombstones[:limit]]
+
+        changes_full, deleted_full = len(changed) > limit, len(tombstones) > limit
+        page = tombstones[:limit]
+        last_deleted = (page[-1][2], page[-1][0]) if page else positions["deleted"]
+        cursor = encode_sync_cursor({
+            # Caught up: held at the overlap horizon, so late commits come on the next call
+            "changes": (states[-1][1], states[-1][0]) if changes_full else horizon,
+            # Caught up: at least the horizon, so a client that keeps syncing never expires
+            "deleted": last_deleted if deleted_full else max(last_deleted, horizon),
+        })
+        return Response({
+            "results": results,
+            "deleted": deleted,
+            "cursor": cursor,
+            "has_more": changes_full or deleted_full,
+        })
+
+
+class NDJSONExportMixin:
+    """
+    Streaming full dump: /<resource>/export/ → application/x-ndjson,
+    one record per line, for warehouse loaders.
+
+    The table is walked in pk keyset chunks (no OFFSET), each chunk read
+    through the fast plan when available and written out before the next
+    one is fetched, so memory stays flat whatever the table size. Under
+    ASGI the chunks come from an async generator (each fetched through
+    sync_to_async), since the server would buffer a sync one whole. Filters
+    and ?fields= apply; ordering is always by id.
+
+    export_children: {"name": (reverse accessor, serializer class)} — child
+    rows for a whole chunk are fetched with one IN query and nested under
+    "name" on each record.
+    """
+    export_chunk_size = 2000
+    export_children = {}
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by("pk")
+        plan = self.get_fast_plan(queryset.model) if getattr(self, "fast_list", False) else None
+        # An ASGI server buffers a sync iterator whole (sync_to_async(list)) before sending:
+        # give it an async one, so both servers stream chunk by chunk
+        if isinstance(request._request, ASGIRequest):
+            chunks = self.aexport_chunks(queryset, plan)
+        else:
+            chunks = self.export_chunks(queryset, plan)
+        response = StreamingHttpResponse(chunks, content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}.ndjson"'
+        return response
+
+    def export_chunks(self, queryset, plan):
+        last_pk = None
+        while True:
+            data, last_pk = self.export_chunk(queryset, plan, last_pk)
+            if data:
+                yield data
+            if last_pk is None:
+                return
+
+    async def aexport_chunks(self, queryset, plan):
+        export_chunk = sync_to_async(self.export_chunk)
+        last_pk = None
+        while True:
+            data, last_pk = await export_chunk(queryset, plan, last_pk)
+            if data:
+                yield data
+            if last_pk is None:
+                return
+
+    def export_chunk(self, queryset, plan, last_pk):
+        """(NDJSON bytes of the chunk after last_pk, its last pk or None when it was the last one)."""
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        if plan is not None:
+            rows = list(chunk.annotate(**plan[3]).values_list(*plan[1], "pk")[:self.export_chunk_size])
+            pks = [row[-1] for row in rows]
+            records = self.build_fast_rows(plan, rows)
+        else:
+            rows = list(chunk[:self.export_chunk_size])
+            pks = [obj.pk for obj in rows]
+            records = self.get_serializer(rows, many=True).data
+        if not rows:
+            return b"", None
+
+        for name, (accessor, serializer_class) in self.export_children.items():
+            children = self.export_child_rows(queryset.model, accessor, serializer_class, pks)
+            for pk, record in zip(pks, records):
+                record[name] = children.get(pk, [])
+
+        renderer = FastJSONRenderer()
+        data = b"".join(renderer.render(record) + b"\n" for record in records)
+        return data, pks[-1] if len(rows) == self.export_chunk_size else None
+
+    def export_child_rows(self, model, accessor, serializer_class, pks):
+        """Child records of a chunk, grouped by parent pk (one query)."""
+        relation = model._meta.get_field(accessor)
+        fk = relation.field
+        children = relation.related_model._default_manager.filter(**{f"{fk.name}__in": pks}).order_by(fk.attname, "pk")
+        serializer = serializer_class(context=self.get_serializer_context())
+        plan = self.get_fast_plan(relation.related_model, serializer, {})
+
+        grouped = defaultdict(list)
+        if plan is not None:
+            rows = list(children.values_list(*plan[1], fk.attname))
+            for row, record in zip(rows, self.build_fast_rows(plan, rows)):
+                grouped[row[-1]].append(record)
+        else:
+            rows = list(children)
+            for obj, record in zip(rows, serializer_class(rows, many=True, context=serializer.context).data):
+                grouped[getattr(obj, fk.attname)].append(record)
+        return grouped
+
+
+class CachedResponseMixin:
+    """
+    Cache rendered JSON for list/retrieve per tenant (see api.cache).
+    Entries are keyed on the generations of cache_dependencies, so any
+    save/delete of those models makes them unreachable.
+    """
+    cache_dependencies = []
+
+    def cached_response(self, request):
+        self.response_cache_key = None
+        if not self.cache_dependencies or request.accepted_renderer.format != "json":
+            return None
+        if getattr(request, "batch_has_writes", False):
+            return None  # batch sub-request reading its own uncommitted writes
+
+        key = response_cache.response_key(request, self.cache_dependencies)
+        entry = response_cache.get_cache().get(key)
+        if entry is None:
+            response_cache.record(self.basename, "miss")
+            self.response_cache_key = key
+            return None
+
+        response_cache.record(self.basename, "hit")
+        not_modified = get_conditional_response(
+            request, etag=entry["headers"].get("ETag"), last_modified=entry["last_modified"]
+        )
+        response = not_modified or HttpResponse(entry["content"], content_type=entry["content_type"])
+        for header, value in entry["headers"].items():
+            response[header] = value
+        response["X-Cache"] = "HIT"
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key and response.status_code == 200:
+            response.render()
+            response_cache.get_cache().set(key, {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "headers": {h: response[h] for h in ("ETag", "Last-Modified") if h in response},
+                "last_modified": parse_http_date_safe(response.get("Last-Modified")),
+            }, response_cache.CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        response = self.cached_response(request)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(request)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return response
+
+
+def is_record_id(value):
+    """An integer id, or its decimal string ("12"), as a bulk delete accepts."""
+    if isinstance(value, str):
+        return value.isascii() and value.isdigit()
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class BulkModelMixin:
+    """
+    List-level bulk endpoint: /<resource>/bulk/
+
+    - POST   [{...}, ...]          → bulk_create
+    - PATCH  [{"id": 1, ...}, ...] → bulk_update (partial)
+    - DELETE [1, 2, ...]           → delete by id
+
+    The whole payload is validated with a many=True serializer and written
+    in one transaction; errors come back per record, aligned with the input.
+    Database errors are reported generically, never with the raw message.
+    """
+    bulk_max_records = 5000
+    integrity_error = "Conflicts with existing data (a unique value, or a record other records refer to)."
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        records = request.data
+        if not isinstance(records, list):
+            return Response({"detail": "Expected a list of records."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > self.bulk_max_records:
+            return Response(
+                {"detail": f"At most {self.bulk_max_records} records per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.method == "DELETE":
+            return self.bulk_destroy(records)
+
+        instances = None
+        if request.method == "PATCH":
+            ids = [r.get("id") for r in records if isinstance(r, dict) and str(r.get("id", "")).isdigit()]
+            queryset = self.get_queryset()
+            related = [f.name for f in queryset.model._meta.concrete_fields if f.many_to_one]
+            instances = list(queryset.select_related(*related).in_bulk(ids).values())
+
+        serializer = self.get_serializer(instances, data=records, many=True, partial=instances is not None)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                saved = serializer.save()
+        except IntegrityError:
+            # A race with another writer (the serializer checks uniqueness first): nothing was saved
+            return Response(
+                {"detail": f"{self.integrity_error} Nothing was saved."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        # bulk_create / bulk_update don't send post_save
+        response_cache.bump_generation(self.get_queryset().model)
+        reconcile_counters([self.get_queryset().model])
+        self.bulk_saved(saved)
+
+        code = status.HTTP_201_CREATED if instances is None else status.HTTP_200_OK
+        return Response({"count": len(serializer.data), "results": serializer.data}, status=code)
+
+    def bulk_saved(self, instances):
+        """Hook for other caches kept up to date by post_save receivers."""
+
+    def bulk_destroy(self, ids):
+        errors = [{} if is_record_id(pk) else {"id": ["A valid integer is required."]} for pk in ids]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        pks = [int(pk) for pk in ids]
+        existing, failed = set(), set()
+        batch_size = BulkListSerializer.batch_size
+        with transaction.atomic():
+            for start in range(0, len(pks), batch_size):
+                queryset = self.get_queryset().filter(pk__in=pks[start:start + batch_size])
+                found = set(queryset.values_list("pk", flat=True))
+                try:
+                    with transaction.atomic():
+                        queryset.delete()
+                except IntegrityError:
+                    # Find the records that can't go, one savepoint each (only on this failure path)
+                    for pk in sorted(found):
+                        try:
+                            with transaction.atomic():
+                                self.get_queryset().filter(pk=pk).delete()
+                        except IntegrityError:
+                            failed.add(pk)
+                existing |= found
+            if failed:
+                transaction.set_rollback(True)
+
+        if failed:
+            results = [
+                {"id": pk, "status": "error", "detail": self.integrity_error} if pk in failed
+                else {"id": pk, "status": "not_deleted" if pk in existing else "not_found"}
+                for pk in pks
+            ]
+            return Response({"count": 0, "results": results}, status=status.HTTP_400_BAD_REQUEST)
+        results = [{"id": pk, "status": "deleted" if pk in existing else "not_found"} for pk in pks]
+        return Response({"count": len(existing), "results": results})
+
+
+class CustomerSearchFilter(filters.SearchFilter):
+    """?search= through the customers' normalized search keys (customers.search)."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        return queryset.filter(customer_search.search_filter(query)) if query.strip() else queryset
+
+
+class CustomerViewSet(
+    CachedResponseMixin,
+    DeltaSyncMixin,
+    NDJSONExportMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing Customers.
     Supports search, ordering, and filtering.
@@ -31,14 +689,28 @@ class CustomerViewSet(viewsets.ModelViewSet):
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadUpdate]
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [CustomerSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ["name", "email", "phone"]
     ordering_fields = ["created_at", "name"]
     filterset_fields = ["is_active"]  # Example field
     ordering = ["-created_at"]
+    fast_list = True
+    cache_dependencies = [Customer]
 
+    def bulk_saved(self, instances):
+        # bulk_create / bulk_update skip Customer.save(): derive the search keys now
+        customer_search.reindex(instances)
 
-class SupplierViewSet(viewsets.ModelViewSet):
+
+class SupplierViewSet(
+    CachedResponseMixin,
+    DeltaSyncMixin,
+    NDJSONExportMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing Suppliers.
     """
@@ -51,9 +723,28 @@ class SupplierViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at", "name"]
     filterset_fields = ["is_active"]
     ordering = ["-created_at"]
+    conditional_relations = ["supplier_items"]  # item_count
+    cache_dependencies = [Supplier, Item]
+    fast_list = True
+    fast_annotations = {"item_count": Count("supplier_items", filter=Q(supplier_items__is_active=True))}
+
+    @action(detail=True, methods=["get"], url_path="scorecard")
+    def scorecard(self, request, pk=None):
+        """Purchase-order scorecard over rolling windows (suppliers.scorecards)."""
+        supplier = self.get_object()
+        return Response({"supplier": supplier.pk, "windows": scorecards.scorecard(supplier.pk)})
 
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(
+    CachedResponseMixin,
+    DeltaSyncMixin,
+    NDJSONExportMixin,
+    BulkModelMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing Inventory Items.
     """
@@ -66,9 +757,26 @@ class ItemViewSet(viewsets.ModelViewSet):
     ordering_fields = ["price", "quantity", "created_at"]
     filterset_fields = ["supplier", "is_active"]
     ordering = ["-created_at"]
+    conditional_relations = ["supplier"]  # supplier_name
+    cache_dependencies = [Item, Supplier]
+    fast_list = True
 
+    def bulk_saved(self, instances):
+        # Supplier detail stats (suppliers.catalog), old and new supplier of each item
+        supplier_ids = {item.supplier_id for item in instances}
+        supplier_ids.update(getattr(item, "_catalog_supplier_id", None) for item in instances)
+        catalog.forget(supplier_ids)
 
-class OrderViewSet(viewsets.ModelViewSet):
+
+class OrderViewSet(
+    CachedResponseMixin,
+    DeltaSyncMixin,
+    NDJSONExportMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetMixin,
+    viewsets.ModelViewSet,
+):
     """
     API endpoint for managing Orders.
     """
@@ -81,3 +789,81 @@ class OrderViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at", "status", "order_type"]
     filterset_fields = ["status", "order_type", "customer", "supplier"]
     ordering = ["-created_at"]
+    cache_dependencies = [Order, OrderItem, Customer, Supplier]  # lines + ?expand=
+    export_children = {"lines": ("items", OrderItemSerializer)}
+    fast_list = True
+    fast_annotations = {
+        # Order.total_amount: Decimal sum (rendered as a float), or 0 with no lines
+        "total_amount": (
+            Sum(F("items__quantity") * F("items__price"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+            lambda value: 0 if value is None else value,
+        ),
+    }
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Hit/miss counters of the API response cache, per resource, of the JWT
+    user cache ("auth") and of the dashboard widgets ("widget:<name>",
+    with the average render time on a miss).
+    """
+    widgets = [fragments.stats_resource(name) for name in fragments.WIDGETS]
+    return Response(response_cache.get_stats(["customers", "suppliers", "items", "orders", "auth"] + widgets))
+
+
+def parse_moment(value):
+    """ISO datetime or date (start of that day), as an aware datetime."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date/time '{value}'.")
+        return rollups.day_start(day)
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+
+
+@api_view(["GET"])
+def kpis(request):
+    """
+    KPI time series from the hourly/daily rollups (dashboard.rollups).
+
+    ?metric=orders&granularity=hour|day&start=...&end=...&group_by=dimension&dimension=SALE
+
+    start / end are ISO dates or datetimes (end exclusive); the default range
+    is the last 24 hours (hour) or 30 days (day). Hourly buckets older than
+    KPI_HOURLY_RETENTION_DAYS are only kept per day. Without a metric the
+    available metrics are listed.
+    """
+    params = request.query_params
+    metric = params.get("metric")
+    if not metric:
+        return Response({"metrics": rollups.METRICS})
+
+    granularity = params.get("granularity", "hour")
+    try:
+        end = parse_moment(params["end"]) if params.get("end") else timezone.now()
+        default_span = timedelta(days=30) if granularity == "day" else timedelta(hours=24)
+        start = parse_moment(params["start"]) if params.get("start") else end - default_span
+        result = rollups.query(
+            metric, start, end, granularity,
+            group_by=params.get("group_by") or None,
+            dimensions=params.getlist("dimension"),
+        )
+    except ValueError as exc:  # includes RollupQueryError
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def points(series):
+        return [{"bucket": point["bucket"].isoformat(), "value": float(point["value"])} for point in series]
+
+    return Response({
+        "metric": metric,
+        "granularity": granularity,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "series": (
+            {dimension: points(series) for dimension, series in result.items()}
+            if isinstance(result, dict) else points(result)
+        ),
+    })
@@ -0,0 +1,115 @@
+"""
+Entity counters for the dashboards.
+
+Every total the homepage and dashboards show (customers, suppliers, items,
+orders, plus the active / low stock / pending segments) is one
+EntityCounter row, so a page reads them all with a single primary-key scan
+instead of a COUNT(*) per model.
+
+Rows are adjusted by model signals in the same transaction as the save or
+delete (core.signals). Writes that skip signals (queryset.update(),
+bulk_create()) call reconcile() for the model, and `manage.py
+reconcile_counters` recounts everything periodically.
+"""
+from collections import namedtuple
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from customers.models import Customer
+from inventory.models import Item
+from orders.models import Order
+from suppliers.models import Supplier
+from .models import EntityCounter
+
+# condition: the same rule as SQL (reconcile) and in Python (signals); fields: what `test` reads
+Counter = namedtuple("Counter", "model condition test fields")
+
+LOW_STOCK = 5  # Item.is_low_stock()
+
+COUNTERS = {
+    "customers": Counter(Customer, Q(), lambda obj: True, ()),
+    "customers_active": Counter(Customer, Q(is_active=True), lambda obj: obj.is_active, ("is_active",)),
+    "suppliers": Counter(Supplier, Q(), lambda obj: True, ()),
+    "suppliers_active": Counter(Supplier, Q(is_active=True), lambda obj: obj.is_active, ("is_active",)),
+    "items": Counter(Item, Q(), lambda obj: True, ()),
+    "items_low_stock": Counter(Item, Q(quantity__lte=LOW_STOCK), lambda obj: obj.quantity <= LOW_STOCK, ("quantity",)),
+    "orders": Counter(Order, Q(), lambda obj: True, ()),
+    "orders_pending": Counter(Order, Q(status="PENDING"), lambda obj: obj.status == "PENDING", ("status",)),
+}
+
+COUNTED_MODELS = list(dict.fromkeys(counter.model for counter in COUNTERS.values()))
+
+
+def counters_for(model):
+    return {name: counter for name, counter in COUNTERS.items() if counter.model is model}
+
+
+def tracked_fields(model):
+    return sorted({field for counter in counters_for(model).values() for field in counter.fields})
+
+
+def snapshot(instance):
+    """{field: value} of the fields the counters read, or None if one is deferred."""
+    fields = tracked_fields(type(instance))
+    if not instance.get_deferred_fields().isdisjoint(fields):
+        return None
+    return {field: getattr(instance, field) for field in fields}
+
+
+def membership(model, state):
+    """{counter name: bool} for a snapshot (None: not counted anywhere, e.g. before creation)."""
+    obj = SimpleNamespace(**state) if state is not None else None
+    return {name: obj is not None and bool(counter.test(obj)) for name, counter in counters_for(model).items()}
+
+
+def apply_deltas(deltas):
+    """Add +1 / -1 per counter name: at most two UPDATE statements."""
+    for step in (1, -1):
+        names = [name for name, delta in deltas.items() if delta == step]
+        if names:
+            EntityCounter.objects.filter(name__in=names).update(value=F("value") + step)
+
+
+def reconcile(models=None):
+    """
+    Recount the counters of `models` (default: all) and overwrite the rows.
+    Returns {name: (stored, actual)} for counters that had drifted.
+
+    The counter rows are locked first, so saves that commit meanwhile wait
+    and apply their +1 / -1 on top of the fresh count.
+    """
+    models = COUNTED_MODELS if models is None else [m for m in models if m in COUNTED_MODELS]
+    drift = {}
+    with transaction.atomic():
+        names = [name for name, counter in COUNTERS.items() if counter.model in models]
+        stored = dict(EntityCounter.objects.select_for_update().filter(name__in=names).values_list("name", "value"))
+        for model in models:
+            counters = counters_for(model)
+            actual = model._default_manager.aggregate(**{
+                name: Count("pk", filter=counter.condition) if counter.condition else Count("pk")
+                for name, counter in counters.items()
+            })
+            for name, value in actual.items():
+                if stored.get(name) != value:
+                    drift[name] = (stored.get(name), value)
+                    EntityCounter.objects.update_or_create(name=name, defaults={"value": value})
+    return drift
+
+
+def get_counts():
+    """{counter name: value} in one query (counters are created on first use)."""
+    counts = dict(EntityCounter.objects.values_list("name", "value"))
+    if len(counts) < len(COUNTERS):
+        reconcile()
+        counts = dict(EntityCounter.objects.values_list("name", "value"))
+    return counts
+
+
+async def aget_counts():
+    counts = {name: value async for name, value in EntityCounter.objects.values_list("name", "value")}
+    if len(counts) < len(COUNTERS):
+        return await sync_to_async(get_counts)()
+    return counts
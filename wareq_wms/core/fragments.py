@@ -0,0 +1,76 @@
+"""
+Cached dashboard widgets (template fragments).
+
+Each widget is declared here with the models its content depends on and
+rendered with the {% widget %} tag (core/templatetags/widget_tags.py):
+
+    {% load widget_tags %}
+    {% widget "dashboard_recent_orders" %} ... {% endwidget %}
+
+The rendered HTML is cached under the widget name plus the current
+generation of each dependency. The generations are the ones the API
+response cache uses, bumped on commit by post_save / post_delete (see
+api.signals). A change to any dependency therefore makes the next render
+miss, and older entries age out after FRAGMENT_CACHE_TIMEOUT. That
+timeout also bounds staleness from writes that skip signals
+(queryset.update()).
+
+Views pass lazy querysets, so a hit runs no queries for the widget.
+Hits, misses and render time are counted per widget and reported by
+/api/v1/cache/stats/ as "widget:<name>".
+"""
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+
+from api import cache as response_cache
+
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 300)
+
+# widget name -> models the content depends on
+WIDGETS = {
+    "dashboard_recent_orders": ["orders.Order", "orders.OrderItem", "customers.Customer"],
+    "core_recent_orders": ["orders.Order"],
+    "core_recent_customers": ["customers.Customer"],
+    "inventory_low_stock": ["inventory.Item", "suppliers.Supplier"],
+    "inventory_recent_movements": ["inventory.StockMovement", "inventory.Item"],
+    "suppliers_recent_suppliers": ["suppliers.Supplier", "suppliers.Item"],
+}
+
+
+def dependencies(name):
+    return [apps.get_model(label) for label in WIDGETS[name]]
+
+
+def fragment_key(name, generations):
+    return f"fragment:{name}:" + hashlib.md5(repr(generations).encode()).hexdigest()
+
+
+def stats_resource(name):
+    return f"widget:{name}"
+
+
+def render_widget(name, render, generations):
+    """Cached HTML of a widget; render() produces it on a miss."""
+    cache = response_cache.get_cache()
+    key = fragment_key(name, [generations[model] for model in dependencies(name)])
+    html = cache.get(key)
+    if html is not None:
+        response_cache.record(stats_resource(name), "hit")
+        return html
+
+    started = time.perf_counter()
+    html = render()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    cache.set(key, html, FRAGMENT_CACHE_TIMEOUT)
+    response_cache.record(stats_resource(name), "miss")
+    response_cache.record(stats_resource(name), "render_ms", round(elapsed_ms, 3))
+    return html
+
+
+def page_generations(names):
+    """Generations of every dependency of the given widgets (one cache round trip)."""
+    models = list(dict.fromkeys(model for name in names for model in dependencies(name)))
+    return dict(zip(models, response_cache.get_generations(models)))
@@ -0,0 +1,239 @@
+"""
+Live dashboard updates over Server-Sent Events.
+
+Writes to counted models (core.signals) record events once their
+transaction commits:
+
+    counters      {"customers": 1, "customers_active": 1}   deltas to apply
+    order_created {"id", "order_type", "status"}
+    order_status  {"id", "from", "to"}
+    stock_level   {"id", "sku", "name", "quantity", "low_stock"}  low-stock threshold crossed
+
+Events are stored in LiveEvent, which is the fan-out across workers. Each
+process runs one poller (only while it has open streams) that reads new
+rows by id every LIVE_POLL_INTERVAL seconds and hands them to the open
+streams through in-process queues. The poller is started in a context of
+its own, not the first stream's request, and handles its connection like a
+request does: close_old_connections() around every poll (CONN_MAX_AGE
+decides whether it is kept between polls). Failing polls back off up to
+MAX_BACKOFF seconds. Writes made in the same process wake
+the poller at once. An idle dashboard costs one keep-alive comment every
+LIVE_HEARTBEAT seconds, and a process costs one indexed query per
+interval, however many streams are open.
+
+A reconnecting EventSource sends Last-Event-ID and gets the missed events
+replayed from the table. A new stream (or one that fell too far behind)
+starts with a "snapshot" of all counters.
+
+Streams stay open only under ASGI. In production nginx routes /live/events/
+to the "asgi" process (Procfile, .platform/nginx). Under a WSGI server
+(runserver, or a deploy without that route) each request sends a snapshot
+or the missed events and ends. The client then reconnects every RETRY_MS,
+so the dashboards poll: one request per RETRY_MS per open page instead of
+one per page. Updates still arrive, up to RETRY_MS late.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from inventory.models import Item
+from orders.models import Order
+from .counters import aget_counts
+from .models import LiveEvent
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = getattr(settings, "LIVE_POLL_INTERVAL", 1.0)  # seconds
+HEARTBEAT = getattr(settings, "LIVE_HEARTBEAT", 15)           # seconds
+RETRY_MS = 3000              # EventSource reconnect delay
+MAX_BACKOFF = 30             # seconds between polls after repeated failures
+REPLAY_LIMIT = 500           # further behind than this: start over with a snapshot
+QUEUE_SIZE = 1000            # per stream; a stream that falls further behind is ended and reconnects
+# Concurrent inserts can commit out of id order, so a row can become visible
+# after a higher id was already read: every poll looks this many ids back.
+ID_OVERLAP = 50
+
+
+# ---------------------------------------------------------------------------
+# Recording (called from core.signals, inside the writing transaction)
+# ---------------------------------------------------------------------------
+
+def record(events):
+    events = [(kind, payload) for kind, payload in events if payload]
+    if events:
+        transaction.on_commit(partial(publish, events))
+
+
+def publish(events):
+    """Store [(kind, payload)] and wake this process's poller."""
+    LiveEvent.objects.bulk_create([LiveEvent(kind=kind, payload=payload) for kind, payload in events])
+    broker.notify()
+
+
+def changed_counters(deltas):
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def record_save(instance, created, old, new, deltas):
+    events = [("counters", changed_counters(deltas))]
+    if isinstance(instance, Order):
+        if created:
+            events.append(("order_created", {
+                "id": instance.pk, "order_type": instance.order_type, "status": instance.status,
+            }))
+        elif old["status"] != new["status"]:
+            events.append(("order_status", {"id": instance.pk, "from": old["status"], "to": new["status"]}))
+    elif isinstance(instance, Item) and deltas.get("items_low_stock"):
+        events.append(("stock_level", {
+            "id": instance.pk,
+            "sku": instance.sku,
+            "name": instance.name,
+            "quantity": instance.quantity,
+            "low_stock": deltas["items_low_stock"] > 0,
+        }))
+    record(events)
+
+
+def record_delete(instance, deltas):
+    record([("counters", changed_counters(deltas))])
+
+
+# ---------------------------------------------------------------------------
+# Fan-out (per process)
+# ---------------------------------------------------------------------------
+
+class Broker:
+    """In-process pub/sub: one poller task feeding a queue per open stream."""
+
+    def __init__(self):
+        self.queues = set()
+        self.loop = None
+        self.wake = None
+        self.task = None
+        self.cursor = 0
+        self.seen = set()
+
+    async def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop, self.wake = loop, asyncio.Event()
+            latest = await LiveEvent.objects.order_by("-pk").values_list("pk", flat=True).afirst()
+            self.cursor, self.seen = latest or 0, set()
+            # A fresh context: the poller outlives the request that happened to start it
+            self.task = loop.create_task(self.run(), context=contextvars.Context())
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.queues.discard(queue)
+
+    def notify(self):
+        """Wake the poller now (safe from any thread)."""
+        loop, wake = self.loop, self.wake
+        if loop is not None and not loop.is_closed() and self.queues:
+            loop.call_soon_threadsafe(wake.set)
+
+    @staticmethod
+    def fetch(after):
+        close_old_connections()
+        try:
+            return list(LiveEvent.objects.filter(pk__gt=after).order_by("pk"))
+        finally:
+            close_old_connections()
+
+    async def run(self):
+        failures = 0
+        while self.queues:
+            delay = min(POLL_INTERVAL * 2 ** failures, MAX_BACKOFF)
+            try:
+                await asyncio.wait_for(self.wake.wait(), delay)
+            except TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                events = await sync_to_async(self.fetch)(max(self.cursor - ID_OVERLAP, 0))
+            except Exception:
+                failures += 1
+                logger.exception("Polling live events failed (%d in a row).", failures)
+                continue
+            failures = 0
+            for event in events:
+                if event.pk in self.seen:
+                    continue
+                self.seen.add(event.pk)
+                self.cursor = max(self.cursor, event.pk)
+                for queue in list(self.queues):
+                    try:
+                        queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Too slow: the stream ends once drained and the client resumes from Last-Event-ID
+                        self.queues.discard(queue)
+                        queue.overflowed = True
+            self.seen = {pk for pk in self.seen if pk > self.cursor - ID_OVERLAP}
+
+
+broker = Broker()
+
+
+# ---------------------------------------------------------------------------
+# Stream
+# ---------------------------------------------------------------------------
+
+def format_event(event_id, kind, payload):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def snapshot_event():
+    latest = await LiveEvent.objects.order_by("-pk").values_list("pk", flat=True).afirst() or 0
+    return latest, format_event(latest, "snapshot", await aget_counts())
+
+
+async def replay(last_id):
+    """Missed events after last_id, or None if too many (the client needs a snapshot)."""
+    events = [
+        event async for event in
+        LiveEvent.objects.filter(pk__gt=last_id).order_by("pk")[:REPLAY_LIMIT + 1]
+    ]
+    # last_id itself purged: older events may be gone too
+    if len(events) > REPLAY_LIMIT or (last_id and not await LiveEvent.objects.filter(pk=last_id).aexists()):
+        return None
+    return events
+
+
+async def event_stream(last_id=None, follow=True):
+    """
+    The SSE body: snapshot or replay, then live events and keep-alives.
+    With follow=False (no ASGI server) it ends after the first part and the
+    client reconnects after RETRY_MS, i.e. degrades to polling.
+    """
+    queue = await broker.subscribe() if follow else None
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        missed = await replay(last_id) if last_id is not None else None
+        if missed is None:
+            sent, chunk = await snapshot_event()
+            yield chunk
+        else:
+            sent = last_id
+            for event in missed:
+                sent = event.pk
+                yield format_event(event.pk, event.kind, event.payload)
+
+        while follow and not (getattr(queue, "overflowed", False) and queue.empty()):
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT)
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event.pk > sent:
+                yield format_event(event.pk, event.kind, event.payload)
+    finally:
+        if queue is not None:
+            broker.unsubscribe(queue)
@@ -0,0 +1,151 @@
+import socket
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+
+DEFAULT_PATHS = [
+    "/dashboard/",
+    "/customers/api/search/?q=a",
+    "/customers/api/stats/",
+    "/suppliers/api/search/?q=a",
+    "/suppliers/api/stats/",
+    "/inventory/search-items/?q=a",
+    "/orders/search-items/?q=a",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server (e.g. WSGI vs ASGI profile): N concurrent clients "
+        "cycle through the read endpoints and report throughput and tail latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--path", action="append", dest="paths", help="Path to request (repeatable)")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--duration", type=float, default=20, help="Seconds")
+        parser.add_argument("--login", help="Username: requests carry a session for this user (same database)")
+        parser.add_argument(
+            "--streams", type=int, default=0,
+            help="Idle live dashboards (SSE on --stream-path) held open meanwhile; needs --login",
+        )
+        parser.add_argument("--stream-path", default="/live/events/")
+
+    def session_cookie(self, username):
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            raise CommandError(f"No user '{username}'.")
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        headers = {"Cookie": self.session_cookie(options["login"])} if options["login"] else {}
+        deadline = time.monotonic() + options["duration"]
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+
+        def client(offset):
+            i = offset
+            while time.monotonic() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                request = urllib.request.Request(options["base_url"] + path, headers=headers)
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(request, timeout=60) as response:
+                        response.read()
+                        ok = response.status == 200
+                except (urllib.error.URLError, OSError):
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[path].append(elapsed)
+                    if not ok:
+                        errors[path] += 1
+
+        connections = [0]
+
+        def stream():
+            """One open dashboard: reads the stream, reconnects (after `retry:`) whenever it ends."""
+            last_id, retry = None, 3.0
+            while time.monotonic() < deadline:
+                stream_headers = dict(headers, Accept="text/event-stream")
+                if last_id:
+                    stream_headers["Last-Event-ID"] = last_id
+                request = urllib.request.Request(options["base_url"] + options["stream_path"], headers=stream_headers)
+                with lock:
+                    connections[0] += 1
+                try:
+                    timeout = max(deadline - time.monotonic(), 0.1)
+                    with urllib.request.urlopen(request, timeout=timeout) as response:
+                        for line in response:
+                            if line.startswith(b"id: "):
+                                last_id = line[4:].strip().decode()
+                            elif line.startswith(b"retry: "):
+                                retry = int(line[7:]) / 1000
+                except (urllib.error.URLError, OSError, socket.timeout):
+                    pass
+                time.sleep(min(retry, max(deadline - time.monotonic(), 0)))
+
+        if options["streams"] and not options["login"]:
+            raise CommandError("--streams needs --login (the stream requires a session).")
+        streams = [threading.Thread(target=stream, daemon=True) for _ in range(options["streams"])]
+        for thread in streams:
+            thread.start()
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(options["concurrency"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        for thread in streams:
+            thread.join(timeout=1)
+
+        everything = [value for values in latencies.values() for value in values]
+        if not everything:
+            raise CommandError("No requests completed.")
+
+        self.stdout.write(f"{'path':<32}{'reqs':>7}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for path in paths:
+            values = latencies[path]
+            if values:
+                self.stdout.write(
+                    f"{path[:31]:<32}{len(values):>7}{errors[path]:>8}"
+                    f"{statistics.median(values) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+                    f"{percentile(values, 99) * 1000:>9.1f}"
+                )
+        self.stdout.write(
+            f"\nconcurrency {options['concurrency']}: {len(everything) / wall:.1f} req/s, "
+            f"{sum(errors.values())} errors, p50 {statistics.median(everything) * 1000:.1f} ms, "
+            f"p95 {percentile(everything, 95) * 1000:.1f} ms, p99 {percentile(everything, 99) * 1000:.1f} ms"
+        )
+        if options["streams"]:
+            # An open stream connects once; one that can't stay open reconnects (polls) every retry
+            self.stdout.write(
+                f"streams {options['streams']}: {connections[0]} connections "
+                f"({connections[0] / options['streams']:.1f} per dashboard in {wall:.0f} s)"
+            )
@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import LiveEvent
+
+
+class Command(BaseCommand):
+    help = "Delete live dashboard events older than the retention window (clients further behind get a snapshot)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=getattr(settings, "LIVE_EVENT_HOURS", 24))
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        deleted, _ = LiveEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} live events older than {options['hours']} hours."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the dashboard entity counters and fix any drift "
+        "(run periodically, e.g. from cron, and after bulk imports)."
+    )
+
+    def handle(self, *args, **options):
+        drift = reconcile()
+        for name, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"{name}: {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"Counters reconciled, {len(drift)} corrected."))
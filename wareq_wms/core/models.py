@@ -1,3 +1,27 @@
 from django.db import models
 
-# Create your models here.
+
+class EntityCounter(models.Model):
+    """
+    Running total for the dashboards (see core.counters).
+    Kept up to date by model signals and checked by `manage.py reconcile_counters`.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class LiveEvent(models.Model):
+    """
+    Change feed for the live dashboards (see core.live): every worker polls
+    it by id and pushes new rows to its open event streams.
+    """
+    kind = models.CharField(max_length=30)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind}"
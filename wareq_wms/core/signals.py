@@ -0,0 +1,67 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from orders.models import Order
+from orders.signals import status_changed
+from . import live
+from .counters import COUNTED_MODELS, apply_deltas, membership, reconcile, snapshot, tracked_fields
+
+
+def load_state(sender, instance, raw=False, **kwargs):
+    # The counted fields as stored, read on the write path (pre_save /
+    # pre_delete): loading instances remembers nothing, and a stale copy
+    # can't count a change twice
+    if instance._state.adding:
+        instance._counter_state = None
+        return
+    fields = tracked_fields(sender)
+    instance._counter_state = (
+        sender._default_manager.filter(pk=instance.pk).values(*fields).first() if fields else {}
+    )
+
+
+def count_save(sender, instance, created, **kwargs):
+    new = snapshot(instance)
+    old = None if created else getattr(instance, "_counter_state", None)
+    if new is None or (old is None and not created):
+        transaction.on_commit(lambda: reconcile([sender]))
+        return
+    before, after = membership(sender, old), membership(sender, new)
+    deltas = {name: int(after[name]) - int(before[name]) for name in after}
+    apply_deltas(deltas)
+    live.record_save(instance, created, old, new, deltas)
+
+
+def count_delete(sender, instance, **kwargs):
+    old = getattr(instance, "_counter_state", None)
+    if old is None:
+        transaction.on_commit(lambda: reconcile([sender]))
+        return
+    deltas = {name: -int(member) for name, member in membership(sender, old).items()}
+    apply_deltas(deltas)
+    live.record_delete(instance, deltas)
+
+
+def count_order(sender, order, old, new, **kwargs):
+    # The order counters read the status only, so they follow its transitions
+    before = None if old is None else {"status": old}
+    after = None if new is None else {"status": new}
+    before, after = membership(Order, before), membership(Order, after)
+    deltas = {name: int(after[name]) - int(before[name]) for name in after}
+    apply_deltas(deltas)
+    if new is None:
+        live.record_delete(order, deltas)
+    else:
+        live.record_save(order, old is None, {"status": old}, {"status": new}, deltas)
+
+
+status_changed.connect(count_order, sender=Order, dispatch_uid="counters-order-status")
+
+for model in COUNTED_MODELS:
+    if model is Order:
+        continue
+    label = model._meta.label_lower
+    pre_save.connect(load_state, sender=model, dispatch_uid=f"counters-pre-save-{label}")
+    post_save.connect(count_save, sender=model, dispatch_uid=f"counters-save-{label}")
+    pre_delete.connect(load_state, sender=model, dispatch_uid=f"counters-pre-delete-{label}")
+    post_delete.connect(count_delete, sender=model, dispatch_uid=f"counters-delete-{label}")
@@ -0,0 +1,46 @@
+"""
+Helpers for the small dashboard chart endpoints (customers/suppliers api_stats).
+
+Counts are grouped by calendar month in the database (TruncMonth), so the
+cost doesn't grow with the number of rows read into Python, and month
+labels are computed from real month boundaries. Only the charted months
+are read; all-time totals come from the counters (core.counters).
+"""
+from django.conf import settings
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+STATS_CACHE_TIMEOUT = getattr(settings, "DASHBOARD_STATS_TIMEOUT", 60)
+
+
+def month_starts(now=None, months=6):
+    """The first instant of the last `months` calendar months, oldest first (current month included)."""
+    now = timezone.localtime(now or timezone.now())
+    index = now.year * 12 + now.month - 1
+    return [
+        now.replace(year=i // 12, month=i % 12 + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        for i in range(index - months + 1, index + 1)
+    ]
+
+
+async def amonthly_rows(queryset, months, field="created_at", **aggregates):
+    """
+    One grouped query over the given month starts (from month_starts()):
+    {month start: {aggregate name: value}}, e.g.
+    amonthly_rows(qs, months, count=Count("pk")).
+    """
+    rows = (
+        queryset.filter(**{f"{field}__gte": months[0]})
+        .order_by()
+        .annotate(month=TruncMonth(field))
+        .values("month")
+        .annotate(**aggregates)
+    )
+    return {row.pop("month"): row async for row in rows}
+
+
+def series(rows, months, name):
+    """Chart labels and values of aggregate `name` for the given month starts."""
+    labels = [month.strftime("%b %Y") for month in months]
+    values = [rows.get(month, {}).get(name, 0) for month in months]
+    return labels, values
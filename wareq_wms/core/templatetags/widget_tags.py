@@ -0,0 +1,39 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.fragments import WIDGETS, dependencies, page_generations, render_widget
+
+register = template.Library()
+
+
+class WidgetNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        # Dependency generations are read once per page, for all widgets on it
+        generations = context.render_context.get("widget_generations")
+        if generations is None:
+            names = [node.name for node in context.template.nodelist.get_nodes_by_type(WidgetNode)]
+            generations = context.render_context["widget_generations"] = page_generations(names)
+        if not all(model in generations for model in dependencies(self.name)):
+            # Not found up front (e.g. inside an {% include %})
+            generations.update(page_generations([self.name]))
+        return mark_safe(render_widget(self.name, lambda: self.nodelist.render(context), generations))
+
+
+@register.tag
+def widget(parser, token):
+    """
+    {% widget "name" %} ... {% endwidget %}: cached fragment, see core.fragments.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError("{% widget %} takes the widget name.")
+    name = bits[1].strip("\"'")
+    if name not in WIDGETS:
+        raise template.TemplateSyntaxError(f"Unknown widget '{name}' (declare it in core.fragments.WIDGETS).")
+    nodelist = parser.parse(("endwidget",))
+    parser.delete_first_token()
+    return WidgetNode(name, nodelist)
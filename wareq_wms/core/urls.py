@@ -7,5 +7,6 @@ urlpatterns = [
     path("", views.index, name="home"),
     path("about/", views.about, name="about"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("live/events/", views.live_events, name="live_events"),
     path("contact/", views.contact, name="contact"),
 ]
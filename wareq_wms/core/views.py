@@ -1,34 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.db.models import Count
+from .counters import aget_counts
 from .form import ContactForm
+from .live import event_stream
 from orders.models import Order
 from customers.models import Customer
 from suppliers.models import Supplier
 from inventory.models import Item
 
-def index(request):
+async def index(request):
+    counts = await aget_counts()
     stats = {
-        "items_count": Item.objects.count(),
-        "orders_count": Order.objects.count(),
-        "customers_count": Customer.objects.count(),
-        "suppliers_count": Supplier.objects.count(),
+        "items_count": counts["items"],
+        "orders_count": counts["orders"],
+        "customers_count": counts["customers"],
+        "suppliers_count": counts["suppliers"],
     }
-    return render(request, "core/index.html", {"stats": stats})
+    # Rendered in a thread: the template reads the lazy request.user / session / messages
+    return await sync_to_async(render)(request, "core/index.html", {"stats": stats})
 
 def about(request):
     return render(request, "core/about.html")
 
-def dashboard(request):
+async def dashboard(request):
+    counts = await aget_counts()
     context = {
-        "orders_count": Order.objects.count(),
-        "customers_count": Customer.objects.count(),
-        "suppliers_count": Supplier.objects.count(),
-        "items_count": Item.objects.count(),
+        "orders_count": counts["orders"],
+        "customers_count": counts["customers"],
+        "suppliers_count": counts["suppliers"],
+        "items_count": counts["items"],
+        # Lazy: only evaluated when the cached widget misses (core.fragments)
         "recent_orders": Order.objects.order_by("-id")[:5],
         "recent_customers": Customer.objects.order_by("-id")[:5],
     }
-    return render(request, "core/dashboard.html", context)
+    return await sync_to_async(render)(request, "core/dashboard.html", context)
+
+@login_required
+async def live_events(request):
+    """
+    Server-Sent Events stream for the live dashboards (see core.live).
+    Deployed, nginx sends this path to the ASGI process. Under a WSGI server
+    the stream can't stay open. It sends a snapshot or the missed events,
+    and the client reconnects every RETRY_MS, i.e. it degrades to polling.
+    """
+    last_id = request.headers.get("Last-Event-ID", "")
+    response = StreamingHttpResponse(
+        event_stream(int(last_id) if last_id.isdigit() else None, follow=isinstance(request, ASGIRequest)),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # no proxy buffering
+    return response
 
 def contact(request):
     if request.method == "POST":
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Customer
+from core.counters import reconcile
+from .models import Customer, DuplicateCandidate, SegmentationRun
+from .search import search_filter
 
 
 @admin.register(Customer)
@@ -7,16 +9,42 @@ class CustomerAdmin(admin.ModelAdmin):
     """
     Custom admin interface for managing customers.
     """
-    list_display = ("id", "name", "email", "phone", "segment", "is_active", "created_at")
+    list_display = ("id", "name", "email", "phone", "segment", "rfm_score", "is_active", "created_at")
     search_fields = ("name", "email", "phone")
     list_filter = ("segment", "is_active", "created_at")
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = (
+        "created_at", "updated_at", "rfm_score", "order_count", "cancelled_count", "lifetime_value", "last_order_at",
+    )
     actions = ["make_inactive", "make_active"]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Normalized search keys (customers.search) instead of icontains on every column
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_filter(search_term)), False
+
     @admin.action(description="Deactivate selected customers")
     def make_inactive(self, request, queryset):
         queryset.update(is_active=False)
+        reconcile([Customer])
 
     @admin.action(description="Reactivate selected customers")
     def make_active(self, request, queryset):
         queryset.update(is_active=True)
+        reconcile([Customer])
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ("id", "first", "second", "score", "status", "created_at", "reviewed_by")
+    list_filter = ("status",)
+    list_select_related = ("first", "second", "reviewed_by")
+    raw_id_fields = ("first", "second")
+    readonly_fields = ("created_at", "reviewed_at", "reviewed_by")
+
+
+@admin.register(SegmentationRun)
+class SegmentationRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "full", "started_at", "finished_at", "customers", "changed")
+    list_filter = ("full",)
+    readonly_fields = ("full", "started_at", "finished_at", "customers", "changed", "boundaries")
@@ -0,0 +1,226 @@
+"""
+Duplicate customer detection and merging.
+
+Comparing every customer with every other is quadratic, so candidates are
+only looked for within blocks: customers sharing a CustomerBlockKey
+(customers.search.block_keys(), written on save with the search tokens):
+
+    phonetic name       Soundex of the first and last name word
+    phone               last 9 digits, whatever the format or country prefix
+    email               local-part stem (no dots, +tag or trailing digits)
+                        and domain
+
+find_candidates() groups the keys of active customers in SQL (one
+indexed GROUP BY), loads the blocks a batch at a time and scores each pair
+in them once:
+
+    name    similarity of the normalized names (word order ignored)
+    phone   same number ending
+    email   same address stem, or similar local parts
+
+weighted by WEIGHTS over the fields both customers have. Pairs scoring at
+least THRESHOLD become PENDING DuplicateCandidates; a pair already in the
+queue (pending, merged or dismissed) is never added again. Blocks larger
+than MAX_BLOCK_SIZE (a common name, a shared office number) are skipped:
+their pairs are still found through the customers' other keys.
+
+merge() folds one customer into another: its orders are re-pointed with one
+UPDATE (and both customers' lifetime figures recomputed), blank fields of
+the kept customer are filled from it, and it is deactivated with a note
+(it keeps its email, which is unique).
+"""
+from collections import defaultdict
+from decimal import Decimal
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from api.cache import bump_generation
+from orders.models import Order
+from . import lifetime
+from .models import Customer, CustomerBlockKey, DuplicateCandidate
+from .search import BLOCK_PHONE_DIGITS, PHONE_SUFFIX_DIGITS, email_stem
+
+THRESHOLD = Decimal("0.75")
+MAX_BLOCK_SIZE = 50
+BLOCKS_PER_BATCH = 500
+WEIGHTS = {"name": Decimal("0.5"), "phone": Decimal("0.3"), "email": Decimal("0.2")}
+COMPARED_FIELDS = ("pk", "name", "email", "search_name", "phone_digits")
+FILLED_FIELDS = ("phone", "address", "notes")  # copied from the duplicate when blank on the kept customer
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def similarity(a, b):
+    return Decimal(SequenceMatcher(None, a, b).ratio()).quantize(Decimal("0.001"))
+
+
+def compare(a, b):
+    """(score 0..1, reasons) for two customers loaded with COMPARED_FIELDS."""
+    scores, reasons = {}, []
+
+    name_a, name_b = " ".join(sorted(a.search_name.split())), " ".join(sorted(b.search_name.split()))
+    if name_a and name_b:
+        scores["name"] = similarity(name_a, name_b)
+        reasons.append(f"name {scores['name']:.0%}")
+
+    if len(a.phone_digits) >= PHONE_SUFFIX_DIGITS and len(b.phone_digits) >= PHONE_SUFFIX_DIGITS:
+        same = a.phone_digits[-BLOCK_PHONE_DIGITS:] == b.phone_digits[-BLOCK_PHONE_DIGITS:]
+        scores["phone"] = Decimal(int(same))
+        reasons.append("same phone" if same else "different phone")
+
+    (stem_a, domain_a), (stem_b, domain_b) = email_stem(a.email), email_stem(b.email)
+    if stem_a and stem_b:
+        if stem_a == stem_b:
+            scores["email"] = Decimal("1") if domain_a == domain_b else Decimal("0.6")
+            reasons.append("same email" if domain_a == domain_b else "same email name")
+        else:
+            scores["email"] = similarity(stem_a, stem_b) / 2
+
+    weight = sum(WEIGHTS[name] for name in scores)
+    if not weight:
+        return Decimal(0), reasons
+    score = sum(WEIGHTS[name] * value for name, value in scores.items()) / weight
+    return score.quantize(Decimal("0.001")), reasons
+
+
+# ---------------------------------------------------------------------------
+# Finding
+# ---------------------------------------------------------------------------
+
+def blocks():
+    """(key, size) of every key shared by 2 or more active customers, in key order."""
+    return (
+        CustomerBlockKey.objects.filter(customer__is_active=True)
+        .values_list("key")
+        .annotate(size=Count("customer"))
+        .filter(size__gte=2)
+        .order_by("key")
+    )
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def find_candidates(threshold=THRESHOLD, max_block_size=MAX_BLOCK_SIZE, batch_size=BLOCKS_PER_BATCH, progress=None):
+    """
+    Add the PENDING DuplicateCandidates of the current customers; returns
+    counts: blocks, oversized (skipped) blocks, pairs compared, candidates added.
+    """
+    stats = {"blocks": 0, "oversized": 0, "compared": 0, "added": 0}
+    seen = set()  # pairs compared in an earlier block
+    for batch in batched(blocks().iterator(), batch_size):
+        keys = []
+        for key, size in batch:
+            stats["blocks"] += 1
+            if size > max_block_size:
+                stats["oversized"] += 1
+            else:
+                keys.append(key)
+
+        members = defaultdict(list)
+        rows = CustomerBlockKey.objects.filter(key__in=keys, customer__is_active=True).values_list("key", "customer_id")
+        for key, customer_id in rows:
+            members[key].append(customer_id)
+        pairs = {
+            pair
+            for ids in members.values()
+            for pair in combinations(sorted(ids), 2)
+            if pair not in seen
+        }
+        if not pairs:
+            continue
+        seen |= pairs
+        stats["compared"] += len(pairs)
+
+        ids = {pk for pair in pairs for pk in pair}
+        customers = Customer.objects.only(*COMPARED_FIELDS).in_bulk(ids)
+        queued = set(
+            DuplicateCandidate.objects.filter(first__in={first for first, _ in pairs}, second__in=ids)
+            .values_list("first_id", "second_id")
+        )
+        new = []
+        for first, second in sorted(pairs - queued):
+            score, reasons = compare(customers[first], customers[second])
+            if score >= threshold:
+                new.append(DuplicateCandidate(first_id=first, second_id=second, score=score, reasons=reasons))
+        # ignore_conflicts: the same pair queued by a concurrent run
+        DuplicateCandidate.objects.bulk_create(new, batch_size=1000, ignore_conflicts=True)
+        stats["added"] += len(new)
+        if progress:
+            progress(stats)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Reviewing
+# ---------------------------------------------------------------------------
+
+def merge(candidate, keep, user=None):
+    """
+    Merge the other customer of a candidate pair into `keep` (one of the
+    two). Returns the number of orders moved.
+    """
+    if keep.pk not in (candidate.first_id, candidate.second_id):
+        raise ValueError("The kept customer must be one of the pair.")
+    duplicate_id = candidate.second_id if keep.pk == candidate.first_id else candidate.first_id
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Locked in id order, so two merges of overlapping pairs can't deadlock
+        pair = Customer.objects.select_for_update().filter(pk__in=[candidate.first_id, candidate.second_id])
+        locked = {customer.pk: customer for customer in pair.order_by("pk")}
+        keep, duplicate = locked[keep.pk], locked[duplicate_id]
+        if not duplicate.is_active:
+            raise ValueError(f"Customer #{duplicate.pk} is already inactive (merged or deactivated).")
+
+        moved = Order.objects.filter(customer=duplicate).update(customer=keep, updated_at=now)
+        if moved:
+            lifetime.rebuild([keep.pk, duplicate.pk])
+
+        filled = [field for field in FILLED_FIELDS if not getattr(keep, field) and getattr(duplicate, field)]
+        for field in filled:
+            setattr(keep, field, getattr(duplicate, field))
+        if duplicate.segment == "BLOCKED" and keep.segment != "BLOCKED":
+            keep.segment = "BLOCKED"  # re-registering must not lift a block
+            filled.append("segment")
+        if filled:
+            keep.save(update_fields=[*filled, "updated_at"])
+
+        duplicate.is_active = False
+        note = f"Merged into customer #{keep.pk} on {timezone.localdate(now):%Y-%m-%d}."
+        duplicate.notes = f"{duplicate.notes}\n{note}" if duplicate.notes else note
+        duplicate.save(update_fields=["is_active", "notes", "updated_at"])
+
+        candidate.status = DuplicateCandidate.MERGED
+        candidate.reviewed_at, candidate.reviewed_by = now, user
+        candidate.save(update_fields=["status", "reviewed_at", "reviewed_by"])
+        # Other pending pairs of the merged customer are moot; the next run compares the kept one instead
+        DuplicateCandidate.objects.filter(
+            Q(first=duplicate) | Q(second=duplicate), status=DuplicateCandidate.PENDING
+        ).delete()
+
+        if moved:
+            # queryset.update() skips post_save
+            transaction.on_commit(lambda: bump_generation(Order))
+    return moved
+
+
+def dismiss(candidate, user=None):
+    """Mark a pair as not duplicates, so it is never queued again."""
+    candidate.status = DuplicateCandidate.DISMISSED
+    candidate.reviewed_at, candidate.reviewed_by = timezone.now(), user
+    candidate.save(update_fields=["status", "reviewed_at", "reviewed_by"])
@@ -0,0 +1,226 @@
+"""
+Lifetime figures and order history for the customer detail page and API.
+
+Each customer stores, from its SALE orders:
+
+    order_count       completed orders
+    cancelled_count   cancelled orders
+    lifetime_value    total of the completed orders' lines
+    last_order_at     date of the latest completed order
+
+customers.signals adds an order to its customer when it is completed or
+cancelled (on orders.signals.status_changed) (one UPDATE with F() expressions, inside the writing transaction)
+and takes it out again when a closed order is deleted, so reading the
+figures costs nothing however many orders a customer has. The update also
+moves Customer.updated_at, so ETags and delta sync see the change.
+Customer.save() never writes these columns: a form holding a stale copy
+can't overwrite them.
+
+An order created already closed (API, admin, scripts) has no lines yet
+when it is saved: it is counted once the creating transaction commits,
+with the lines saved along with it. What each order added is kept
+(LifetimeOrder), so deleting it takes out exactly that, and deleting an
+order that was never counted takes out nothing.
+
+Writes that move orders without signals (customers.dedup.merge) call
+rebuild() for the customers involved; `manage.py rebuild_customer_lifetime`
+recomputes everyone (backfill after the migrations, or repairs), kept
+figures included. A maximum can't be taken out again, so deleting a
+customer's latest completed order leaves last_order_at until the next
+rebuild.
+
+The order history is paged by id, newest first, with keyset cursors
+(?before=<id> / ?after=<id>): the customer_id index holds the primary key,
+so a page is one range scan of it however long the history is.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Max, Min, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from api.cache import bump_generation
+from orders.models import Order, OrderItem
+from orders.signals import line_totals
+from .models import Customer, LifetimeOrder
+
+CLOSED = ("COMPLETED", "CANCELLED")
+REBUILD_BATCH_SIZE = 5000  # customers per UPDATE
+HISTORY_PAGE_SIZE = 20
+
+KEPT = ("order_count", "cancelled_count", "lifetime_value")  # per order, in LifetimeOrder
+
+money = DecimalField(max_digits=14, decimal_places=2)
+LINE_TOTAL = Sum(F("quantity") * F("price"), output_field=money)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def counts(order, status):
+    """Whether a SALE order with this status counts in its customer's figures."""
+    return order.order_type == "SALE" and order.customer_id and status in CLOSED
+
+
+def order_figures(order):
+    """Lifetime amounts of one closed SALE order."""
+    if order.status == "CANCELLED":
+        return {"cancelled_count": 1}
+    return {
+        "order_count": 1,
+        "lifetime_value": line_totals(order)["value"],
+        "last_order_at": order.created_at,
+    }
+
+
+def add(customer_id, figures, sign=1):
+    """Add (sign=1) or take out (sign=-1) an order's figures on its customer."""
+    changes = {
+        name: F(name) + sign * figures[name]
+        for name in ("order_count", "cancelled_count", "lifetime_value")
+        if figures.get(name)
+    }
+    last = figures.get("last_order_at")
+    if last and sign > 0:
+        # GREATEST() is NULL if an argument is: a first order has no previous date
+        changes["last_order_at"] = Greatest(Coalesce("last_order_at", Value(last)), Value(last))
+    if not changes:
+        return
+    Customer.objects.filter(pk=customer_id).update(**changes, updated_at=timezone.now())
+    # queryset.update() skips post_save
+    transaction.on_commit(lambda: bump_generation(Customer))
+
+
+def count(order):
+    """Add a newly closed SALE order to its customer's figures, and keep what was added."""
+    figures = order_figures(order)
+    add(order.customer_id, figures)
+    LifetimeOrder.objects.create(
+        order=order, customer_id=order.customer_id, **{name: figures.get(name, 0) for name in KEPT}
+    )
+
+
+def count_created(order_id):
+    """
+    Count an order created closed, after the creating transaction committed
+    its lines. Nothing to do if the order is gone, doesn't count any more, or
+    was counted meanwhile (by a rebuild).
+    """
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None or not counts(order, order.status):
+        return
+    try:
+        with transaction.atomic():
+            count(order)
+    except IntegrityError:
+        pass  # already kept: counted by a concurrent rebuild
+
+
+def uncount(order):
+    """Take a closed order out again (before it is deleted): exactly what it added, if it was counted."""
+    kept = LifetimeOrder.objects.filter(order=order).first()
+    if kept is not None:
+        add(kept.customer_id, {name: getattr(kept, name) for name in KEPT}, sign=-1)
+
+
+def keep_figures(customers):
+    """Rewrite the kept figures of the closed SALE orders of some customers (a queryset), as rebuild() counts them."""
+    orders = Order.objects.filter(customer__in=customers, order_type="SALE", status__in=CLOSED)
+    LifetimeOrder.objects.filter(Q(customer__in=customers) | Q(order__in=orders)).delete()
+    values = dict(
+        OrderItem.objects.filter(order__in=orders.filter(status="COMPLETED"))
+        .values_list("order").annotate(total=LINE_TOTAL).order_by()
+    )
+    LifetimeOrder.objects.bulk_create(
+        [
+            LifetimeOrder(
+                order_id=pk,
+                customer_id=customer_id,
+                order_count=int(status == "COMPLETED"),
+                cancelled_count=int(status == "CANCELLED"),
+                lifetime_value=values.get(pk) or Decimal(0),
+            )
+            for pk, customer_id, status in orders.values_list("pk", "customer_id", "status").iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,  # closed meanwhile: keeps what its signal added
+    )
+
+
+def rebuild(customer_ids=None, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute the lifetime figures of the given customers (all when None)
+    from their orders: one UPDATE with correlated subqueries per batch of
+    customer ids, so the database does the work, then the kept figures of
+    their orders. Returns the customers updated.
+    """
+    sales = Order.objects.filter(customer=OuterRef("pk"), order_type="SALE").order_by().values("customer")
+    completed = sales.filter(status="COMPLETED")
+    lines = (
+        OrderItem.objects.filter(order__customer=OuterRef("pk"), order__order_type="SALE", order__status="COMPLETED")
+        .order_by()
+        .values("order__customer")
+    )
+    figures = {
+        "order_count": Coalesce(Subquery(completed.annotate(n=Count("pk")).values("n")), 0),
+        "cancelled_count": Coalesce(Subquery(sales.filter(status="CANCELLED").annotate(n=Count("pk")).values("n")), 0),
+        "lifetime_value": Coalesce(
+            Subquery(lines.annotate(total=LINE_TOTAL).values("total")), Value(Decimal(0)), output_field=money
+        ),
+        "last_order_at": Subquery(completed.annotate(last=Max("created_at")).values("last")),
+    }
+
+    customers = Customer.objects.all()
+    if customer_ids is not None:
+        with transaction.atomic():
+            updated = customers.filter(pk__in=customer_ids).update(**figures)
+            keep_figures(customers.filter(pk__in=customer_ids))
+    else:
+        bounds = customers.aggregate(low=Min("pk"), high=Max("pk"))
+        start, high, updated = (bounds["low"] or 1) - 1, bounds["high"] or 0, 0
+        while start < high:
+            with transaction.atomic():
+                batch = customers.filter(pk__gt=start, pk__lte=start + batch_size)
+                updated += batch.update(**figures)
+                keep_figures(batch)
+            start += batch_size
+    if updated:
+        bump_generation(Customer)
+    return updated
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def order_history(customer, after=None, before=None, size=HISTORY_PAGE_SIZE):
+    """
+    (orders, newer cursor, older cursor) for a page of the customer's orders,
+    newest first, each with a `total`. A cursor is the id to pass as
+    ?after= (newer) / ?before= (older), or None at either end.
+    """
+    orders = Order.objects.filter(customer=customer)
+    if after:
+        rows = list(orders.filter(pk__gt=after).order_by("pk")[:size + 1])
+        has_newer = len(rows) > size
+        rows = rows[:size][::-1]
+        has_older = True
+    else:
+        if before:
+            orders = orders.filter(pk__lt=before)
+        rows = list(orders.order_by("-pk")[:size + 1])
+        has_older = len(rows) > size
+        rows = rows[:size]
+        has_newer = bool(before)
+    if not rows:
+        return rows, None, None
+
+    # Totals of the page's orders: one grouped query, not one per order
+    totals = dict(
+        OrderItem.objects.filter(order__in=rows).values_list("order").annotate(total=LINE_TOTAL).order_by()
+    )
+    for order in rows:
+        order.total = totals.get(order.pk, Decimal(0))
+    return rows, rows[0].pk if has_newer else None, rows[-1].pk if has_older else None
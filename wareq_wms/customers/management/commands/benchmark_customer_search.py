@@ -0,0 +1,109 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.counters import reconcile
+from customers.models import Customer, CustomerBlockKey, CustomerSearchToken
+from customers.search import index_customers, search_filter
+
+BENCH_DOMAIN = "bench.invalid"
+FIRST_NAMES = ["john", "maria", "ahmed", "li", "sofia", "josé", "anna", "omar", "chen", "fatima", "lucas", "emma"]
+LAST_NAMES = ["smith", "garcía", "khan", "wang", "müller", "silva", "haddad", "kowalski", "o'neil", "nguyen", "rossi"]
+PHONE_FORMATS = ["+1 ({a}) {b}-{c}", "{a}{b}{c}", "{a}-{b}-{c}", "({a}) {b} {c}"]
+
+
+def icontains(query):
+    """The lookup the search keys replace."""
+    return Q(name__icontains=query) | Q(email__icontains=query) | Q(phone__icontains=query)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark customer search (icontains vs normalized search keys) on synthetic "
+        f"customers (@{BENCH_DOMAIN}, created as needed). Meant for a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic customers to have in the table")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--explain", action="store_true", help="Print the plan of each search-key query")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic customers and exit")
+
+    def handle(self, *args, **options):
+        synthetic = Customer.objects.filter(email__endswith="@" + BENCH_DOMAIN)
+        if options["cleanup"]:
+            # No signals needed: nothing references these rows (counters are reconciled below)
+            CustomerSearchToken.objects.filter(customer__in=synthetic)._raw_delete(connection.alias)
+            CustomerBlockKey.objects.filter(customer__in=synthetic)._raw_delete(connection.alias)
+            deleted = synthetic._raw_delete(connection.alias)
+            reconcile([Customer])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} synthetic customers."))
+            return
+
+        self.seed(synthetic, options["rows"], options["batch_size"])
+        sample = synthetic.order_by("?").values("name", "email", "phone").first()
+        first, last = sample["name"].split()[0], sample["name"].split()[-1]
+        queries = {
+            "first name prefix": first[:3],
+            "surname": last,
+            "full name": sample["name"],
+            "email prefix": sample["email"][:6],
+            "phone as stored": sample["phone"],
+            "phone, other format": "".join(ch for ch in sample["phone"] if ch.isdigit())[-10:],
+        }
+
+        self.stdout.write(f"{'query':<22}{'term':<24}{'matches':>9}{'icontains ms':>14}{'keys ms':>10}")
+        for label, query in queries.items():
+            base = Customer.objects.filter(is_active=True)
+            old_ms, old_count = self.measure(base.filter(icontains(query)), options["repeat"])
+            new_ms, new_count = self.measure(base.filter(search_filter(query)), options["repeat"])
+            self.stdout.write(
+                f"{label:<22}{query[:23]:<24}{new_count:>9}{old_ms:>14.1f}{new_ms:>10.1f}"
+                + ("" if new_count >= old_count else f"   (icontains: {old_count})")
+            )
+            if options["explain"]:
+                self.stdout.write(base.filter(search_filter(query)).order_by("-created_at")[:10].explain())
+
+    def measure(self, queryset, repeat):
+        """Median ms of a typeahead page (top 10) plus the match count."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.order_by("-created_at")[:10])
+            count = queryset.count()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
+
+    def seed(self, synthetic, rows, batch_size):
+        have = synthetic.count()
+        if have >= rows:
+            return
+        self.stdout.write(f"Creating {rows - have} synthetic customers...")
+        started = time.perf_counter()
+        rng = random.Random(have)
+        for start in range(have, rows, batch_size):
+            customers = []
+            for n in range(start, min(start + batch_size, rows)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                a, b, c = rng.randint(200, 999), rng.randint(100, 999), rng.randint(1000, 9999)
+                customer = Customer(
+                    name=f"{first.title()} {last.title()}",
+                    email=f"{first}.{last}{n}@{BENCH_DOMAIN}",
+                    phone=rng.choice(PHONE_FORMATS).format(a=a, b=b, c=c),
+                )
+                customer.refresh_search_keys()
+                customers.append(customer)
+            with transaction.atomic():
+                Customer.objects.bulk_create(customers)
+                # Tokens need the ids (not returned by bulk_create on MySQL)
+                index_customers(synthetic.filter(email__in=[customer.email for customer in customers]).only(
+                    "pk", "email", "search_name", "email_local", "phone_digits"
+                ))
+            done = min(start + batch_size, rows) - have
+            self.stdout.write(f"  {done} created, {done / (time.perf_counter() - started):.0f}/s")
+        reconcile([Customer])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from customers.lifetime import REBUILD_BATCH_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every customer's lifetime figures (order count, lifetime value, last order) "
+        "from their sale orders (initial backfill, or after writes that skip signals)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE, help="Customers per batch")
+
+    def handle(self, *args, **options):
+        updated = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt lifetime figures of {updated} customers."))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
+
+from customers.models import Customer, CustomerBlockKey
+from customers.search import SEARCH_KEY_FIELDS, reindex
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill / repair the customers' normalized search keys, tokens and blocking keys "
+        "(after the migration that adds them, or after writes that skip save())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--only-missing", action="store_true",
+            help="Only customers whose keys or blocking keys were never computed (cheap enough to run on every deploy)",
+        )
+
+    def handle(self, *args, **options):
+        customers = Customer.objects.only("pk", "name", "email", "phone", *SEARCH_KEY_FIELDS).order_by("pk")
+        if options["only_missing"]:
+            customers = customers.filter(
+                (Q(search_name="") & ~Q(name=""))
+                | ~Exists(CustomerBlockKey.objects.filter(customer=OuterRef("pk")))
+            )
+        started = time.perf_counter()
+        last, done, changed = 0, 0, 0
+        while True:
+            batch = list(customers.filter(pk__gt=last)[:options["batch_size"]])
+            if not batch:
+                break
+            changed += reindex(batch)
+            done += len(batch)
+            last = batch[-1].pk
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{done} customers, {done / (time.perf_counter() - started):.0f}/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Reindexed {done} customers ({changed} with new keys) in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from customers.rfm import segment
+
+
+class Command(BaseCommand):
+    help = (
+        "Score customers by recency, frequency and monetary value of their sales and "
+        "derive VIP / REGULAR segments (run periodically, e.g. hourly from cron)."
+    )
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument("--full", action="store_true", help="Rescore every customer and recompute the quintiles")
+        mode.add_argument(
+            "--incremental", action="store_true",
+            help="Only customers with sales changed since the last run (default unless a full run is due)",
+        )
+
+    def handle(self, *args, **options):
+        full = True if options["full"] else False if options["incremental"] else None
+        run = segment(full=full)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if run.full else 'Incremental'} run: {run.customers} customers scored, "
+            f"{run.changed} changed in {run.seconds:.1f}s."
+        ))
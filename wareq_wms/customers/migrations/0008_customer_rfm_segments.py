@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_customer_dedup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full', models.BooleanField(default=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('customers', models.PositiveIntegerField(default=0, help_text='Customers scored.')),
+                ('changed', models.PositiveIntegerField(default=0, help_text='Customers whose segment or score changed.')),
+                ('boundaries', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='rfm_score',
+            field=models.CharField(blank=True, default='', editable=False, max_length=3),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0009_customer_lifetime'),
+        ('orders', '0002_order_order_updated_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LifetimeOrder',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='lifetime_figures', serialize=False, to='orders.order')),
+                ('order_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('lifetime_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='customers.customer')),
+            ],
+        ),
+    ]
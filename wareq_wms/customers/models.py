@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.db import models
 
+LIFETIME_FIELDS = ("order_count", "cancelled_count", "lifetime_value", "last_order_at")  # see customers.lifetime
+
 phone = models.CharField(
     max_length=30,   # or 50 if you want to be extra safe
     blank=True,
@@ -32,6 +35,49 @@ class Customer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, help_text="When this customer was first added.")
     updated_at = models.DateTimeField(auto_now=True, help_text="Last time this customer record was updated.")
 
+    # 🔎 Normalized search keys (customers.search), derived from name / email / phone on save
+    search_name = models.CharField(max_length=150, blank=True, default="", db_index=True, editable=False)
+    email_local = models.CharField(max_length=64, blank=True, default="", db_index=True, editable=False)
+    phone_digits = models.CharField(max_length=20, blank=True, default="", db_index=True, editable=False)
+
+    # 📊 RFM scores (customers.rfm): recency, frequency, monetary quintiles as "545"; "" without sales
+    rfm_score = models.CharField(max_length=3, blank=True, default="", editable=False)
+
+    # 🧾 Lifetime figures of completed / cancelled SALE orders (customers.lifetime), kept up to date by signals
+    order_count = models.IntegerField(default=0, editable=False)
+    cancelled_count = models.IntegerField(default=0, editable=False)
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    last_order_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def refresh_search_keys(self):
+        """Recompute the search keys; True if they changed."""
+        from . import search  # imports this module
+
+        keys = search.search_keys(self)
+        changed = any(getattr(self, field) != value for field, value in keys.items())
+        for field, value in keys.items():
+            setattr(self, field, value)
+        return changed
+
+    def save(self, *args, **kwargs):
+        from . import search
+
+        changed = self.refresh_search_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and search.SOURCE_FIELDS & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *search.SEARCH_KEY_FIELDS}
+        elif update_fields is None and not self._state.adding and not kwargs.get("force_insert"):
+            # The lifetime figures are only written by customers.lifetime: an instance
+            # loaded before an order closed must not put its stale copy back
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in LIFETIME_FIELDS
+            ]
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if changed or adding:
+            search.index_customers([self])
+
     def deactivate(self):
         self.is_active = False
         self.save(update_fields=["is_active", "updated_at"])
@@ -47,3 +93,122 @@ class Customer(models.Model):
         ordering = ["-created_at"]
         verbose_name = "Customer"
         verbose_name_plural = "Customers"
+        indexes = [
+            # Delta-sync watermark (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="customer_updated_idx"),
+        ]
+
+
+class CustomerSearchToken(models.Model):
+    """
+    One search key of a customer (name word, email local part, phone digits),
+    so a prefix match on any of them is a range scan of one index.
+    See customers.search.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="search_tokens")
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["token", "customer"], name="customer_token_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.token} → {self.customer_id}"
+
+
+class CustomerBlockKey(models.Model):
+    """
+    One blocking key of a customer (phonetic name, phone ending, email stem):
+    customers sharing a key are compared for duplicates, no one else is.
+    See customers.dedup.
+    """
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="block_keys")
+    key = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key", "customer"], name="customer_block_key_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} → {self.customer_id}"
+
+
+class DuplicateCandidate(models.Model):
+    """
+    Two customers that look like the same person, waiting for review.
+    `first` is always the lower id, so a pair has one row whatever its status.
+    """
+    PENDING = "PENDING"
+    MERGED = "MERGED"
+    DISMISSED = "DISMISSED"
+    STATUS_CHOICES = (
+        (PENDING, "Pending review"),
+        (MERGED, "Merged"),
+        (DISMISSED, "Not duplicates"),
+    )
+
+    first = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="+")
+    second = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="+")
+    score = models.DecimalField(max_digits=4, decimal_places=3)
+    reasons = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        ordering = ["-score", "pk"]
+        constraints = [
+            models.UniqueConstraint(fields=["first", "second"], name="customer_duplicate_pair_unique"),
+        ]
+        indexes = [
+            # The review queue: pending pairs, best score first
+            models.Index(fields=["status", "-score"], name="customer_duplicate_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.first_id} ~ #{self.second_id} ({self.score})"
+
+
+class SegmentationRun(models.Model):
+    """
+    One run of the RFM segmentation job (customers.rfm). A full run keeps
+    the quintile boundaries later incremental runs score against.
+    """
+    full = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    customers = models.PositiveIntegerField(default=0, help_text="Customers scored.")
+    changed = models.PositiveIntegerField(default=0, help_text="Customers whose segment or score changed.")
+    boundaries = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    @property
+    def seconds(self):
+        return (self.finished_at - self.started_at).total_seconds() if self.finished_at else None
+
+    def __str__(self):
+        return f"{'Full' if self.full else 'Incremental'} segmentation {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class LifetimeOrder(models.Model):
+    """
+    What one closed SALE order added to its customer's lifetime figures, so
+    that deleting the order takes out exactly that (see customers.lifetime).
+    """
+    order = models.OneToOneField(
+        "orders.Order", on_delete=models.CASCADE, primary_key=True, related_name="lifetime_figures"
+    )
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="+")
+    order_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Order #{self.order_id} → customer #{self.customer_id}"
@@ -0,0 +1,160 @@
+"""
+RFM segmentation of customers from their completed SALE orders.
+
+    recency     days since the last order
+    frequency   number of orders
+    monetary    total of their lines
+
+Each figure is scored 1-5 by quintile over the customers who have bought
+(5 = most recent / most frequent / highest spend) and stored as
+Customer.rfm_score ("545"). The segment follows from the scores:
+
+    VIP        R + F + M >= VIP_SCORE
+    REGULAR    everyone else, including customers without sales
+    BLOCKED    set by hand, never changed here (the score still is)
+
+segment() reads the figures of every customer in one grouped query over
+Order / OrderItem and cuts the quintiles from one sort per figure. Only the
+customers whose segment or score changed are written back, grouped by
+their new values: one UPDATE ... WHERE id IN (...) per WRITE_BATCH_SIZE
+customers sharing a value (there are at most 125 scores per segment),
+which is much cheaper than bulk_update()'s CASE per row when a first run
+rescores everyone.
+
+A full run also keeps its quintile boundaries (SegmentationRun). Between
+full runs an incremental one rescores only the customers with SALE orders
+changed since the previous run, against those boundaries; `manage.py
+segment_customers` runs fully every CUSTOMER_RFM_FULL_EVERY_DAYS, so
+recency keeps decaying for customers who stopped buying.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, Exists, F, Max, OuterRef, Q, Sum, Value, When,
+)
+from django.utils import timezone
+
+from api.cache import bump_generation
+from orders.models import Order
+from .models import Customer, SegmentationRun
+
+QUINTILES = 5
+VIP_SCORE = 13  # of 15
+FULL_EVERY = timedelta(days=getattr(settings, "CUSTOMER_RFM_FULL_EVERY_DAYS", 7))
+WRITE_BATCH_SIZE = 1000
+
+FIGURES = ("recency", "frequency", "monetary")
+SALES = Order.objects.filter(order_type="SALE", status="COMPLETED", customer__isnull=False)
+
+
+def figures(orders, now):
+    """
+    (customer id, segment, rfm_score, recency days, frequency, monetary) per
+    customer of the given orders: one grouped query.
+    """
+    rows = (
+        orders.values_list("customer", "customer__segment", "customer__rfm_score")
+        .annotate(
+            last=Max("created_at"),
+            orders=Count("pk", distinct=True),
+            spend=Sum(F("items__quantity") * F("items__price"), output_field=DecimalField(max_digits=18, decimal_places=2)),
+        )
+        .order_by()
+    )
+    for customer, segment, rfm_score, last, orders_count, spend in rows.iterator(chunk_size=10000):
+        yield customer, segment, rfm_score, (now - last).days, orders_count, spend or Decimal(0)
+
+
+def cut_points(values):
+    """The QUINTILES - 1 boundaries of a list of numbers."""
+    values = sorted(values)
+    if not values:
+        return []
+    return [values[len(values) * k // QUINTILES] for k in range(1, QUINTILES)]
+
+
+def score(value, cuts, higher_is_better=True):
+    below = bisect_left(cuts, value)
+    return 1 + below if higher_is_better else QUINTILES - below
+
+
+def segment_for(current, r, f, m):
+    if current == "BLOCKED":
+        return current
+    return "VIP" if r + f + m >= VIP_SCORE else "REGULAR"
+
+
+def last_full_run():
+    return SegmentationRun.objects.filter(full=True, finished_at__isnull=False).first()
+
+
+def segment(full=None, now=None):
+    """
+    Rescore customers; full=None picks a full run when the last one is older
+    than FULL_EVERY (or missing). Returns the SegmentationRun.
+    """
+    now = now or timezone.now()
+    previous = SegmentationRun.objects.filter(finished_at__isnull=False).first()
+    base = last_full_run()
+    if base is None:
+        full = True  # no boundaries to score against yet
+    elif full is None:
+        full = base.started_at < now - FULL_EVERY
+    run = SegmentationRun.objects.create(full=full)
+
+    orders = SALES
+    if not full:
+        changed = Order.objects.filter(order_type="SALE", updated_at__gte=previous.started_at).values("customer")
+        orders = orders.filter(customer__in=changed)
+    rows = list(figures(orders, now))
+
+    if full:
+        boundaries = {name: cut_points([row[3 + i] for row in rows]) for i, name in enumerate(FIGURES)}
+        run.boundaries = {name: [float(value) for value in cuts] for name, cuts in boundaries.items()}
+    else:
+        boundaries = base.boundaries
+        run.boundaries = base.boundaries
+
+    updates = defaultdict(list)  # (segment, rfm_score) → customer ids
+    for customer_id, current_segment, current_score, recency, frequency, monetary in rows:
+        r = score(recency, boundaries["recency"], higher_is_better=False)
+        f = score(frequency, boundaries["frequency"])
+        m = score(monetary, boundaries["monetary"])
+        rfm_score = f"{r}{f}{m}"
+        new_segment = segment_for(current_segment, r, f, m)
+        if (new_segment, rfm_score) != (current_segment, current_score):
+            updates[(new_segment, rfm_score)].append(customer_id)
+
+    with transaction.atomic():
+        # updated_at moves so delta sync picks the change up
+        for (new_segment, rfm_score), ids in updates.items():
+            # A customer blocked since the figures were read stays blocked
+            segment_value = Case(When(segment="BLOCKED", then=Value("BLOCKED")), default=Value(new_segment))
+            for start in range(0, len(ids), WRITE_BATCH_SIZE):
+                Customer.objects.filter(pk__in=ids[start:start + WRITE_BATCH_SIZE]).update(
+                    segment=segment_value, rfm_score=rfm_score, updated_at=now
+                )
+        reset = 0
+        if full:
+            # Scored before, no completed sale any more (orders moved by a merge, customer data cleanup)
+            reset = (
+                Customer.objects.filter(Q(segment="VIP") | ~Q(rfm_score=""))
+                .exclude(Exists(SALES.filter(customer=OuterRef("pk"))))
+                .update(
+                    rfm_score="",
+                    segment=Case(When(segment="VIP", then=Value("REGULAR")), default=F("segment")),
+                    updated_at=now,
+                )
+            )
+        run.customers = len(rows)
+        run.changed = sum(len(ids) for ids in updates.values()) + reset
+        run.finished_at = timezone.now()
+        run.save()
+    if run.changed:
+        bump_generation(Customer)  # bulk writes skip post_save
+    return run
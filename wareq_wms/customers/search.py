@@ -0,0 +1,227 @@
+"""
+Normalized search keys for customer lookup.
+
+Customer.save() derives three indexed columns from the raw fields:
+
+    search_name   name words, lowercased and without accents: "josé  O'Neil" → "jose o neil"
+    email_local   lowercased part before the "@"
+    phone_digits  digits only: "+1 (555) 123-4567" → "15551234567"
+
+and writes the customer's CustomerSearchToken rows: every name word, the
+email local part and its words, the phone digits, the national number (the
+digits after an international "+1" / "0044" prefix, see national_number())
+and the phone digits reversed (prefixed with "~"). A search then turns each word of the query
+into prefix ranges on that one index (token >= 'smi' AND token <
+'smi\U0010ffff') instead of icontains scans over three columns:
+
+    "smi", "john smi"   every word must start a token (name or email word)
+    "555 123-4567"      phone digits as a prefix of the full or the national
+                        number, or, from PHONE_SUFFIX_DIGITS digits on, as a
+                        suffix through the reversed token (so "555",
+                        "5551234567" and "123-4567" all find "+1 (555) 123-4567")
+    "john@ex"           email_local, then the address as a prefix
+
+The same pass writes the customer's CustomerBlockKey rows, the blocking
+keys customers.dedup compares candidates within (see block_keys()).
+
+Writes that skip save() (queryset.update(), bulk_create) are picked up by
+`manage.py reindex_customer_search`; the API bulk endpoint reindexes its
+own records.
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Customer, CustomerBlockKey, CustomerSearchToken
+
+SOURCE_FIELDS = {"name", "email", "phone"}
+SEARCH_KEY_FIELDS = ("search_name", "email_local", "phone_digits")
+TOKEN_LENGTH = 64
+MAX_TOKENS = 20  # per customer
+PHONE_SUFFIX_DIGITS = 7
+REVERSED = "~"
+PREFIX_END = "\U0010ffff"  # sorts after any character a token can continue with
+BLOCK_PHONE_DIGITS = 9  # phone ending compared, so country prefixes don't matter
+EMAIL_DOMAINS = {"googlemail.com": "gmail.com"}
+
+# ITU country calling codes are prefix-free: 1 and 7 stand alone, these take
+# two digits, every other one three
+TWO_DIGIT_COUNTRY_CODES = {
+    "20", "27", "30", "31", "32", "33", "34", "36", "39", "40", "41", "43", "44", "45", "46", "47", "48", "49",
+    "51", "52", "53", "54", "55", "56", "57", "58", "60", "61", "62", "63", "64", "65", "66",
+    "81", "82", "84", "86", "90", "91", "92", "93", "94", "95", "98",
+}
+
+WORD = re.compile(r"[^\W_]+")
+PHONE_QUERY = re.compile(r"[\d\s()+\-./]+")
+INTERNATIONAL = re.compile(r"\s*(?:\+|00)\s*(\d+)(\D*)")
+
+
+def words(text):
+    """Lowercased words without accents."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return WORD.findall(text.lower())
+
+
+def digits(text):
+    return re.sub(r"\D", "", text or "")
+
+
+def national_number(phone):
+    """
+    The digits of a phone number without its international prefix and
+    country code ("+1 (555) 123-4567" → "5551234567"), or "" when it has
+    none. A separator after "+<digits>" marks the end of the country code;
+    otherwise its length follows from the leading digits.
+    """
+    match = INTERNATIONAL.match(phone or "")
+    if not match:
+        return ""
+    number = digits(phone[match.start(1):])
+    if match.group(2) and len(match.group(1)) <= 3:
+        code = match.group(1)
+    elif number[:1] in ("1", "7"):
+        code = number[:1]
+    else:
+        code = number[:2] if number[:2] in TWO_DIGIT_COUNTRY_CODES else number[:3]
+    return number[len(code):]
+
+
+def search_keys(customer):
+    email = (customer.email or "").strip().lower()
+    return {
+        "search_name": " ".join(words(customer.name))[:150],
+        "email_local": email.split("@", 1)[0][:64],
+        "phone_digits": digits(customer.phone)[:20],
+    }
+
+
+def tokens(customer):
+    """The CustomerSearchToken values of a customer (keys already refreshed)."""
+    values = customer.search_name.split()
+    if customer.email_local:
+        values += [customer.email_local, *words(customer.email_local)]
+    if customer.phone_digits:
+        values += [customer.phone_digits, REVERSED + customer.phone_digits[::-1]]
+        national = national_number(customer.phone)
+        if len(national) >= PHONE_SUFFIX_DIGITS:
+            values.append(national)
+    return list(dict.fromkeys(value[:TOKEN_LENGTH] for value in values))[:MAX_TOKENS]
+
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def soundex(word):
+    """American Soundex of a lowercased word: "smith", "smyth" → "s530"; the word itself if not latin."""
+    letters = [char for char in word if "a" <= char <= "z"]
+    if not letters:
+        return word[:12]
+    code, previous = letters[0], SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in "hw":  # h / w don't separate equal codes, vowels do
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def email_stem(email):
+    """(local-part stem, domain): no +tag, dots or trailing digits: "J.Smith+shop42@x.com" → ("jsmith", "x.com")."""
+    local, _, domain = (email or "").strip().lower().partition("@")
+    stem = re.sub(r"\d+$", "", local.split("+", 1)[0].replace(".", "")) or local
+    return stem, EMAIL_DOMAINS.get(domain, domain)
+
+
+def block_keys(customer):
+    """
+    The CustomerBlockKey values of a customer (keys already refreshed):
+
+        n:<soundex> <soundex>   first and last name word, in either order
+        p:<digits>              last BLOCK_PHONE_DIGITS digits of the phone
+        e:<stem>@<domain>       email local-part stem and domain
+    """
+    keys = []
+    names = customer.search_name.split()
+    if names:
+        keys.append("n:" + " ".join(sorted({soundex(names[0]), soundex(names[-1])})))
+    if len(customer.phone_digits) >= PHONE_SUFFIX_DIGITS:
+        keys.append("p:" + customer.phone_digits[-BLOCK_PHONE_DIGITS:])
+    stem, domain = email_stem(customer.email)
+    if stem:
+        keys.append(f"e:{stem}@{domain}")
+    return [key[:100] for key in keys]
+
+
+def index_customers(customers):
+    """Rewrite the search tokens and blocking keys of the given (saved) customers."""
+    customers = [customer for customer in customers if customer.pk is not None]
+    if not customers:
+        return
+    ids = [customer.pk for customer in customers]
+    with transaction.atomic():
+        CustomerSearchToken.objects.filter(customer__in=ids).delete()
+        CustomerSearchToken.objects.bulk_create(
+            [
+                CustomerSearchToken(customer_id=customer.pk, token=token)
+                for customer in customers
+                for token in tokens(customer)
+            ],
+            batch_size=1000,
+        )
+        CustomerBlockKey.objects.filter(customer__in=ids).delete()
+        CustomerBlockKey.objects.bulk_create(
+            [CustomerBlockKey(customer_id=customer.pk, key=key) for customer in customers for key in block_keys(customer)],
+            batch_size=1000,
+        )
+
+
+def reindex(customers):
+    """Refresh the keys of customers loaded from the database, save the changed ones, rewrite their tokens."""
+    changed = [customer for customer in customers if customer.refresh_search_keys()]
+    with transaction.atomic():
+        Customer.objects.bulk_update(changed, SEARCH_KEY_FIELDS, batch_size=1000)
+        index_customers(customers)
+    return len(changed)
+
+
+def token_prefix(*prefixes):
+    # A range rather than startswith: LIKE BINARY (MySQL) and case-insensitive
+    # LIKE (SQLite) can't use the index, a range can on every backend
+    condition = Q()
+    for prefix in prefixes:
+        condition |= Q(token__gte=prefix, token__lt=prefix + PREFIX_END)
+    return Q(pk__in=CustomerSearchToken.objects.filter(condition).values("customer_id"))
+
+
+def search_filter(query):
+    """Q matching customers for a search box query (an empty Q for a blank query)."""
+    query = (query or "").strip()
+    if not query:
+        return Q()
+
+    if PHONE_QUERY.fullmatch(query) and len(digits(query)) >= 3:
+        number = digits(query)
+        prefixes = [number[:TOKEN_LENGTH]]
+        if len(number) >= PHONE_SUFFIX_DIGITS:
+            prefixes.append((REVERSED + number[::-1])[:TOKEN_LENGTH])
+        return token_prefix(*prefixes)
+
+    if "@" in query:
+        local = query.lower().split("@", 1)[0]
+        return Q(email_local=local[:64], email__istartswith=query)
+
+    condition = Q()
+    for word in words(query)[:5]:
+        condition &= token_prefix(word[:TOKEN_LENGTH])
+    # Only punctuation: nothing can match
+    return condition if condition else Q(pk__in=[])
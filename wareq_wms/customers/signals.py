@@ -0,0 +1,22 @@
+from functools import partial
+
+from django.db import transaction
+
+from orders.models import Order
+from orders.signals import status_changed
+from . import lifetime
+
+
+# Customer lifetime figures (customers.lifetime): sale orders count once closed
+
+def count_order(sender, order, old, new, **kwargs):
+    if old is None and lifetime.counts(order, new):
+        # Closed on creation: the lines are saved after the order, count it on commit
+        transaction.on_commit(partial(lifetime.count_created, order.pk))
+    elif old is not None and old not in lifetime.CLOSED and lifetime.counts(order, new):
+        lifetime.count(order)
+    elif new is None and lifetime.counts(order, old):
+        lifetime.uncount(order)
+
+
+status_changed.connect(count_order, sender=Order, dispatch_uid="customer-lifetime-status")
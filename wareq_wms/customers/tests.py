@@ -1,3 +1,346 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db import transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.factories import UserFactory
+from inventory.factories import ItemFactory
+from orders.models import Order, OrderItem
+from . import dedup, lifetime, rfm
+from .models import Customer, DuplicateCandidate, LifetimeOrder, SegmentationRun
+from .search import national_number, search_filter
+
+
+def completed_sale(customer, item, price, created_at=None):
+    order = Order.objects.create(order_type="SALE", customer=customer)
+    OrderItem.objects.create(order=order, item=item, quantity=1, price=price)
+    order.refresh_from_db()
+    order.status = "COMPLETED"
+    order.save()
+    if created_at:
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+    return order
+
+
+class NationalNumberTests(TestCase):
+    def test_country_code_ended_by_a_separator(self):
+        self.assertEqual(national_number("+1 (555) 123-4567"), "5551234567")
+        self.assertEqual(national_number("0044 20 7946 0000"), "2079460000")
+        self.assertEqual(national_number("+353 1 234 5678"), "12345678")
+
+    def test_country_code_of_an_unformatted_number(self):
+        self.assertEqual(national_number("+15551234567"), "5551234567")
+        self.assertEqual(national_number("+442079460000"), "2079460000")
+        self.assertEqual(national_number("+3531234567"), "1234567")
+
+    def test_no_international_prefix(self):
+        self.assertEqual(national_number("555-123-4567"), "")
+        self.assertEqual(national_number(None), "")
+
+
+class PhoneSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.formatted = Customer.objects.create(name="Ann Lee", email="ann@example.com", phone="+1 (555) 123-4567")
+        cls.unformatted = Customer.objects.create(name="Bo Park", email="bo@example.com", phone="+15559876543")
+        cls.local = Customer.objects.create(name="Cy Moss", email="cy@example.com", phone="020 7946 0000")
+
+    def search(self, query):
+        return set(Customer.objects.filter(search_filter(query)))
+
+    def test_formatted_queries(self):
+        for query in ("+1 (555) 123-4567", "(555) 123-4567", "555 123 4567", "555-123"):
+            with self.subTest(query=query):
+                self.assertEqual(self.search(query), {self.formatted})
+
+    def test_unformatted_queries(self):
+        self.assertEqual(self.search("15551234567"), {self.formatted})
+        self.assertEqual(self.search("5559876543"), {self.unformatted})
+        self.assertEqual(self.search("02079460000"), {self.local})
+
+    def test_partial_queries(self):
+        # Area code alone: prefix of both national numbers
+        self.assertEqual(self.search("555"), {self.formatted, self.unformatted})
+        self.assertEqual(self.search("+1 555"), {self.formatted, self.unformatted})
+        # Ending, through the reversed token
+        self.assertEqual(self.search("123-4567"), {self.formatted})
+        self.assertEqual(self.search("946 0000"), {self.local})
+
+    def test_no_match(self):
+        self.assertEqual(self.search("556"), set())
+        self.assertEqual(self.search("7946"), set())  # middle digits, shorter than a suffix
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.jose = Customer.objects.create(name="José O'Neil", email="jose.oneil@example.com")
+        cls.john = Customer.objects.create(name="John Smith", email="jsmith@shop.example.com")
+
+    def search(self, query):
+        return set(Customer.objects.filter(search_filter(query)))
+
+    def test_name_words(self):
+        self.assertEqual(self.search("jose"), {self.jose})
+        self.assertEqual(self.search("JOSÉ o'ne"), {self.jose})
+        self.assertEqual(self.search("smi joh"), {self.john})  # any order, prefixes
+        self.assertEqual(self.search("john neil"), set())  # every word must match
+
+    def test_email(self):
+        self.assertEqual(self.search("jsmith@shop"), {self.john})
+        self.assertEqual(self.search("jsmith@other"), set())
+        self.assertEqual(self.search("oneil"), {self.jose})  # email word
+
+    def test_blank_and_punctuation(self):
+        self.assertEqual(self.search("  "), {self.jose, self.john})
+        self.assertEqual(self.search("--"), set())
+
+    def test_follows_saves(self):
+        self.john.name = "Johnny Walker"
+        self.john.save()
+        self.assertEqual(self.search("walk"), {self.john})
+        self.assertEqual(self.search("smith"), set())
+
+
+class StatsTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.client.force_login(UserFactory())
+
+    def test_chart_months_and_all_time_totals(self):
+        Customer.objects.create(name="Old", email="old@example.com")
+        Customer.objects.create(name="New", email="")
+        Customer.objects.create(name="Gone", email="gone@example.com", is_active=False)
+        Customer.objects.filter(name="Old").update(created_at=timezone.now() - timedelta(days=800))
+
+        data = self.client.get(reverse("customers:api_stats")).json()
+        self.assertEqual((data["total"], data["with_email"], data["new_this_month"]), (2, 1, 1))
+        self.assertEqual(len(data["values"]), 6)
+        self.assertEqual(sum(data["values"]), 1)  # the old customer is outside the chart
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.item = ItemFactory(quantity=1000)
+
+    def test_compare(self):
+        a = Customer.objects.create(name="John Smith", email="john.smith@example.com", phone="+1 555 123 4567")
+        b = Customer.objects.create(name="Smith Jon", email="johnsmith+shop@example.com", phone="(555) 123-4567")
+        score, reasons = dedup.compare(a, b)
+        self.assertGreaterEqual(score, dedup.THRESHOLD)
+        self.assertIn("same phone", reasons)
+        self.assertIn("same email", reasons)
+
+        c = Customer.objects.create(name="Mary Jones", email="mary@other.org", phone="+44 20 7946 0000")
+        score, reasons = dedup.compare(a, c)
+        self.assertLess(score, dedup.THRESHOLD)
+        self.assertIn("different phone", reasons)
+
+    def test_find_candidates(self):
+        a = Customer.objects.create(name="John Smith", email="john.smith@example.com", phone="+1 555 123 4567")
+        b = Customer.objects.create(name="Jon Smyth", email="johnsmith2@example.com", phone="555-123-4567")
+        Customer.objects.create(name="Mary Jones", email="mary@other.org")
+        Customer.objects.create(name="John Smith", email="js@else.org", is_active=False)
+
+        stats = dedup.find_candidates()
+        self.assertEqual(stats["added"], 1)
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual((candidate.first, candidate.second, candidate.status), (a, b, DuplicateCandidate.PENDING))
+
+        # Queued pairs, whatever their status, are not added again
+        dedup.dismiss(candidate)
+        self.assertEqual(dedup.find_candidates()["added"], 0)
+
+    def test_oversized_blocks_are_skipped(self):
+        for number in range(4):
+            Customer.objects.create(name="John Smith", email=f"person{number}@example{number}.com")
+        stats = dedup.find_candidates(max_block_size=3)
+        self.assertEqual((stats["oversized"], stats["added"]), (1, 0))
+
+    def test_merge(self):
+        keep = Customer.objects.create(name="John Smith", email="john@example.com")
+        duplicate = Customer.objects.create(
+            name="Jon Smith", email="jon@example.com", phone="555-123-4567", segment="BLOCKED"
+        )
+        other = Customer.objects.create(name="Jonny Smith", email="jonny@example.com")
+        completed_sale(keep, self.item, Decimal("10.00"))
+        completed_sale(duplicate, self.item, Decimal("20.00"))
+        completed_sale(duplicate, self.item, Decimal("30.00"))
+
+        candidate = DuplicateCandidate.objects.create(first=keep, second=duplicate, score=Decimal("0.9"))
+        pending = DuplicateCandidate.objects.create(first=duplicate, second=other, score=Decimal("0.8"))
+        dismissed = DuplicateCandidate.objects.create(
+            first=keep, second=other, score=Decimal("0.8"), status=DuplicateCandidate.DISMISSED
+        )
+
+        self.assertEqual(dedup.merge(candidate, keep), 2)
+
+        keep.refresh_from_db()
+        duplicate.refresh_from_db()
+        self.assertEqual(Order.objects.filter(customer=keep).count(), 3)
+        self.assertEqual((keep.order_count, keep.lifetime_value), (3, Decimal("60.00")))
+        self.assertEqual((duplicate.order_count, duplicate.lifetime_value), (0, Decimal("0.00")))
+        self.assertEqual(keep.phone, "555-123-4567")  # blank on the kept customer: filled
+        self.assertEqual(keep.segment, "BLOCKED")  # a block carries over
+        self.assertFalse(duplicate.is_active)
+        self.assertIn(f"Merged into customer #{keep.pk}", duplicate.notes)
+
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.status, DuplicateCandidate.MERGED)
+        self.assertFalse(DuplicateCandidate.objects.filter(pk=pending.pk).exists())
+        self.assertTrue(DuplicateCandidate.objects.filter(pk=dismissed.pk).exists())
+
+    def test_merge_refused(self):
+        first = Customer.objects.create(name="Ann Lee", email="ann@example.com")
+        second = Customer.objects.create(name="Anne Lee", email="anne@example.com")
+        stranger = Customer.objects.create(name="Bo Park", email="bo@example.com")
+        candidate = DuplicateCandidate.objects.create(first=first, second=second, score=Decimal("0.9"))
+
+        with self.assertRaises(ValueError):
+            dedup.merge(candidate, stranger)
+
+        Customer.objects.filter(pk=second.pk).update(is_active=False)
+        with self.assertRaises(ValueError):
+            dedup.merge(candidate, first)
+        candidate.refresh_from_db()
+        self.assertEqual(candidate.status, DuplicateCandidate.PENDING)
+
+
+class RfmBinningTests(TestCase):
+    def test_cut_points(self):
+        self.assertEqual(rfm.cut_points([]), [])
+        self.assertEqual(rfm.cut_points(range(10, 0, -1)), [3, 5, 7, 9])
+        self.assertEqual(rfm.cut_points([4]), [4, 4, 4, 4])
+
+    def test_score(self):
+        cuts = [3, 5, 7, 9]
+        for value, expected in ((1, 1), (3, 1), (4, 2), (9, 4), (10, 5)):
+            with self.subTest(value=value):
+                self.assertEqual(rfm.score(value, cuts), expected)
+                # Fewer days since the last order is better
+                self.assertEqual(rfm.score(value, cuts, higher_is_better=False), 6 - expected)
+        # Everyone equal, or nobody has bought
+        self.assertEqual(rfm.score(4, [4, 4, 4, 4]), 1)
+        self.assertEqual(rfm.score(4, []), 1)
+
+    def test_segment_for(self):
+        self.assertEqual(rfm.segment_for("REGULAR", 5, 4, 4), "VIP")
+        self.assertEqual(rfm.segment_for("VIP", 5, 4, 3), "REGULAR")
+        self.assertEqual(rfm.segment_for("BLOCKED", 5, 5, 5), "BLOCKED")
+
+
+class SegmentationTests(TestCase):
+    def test_full_run(self):
+        now = timezone.now()
+        item = ItemFactory(quantity=1000)
+        buyers = []
+        for i in range(5):
+            customer = Customer.objects.create(
+                name=f"Buyer {i}", email=f"buyer{i}@example.com", segment="BLOCKED" if i == 3 else "REGULAR"
+            )
+            for _ in range(i + 1):
+                completed_sale(customer, item, Decimal(10 * (i + 1)), created_at=now - timedelta(days=10 * (5 - i)))
+            buyers.append(customer)
+        lapsed = Customer.objects.create(name="Lapsed", email="lapsed@example.com")
+        blocked = Customer.objects.create(name="Blocked", email="blocked@example.com", segment="BLOCKED")
+        Customer.objects.filter(pk=lapsed.pk).update(segment="VIP", rfm_score="555")
+        Customer.objects.filter(pk=blocked.pk).update(rfm_score="321")
+
+        run = rfm.segment(now=now)
+
+        self.assertTrue(run.full)
+        self.assertEqual((run.customers, run.changed), (5, 7))
+        self.assertEqual(run.boundaries["frequency"], [2.0, 3.0, 4.0, 5.0])
+        scored = dict(Customer.objects.values_list("email", "rfm_score"))
+        segments = dict(Customer.objects.values_list("email", "segment"))
+        self.assertEqual(scored["buyer4@example.com"], "544")
+        self.assertEqual(segments["buyer4@example.com"], "VIP")
+        self.assertEqual((scored["buyer3@example.com"], segments["buyer3@example.com"]), ("533", "BLOCKED"))
+        self.assertEqual((scored["buyer0@example.com"], segments["buyer0@example.com"]), ("211", "REGULAR"))
+        # No completed sale any more: score cleared, VIP dropped, a block kept
+        self.assertEqual((scored["lapsed@example.com"], segments["lapsed@example.com"]), ("", "REGULAR"))
+        self.assertEqual((scored["blocked@example.com"], segments["blocked@example.com"]), ("", "BLOCKED"))
+
+        # Nothing changed since: an incremental run rescores nobody
+        again = rfm.segment(full=False, now=now)
+        self.assertFalse(again.full)
+        self.assertEqual((again.customers, again.changed), (0, 0))
+        self.assertEqual(again.boundaries, run.boundaries)
+        self.assertEqual(SegmentationRun.objects.count(), 2)
+
+
+class LifetimeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.item = ItemFactory(quantity=1000)
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Ann Lee", email="ann@example.com")
+
+    def figures(self):
+        self.customer.refresh_from_db()
+        return self.customer.order_count, self.customer.cancelled_count, self.customer.lifetime_value
+
+    def create_closed(self, status, price=Decimal("25.00")):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                order = Order.objects.create(order_type="SALE", customer=self.customer, status=status)
+                OrderItem.objects.create(order=order, item=self.item, quantity=2, price=price)
+        return order
+
+    def test_completed_then_deleted(self):
+        order = completed_sale(self.customer, self.item, Decimal("10.00"))
+        self.assertEqual(self.figures(), (1, 0, Decimal("10.00")))
+        order.delete()
+        self.assertEqual(self.figures(), (0, 0, Decimal("0.00")))
+
+    def test_created_closed_counts_on_commit(self):
+        self.create_closed("COMPLETED")
+        self.create_closed("CANCELLED")
+        self.assertEqual(self.figures(), (1, 1, Decimal("50.00")))
+        # The same as a rebuild counts them
+        lifetime.rebuild([self.customer.pk])
+        self.assertEqual(self.figures(), (1, 1, Decimal("50.00")))
+
+    def test_created_closed_then_deleted(self):
+        completed, cancelled = self.create_closed("COMPLETED"), self.create_closed("CANCELLED")
+        completed.delete()
+        cancelled.delete()
+        self.assertEqual(self.figures(), (0, 0, Decimal("0.00")))
+
+    def test_deleted_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Order.objects.create(order_type="SALE", customer=self.customer, status="COMPLETED").delete()
+        self.assertEqual(self.figures(), (0, 0, Decimal("0.00")))
+
+    def test_never_counted_takes_nothing_out(self):
+        order = completed_sale(self.customer, self.item, Decimal("10.00"))
+        LifetimeOrder.objects.all().delete()  # as if closed before figures were kept
+        order.delete()
+        self.assertEqual(self.figures(), (1, 0, Decimal("10.00")))
+
+    def test_rebuild_keeps_the_figures_deletes_take_out(self):
+        order = completed_sale(self.customer, self.item, Decimal("10.00"))
+        completed_sale(self.customer, self.item, Decimal("5.00"))
+        LifetimeOrder.objects.all().delete()
+        lifetime.rebuild()
+        self.assertEqual(LifetimeOrder.objects.count(), 2)
+        order.delete()
+        self.assertEqual(self.figures(), (1, 0, Decimal("5.00")))
 
-# Create your tests here.
+    def test_merge_moves_the_kept_figures(self):
+        other = Customer.objects.create(name="Anne Lee", email="anne@example.com")
+        order = completed_sale(other, self.item, Decimal("10.00"))
+        candidate = DuplicateCandidate.objects.create(first=self.customer, second=other, score=Decimal("0.9"))
+        dedup.merge(candidate, self.customer)
+        order.delete()
+        self.assertEqual(self.figures(), (0, 0, Decimal("0.00")))
+        other.refresh_from_db()
+        self.assertEqual(other.order_count, 0)
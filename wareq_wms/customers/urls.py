@@ -11,6 +11,9 @@ urlpatterns = [
     path("<int:pk>/edit/", views.customer_update, name="customer_update"),
     path("<int:pk>/delete/", views.customer_delete, name="customer_delete"),
     path("<int:pk>/reactivate/", views.customer_reactivate, name="customer_reactivate"),
+    path("duplicates/", views.duplicate_queue, name="duplicate_queue"),
+    path("duplicates/<int:pk>/merge/", views.duplicate_merge, name="duplicate_merge"),
+    path("duplicates/<int:pk>/dismiss/", views.duplicate_dismiss, name="duplicate_dismiss"),
 
     # JSON / AJAX
     path("api/list/", views.api_list, name="api_list"),
@@ -1,14 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
-from .models import Customer
+from django.core.cache import cache
+from core.counters import aget_counts, get_counts
+from core.stats import STATS_CACHE_TIMEOUT, amonthly_rows, month_starts, series
+from . import dedup
+from .lifetime import order_history
+from .models import Customer, DuplicateCandidate
+from .search import search_filter
 from .forms import CustomerForm
-from datetime import timedelta
 
 
 @login_required
@@ -20,7 +25,7 @@ def index(request):
     customers = Customer.objects.order_by("-created_at")
 
     context = {
-        "total_customers": customers.filter(is_active=True).count(),
+        "total_customers": get_counts()["customers_active"],
         "recent_customers_count": customers.filter(
             created_at__year=now.year, created_at__month=now.month, is_active=True
         ).count(),
@@ -43,7 +48,7 @@ def customer_list(request):
     if active == "1":
         qs = qs.filter(is_active=True)
     if search:
-        qs = qs.filter(Q(name__icontains=search) | Q(email__icontains=search) | Q(phone__icontains=search))
+        qs = qs.filter(search_filter(search))
     if has_email == "1":
         qs = qs.exclude(email="")
 
@@ -65,7 +70,16 @@ def customer_detail(request, pk):
     Show detailed profile of a single customer.
     """
     customer = get_object_or_404(Customer, pk=pk)
-    return render(request, "customers/customer_detail.html", {"customer": customer})
+    after, before = request.GET.get("after", ""), request.GET.get("before", "")
+    orders, newer, older = order_history(
+        customer, after=int(after) if after.isdigit() else None, before=int(before) if before.isdigit() else None
+    )
+    return render(request, "customers/customer_detail.html", {
+        "customer": customer,
+        "orders": orders,
+        "newer_cursor": newer,
+        "older_cursor": older,
+    })
 
 
 @login_required
@@ -127,6 +141,45 @@ def customer_reactivate(request, pk):
     return redirect("customers:customer_detail", pk=pk)
 
 
+@login_required
+def duplicate_queue(request):
+    """
+    Review queue of likely duplicate customers (customers.dedup), best score first.
+    """
+    qs = (
+        DuplicateCandidate.objects.filter(
+            status=DuplicateCandidate.PENDING, first__is_active=True, second__is_active=True
+        )
+        .select_related("first", "second")
+    )
+    paginator = Paginator(qs, 20)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    return render(request, "customers/duplicate_queue.html", {"candidates": page_obj})
+
+
+@login_required
+@require_POST
+def duplicate_merge(request, pk):
+    candidate = get_object_or_404(DuplicateCandidate, pk=pk, status=DuplicateCandidate.PENDING)
+    keep = get_object_or_404(Customer, pk=request.POST.get("keep"))
+    try:
+        moved = dedup.merge(candidate, keep, user=request.user)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+    else:
+        messages.success(request, f"Merged into {keep.name}: {moved} order(s) moved")
+    return redirect("customers:duplicate_queue")
+
+
+@login_required
+@require_POST
+def duplicate_dismiss(request, pk):
+    candidate = get_object_or_404(DuplicateCandidate, pk=pk, status=DuplicateCandidate.PENDING)
+    dedup.dismiss(candidate, user=request.user)
+    messages.info(request, "Marked as not duplicates")
+    return redirect("customers:duplicate_queue")
+
+
 # ---------------------------
 # JSON / AJAX Endpoints
 # ---------------------------
@@ -144,7 +197,7 @@ def api_list(request):
     if active == "1":
         qs = qs.filter(is_active=True)
     if search:
-        qs = qs.filter(Q(name__icontains=search) | Q(email__icontains=search) | Q(phone__icontains=search))
+        qs = qs.filter(search_filter(search))
     if has_email == "1":
         qs = qs.exclude(email="")
 
@@ -177,51 +230,39 @@ def api_list(request):
 
 
 @login_required
-def api_search(request):
+async def api_search(request):
     """
     Typeahead search (top 10).
     """
     q = request.GET.get("q", "")
     qs = Customer.objects.filter(is_active=True)
     if q:
-        qs = qs.filter(Q(name__icontains=q) | Q(email__icontains=q) | Q(phone__icontains=q))
+        qs = qs.filter(search_filter(q))
     qs = qs[:10]
-    return JsonResponse([{"id": c.id, "name": c.name, "email": c.email} for c in qs], safe=False)
+    return JsonResponse([{"id": c.id, "name": c.name, "email": c.email} async for c in qs], safe=False)
 
 
 @login_required
-def api_stats(request):
+async def api_stats(request):
     """
     Stats for dashboard widgets & small chart (last 6 months).
+    One grouped query per calendar month, cached for a short while.
     """
-    now = timezone.now()
-    start = (now - timedelta(days=180)).replace(day=1)
-    monthly = {}
-    qs = Customer.objects.filter(created_at__gte=start, is_active=True)
-
-    # group in Python (DB-agnostic)
-    for c in qs:
-        key = c.created_at.strftime("%Y-%m")
-        monthly[key] = monthly.get(key, 0) + 1
-
-    labels = []
-    values = []
-    # 6 months including current month
-    for i in range(5, -1, -1):
-        d = (now.replace(day=1) - timedelta(days=30 * i))
-        key = d.strftime("%Y-%m")
-        labels.append(d.strftime("%b %Y"))
-        values.append(monthly.get(key, 0))
-
-    data = {
-        "total": Customer.objects.filter(is_active=True).count(),
-        "with_email": Customer.objects.filter(is_active=True).exclude(email="").count(),
-        "new_this_month": Customer.objects.filter(
-            is_active=True, created_at__year=now.year, created_at__month=now.month
-        ).count(),
-        "labels": labels,
-        "values": values,
-    }
+    data = await cache.aget("customers:api_stats")
+    if data is None:
+        active = Customer.objects.filter(is_active=True)
+        months = month_starts()
+        rows = await amonthly_rows(active, months, count=Count("pk"))
+        labels, values = series(rows, months, "count")
+        counts = await aget_counts()
+        data = {
+            "total": counts["customers_active"],
+            "with_email": await active.exclude(email="").acount(),
+            "new_this_month": values[-1],
+            "labels": labels,
+            "values": values,
+        }
+        await cache.aset("customers:api_stats", data, STATS_CACHE_TIMEOUT)
     return JsonResponse(data)
 
 
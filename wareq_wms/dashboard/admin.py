@@ -1,3 +1,11 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import KPIRollup
+
+
+@admin.register(KPIRollup)
+class KPIRollupAdmin(admin.ModelAdmin):
+    list_display = ("metric", "dimension", "granularity", "bucket", "value")
+    list_filter = ("metric", "granularity")
+    date_hierarchy = "bucket"
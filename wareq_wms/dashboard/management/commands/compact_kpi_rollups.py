@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import HOURLY_RETENTION_DAYS, compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold hourly KPI rollups older than KPI_HOURLY_RETENTION_DAYS into daily rows "
+        "(run periodically, e.g. daily from cron)."
+    )
+
+    def handle(self, *args, **options):
+        compacted = compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {compacted} hourly rollups older than {HOURLY_RETENTION_DAYS} days."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute all KPI rollups from orders, order lines and stock movements "
+        "(initial backfill, or after bulk imports that skip signals)."
+    )
+
+    def handle(self, *args, **options):
+        hours = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt KPI rollups from {hours} hourly aggregates."))
@@ -1,3 +1,31 @@
 from django.db import models
 
-# Create your models here.
+
+class KPIRollup(models.Model):
+    """
+    Pre-aggregated KPI value for one metric / dimension / time bucket
+    (see dashboard.rollups). Hourly rows are compacted into daily rows
+    after KPI_HOURLY_RETENTION_DAYS.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITIES = (
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    )
+
+    metric = models.CharField(max_length=30)
+    dimension = models.CharField(max_length=100, blank=True, default="")
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket = models.DateTimeField(help_text="Start of the hour / day")
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "granularity", "bucket", "dimension"], name="kpi_rollup_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric}[{self.dimension}] {self.granularity} {self.bucket:%Y-%m-%d %H:%M} = {self.value}"
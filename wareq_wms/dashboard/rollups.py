@@ -0,0 +1,234 @@
+"""
+Hourly / daily KPI rollups.
+
+Metrics (the dimension each one is split by in brackets):
+
+    orders          orders placed [order type]
+    order_value     value of the lines of orders placed [order type]
+    units_shipped   units on SALE orders, when completed
+    units_received  units on PURCHASE orders, when completed
+    stock_movements stock adjustments [reason]
+    stock_units     net units adjusted [reason]
+    avg_order_value order_value / orders (derived at query time) [order type]
+
+Signals (dashboard.signals) add to the hourly row of the affected hour in
+the writing transaction, so rolled-back writes never count. Order values
+belong to the hour the order was placed; a line edited later still
+updates that hour. Units count when the order is completed; lines added,
+edited or deleted after that adjust them in the hour of the change.
+
+`manage.py compact_kpi_rollups` (periodic) sums hourly rows older than
+KPI_HOURLY_RETENTION_DAYS into daily rows and deletes them. Writes that
+land before that cut-off go straight to the daily row. Day queries
+combine the daily rows with the not yet compacted hours, so both
+granularities are exact over any range where the data exists.
+
+`manage.py rebuild_kpi_rollups` recomputes everything from the source
+tables (initial backfill, or after bulk imports that skip signals).
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import KPIRollup
+
+HOURLY_RETENTION_DAYS = getattr(settings, "KPI_HOURLY_RETENTION_DAYS", 14)
+MAX_BUCKETS = 2000  # per query
+
+METRICS = {
+    "orders": "Orders placed, by order type",
+    "order_value": "Value of orders placed, by order type",
+    "units_shipped": "Units on completed SALE orders",
+    "units_received": "Units on completed PURCHASE orders",
+    "stock_movements": "Stock adjustments, by reason",
+    "stock_units": "Net units adjusted, by reason",
+    "avg_order_value": "order_value / orders, by order type",
+}
+# metric -> (numerator, denominator)
+DERIVED = {"avg_order_value": ("order_value", "orders")}
+
+STEP = {KPIRollup.HOUR: timedelta(hours=1), KPIRollup.DAY: timedelta(days=1)}
+
+
+def truncate(moment, granularity):
+    moment = timezone.localtime(moment)
+    if granularity == KPIRollup.DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def hourly_cutoff(now=None):
+    """Hours before this (a day boundary) are kept as daily rows only."""
+    return truncate((now or timezone.now()) - timedelta(days=HOURLY_RETENTION_DAYS), KPIRollup.DAY)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def add(metric, moment, amount, dimension=""):
+    """Add `amount` to `metric` for the hour (or, past retention, the day) of `moment`."""
+    if not amount:
+        return
+    granularity = KPIRollup.HOUR if moment >= hourly_cutoff() else KPIRollup.DAY
+    key = {
+        "metric": metric,
+        "dimension": (dimension or "")[:100],
+        "granularity": granularity,
+        "bucket": truncate(moment, granularity),
+    }
+    if KPIRollup.objects.filter(**key).update(value=F("value") + amount):
+        return
+    try:
+        with transaction.atomic():
+            KPIRollup.objects.create(**key, value=amount)
+    except IntegrityError:
+        # Created concurrently: add to that row
+        KPIRollup.objects.filter(**key).update(value=F("value") + amount)
+
+
+def compact(now=None):
+    """Fold hourly rows before the retention cut-off into daily rows. Returns hours compacted."""
+    cutoff = hourly_cutoff(now)
+    with transaction.atomic():
+        hours = KPIRollup.objects.filter(granularity=KPIRollup.HOUR, bucket__lt=cutoff)
+        days = (
+            hours.order_by()
+            .annotate(day=TruncDay("bucket"))
+            .values("metric", "dimension", "day")
+            .annotate(total=Sum("value"))
+        )
+        for row in days:
+            key = {"metric": row["metric"], "dimension": row["dimension"], "granularity": KPIRollup.DAY, "bucket": row["day"]}
+            if not KPIRollup.objects.filter(**key).update(value=F("value") + row["total"]):
+                KPIRollup.objects.create(**key, value=row["total"])
+        compacted, _ = hours.delete()
+    return compacted
+
+
+def rebuild():
+    """Recompute all rollups from orders, order lines and stock movements."""
+    from inventory.models import StockMovement
+    from orders.models import Order, OrderItem
+
+    line_value = ExpressionWrapper(F("quantity") * F("price"), output_field=DecimalField(max_digits=18, decimal_places=2))
+    sources = [
+        # (metric, queryset, time field, dimension field, aggregate)
+        ("orders", Order.objects.all(), "created_at", "order_type", Count("pk")),
+        ("order_value", OrderItem.objects.all(), "order__created_at", "order__order_type", Sum(line_value)),
+        # Completion time isn't stored: the last update of a completed order is the closest record
+        ("units_shipped", OrderItem.objects.filter(order__status="COMPLETED", order__order_type="SALE"),
+         "order__updated_at", None, Sum("quantity")),
+        ("units_received", OrderItem.objects.filter(order__status="COMPLETED", order__order_type="PURCHASE"),
+         "order__updated_at", None, Sum("quantity")),
+        ("stock_movements", StockMovement.objects.all(), "created_at", "reason", Count("pk")),
+        ("stock_units", StockMovement.objects.all(), "created_at", "reason", Sum("change")),
+    ]
+    rows = defaultdict(Decimal)
+    for metric, queryset, time_field, dimension_field, aggregate in sources:
+        fields = ["hour"] + ([dimension_field] if dimension_field else [])
+        grouped = queryset.order_by().annotate(hour=TruncHour(time_field)).values(*fields).annotate(total=aggregate)
+        for row in grouped:
+            dimension = (row.get(dimension_field) or "")[:100] if dimension_field else ""
+            rows[(metric, dimension, row["hour"])] += Decimal(row["total"] or 0)
+
+    with transaction.atomic():
+        KPIRollup.objects.all().delete()
+        KPIRollup.objects.bulk_create(
+            [
+                KPIRollup(metric=metric, dimension=dimension, granularity=KPIRollup.HOUR, bucket=hour, value=total)
+                for (metric, dimension, hour), total in rows.items()
+                if total
+            ],
+            batch_size=1000,
+        )
+        compact()
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class RollupQueryError(ValueError):
+    pass
+
+
+def buckets(start, end, granularity):
+    bucket, step = truncate(start, granularity), STEP[granularity]
+    result = []
+    while bucket < end:
+        result.append(bucket)
+        bucket = timezone.localtime(bucket + step)
+    return result
+
+
+def raw_series(metric, start, end, granularity, group_by, dimensions):
+    """{(bucket, dimension or ""): value} for a stored metric."""
+    rows = KPIRollup.objects.filter(metric=metric, bucket__gte=truncate(start, granularity), bucket__lt=end)
+    if dimensions:
+        rows = rows.filter(dimension__in=dimensions)
+    group = ["dimension"] if group_by else []
+
+    if granularity == KPIRollup.HOUR:
+        parts = [rows.filter(granularity=KPIRollup.HOUR).values("bucket", *group)]
+    else:
+        parts = [
+            rows.filter(granularity=KPIRollup.DAY).values("bucket", *group),
+            # Hours not compacted yet, summed per day
+            rows.filter(granularity=KPIRollup.HOUR).annotate(day=TruncDay("bucket")).values("day", *group),
+        ]
+
+    values = defaultdict(Decimal)
+    for part in parts:
+        for row in part.order_by().annotate(total=Sum("value")):
+            bucket = row.get("bucket") or row.get("day")
+            values[(timezone.localtime(bucket), row.get("dimension", ""))] += row["total"]
+    return values
+
+
+def query(metric, start, end, granularity=KPIRollup.HOUR, group_by=None, dimensions=None):
+    """
+    Time series of `metric` over [start, end): [{"bucket", "value"}] with
+    every bucket present (zero-filled), or {dimension: [...]} when
+    group_by="dimension".
+    """
+    if metric not in METRICS:
+        raise RollupQueryError(f"Unknown metric '{metric}'. Choose from: {', '.join(METRICS)}.")
+    if granularity not in STEP:
+        raise RollupQueryError("granularity must be 'hour' or 'day'.")
+    if group_by not in (None, "dimension"):
+        raise RollupQueryError("group_by must be 'dimension'.")
+    if start >= end:
+        raise RollupQueryError("start must be before end.")
+    points = buckets(start, end, granularity)
+    if len(points) > MAX_BUCKETS:
+        raise RollupQueryError(f"At most {MAX_BUCKETS} buckets per query; use a coarser granularity or a shorter range.")
+
+    if metric in DERIVED:
+        numerator, denominator = (raw_series(m, start, end, granularity, group_by, dimensions) for m in DERIVED[metric])
+        values = {
+            key: (numerator.get(key, Decimal(0)) / count).quantize(Decimal("0.01"))
+            for key, count in denominator.items()
+            if count
+        }
+    else:
+        values = raw_series(metric, start, end, granularity, group_by, dimensions)
+
+    def series(dimension):
+        return [{"bucket": bucket, "value": values.get((bucket, dimension), Decimal(0))} for bucket in points]
+
+    if group_by:
+        return {dimension: series(dimension) for dimension in sorted({key[1] for key in values})}
+    return series("")
+
+
+def day_start(day):
+    """Aware start of a date in the current timezone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
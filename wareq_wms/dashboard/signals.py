@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.utils import timezone
+
+from inventory.models import StockMovement
+from orders.models import Order, OrderItem
+from orders.signals import line_totals, status_changed
+from . import rollups
+
+
+def order_status_changed(sender, order, old, new, **kwargs):
+    if old is None:
+        rollups.add("orders", order.created_at, 1, order.order_type)
+    elif new is None:
+        # Line values and units are taken out by the lines' own post_delete (cascade)
+        rollups.add("orders", order.created_at, -1, order.order_type)
+    elif new == "COMPLETED":
+        metric = "units_shipped" if order.order_type == "SALE" else "units_received"
+        rollups.add(metric, timezone.now(), line_totals(order)["units"])
+
+
+# The line and its order as stored
+LINE_STATE = ("quantity", "price", "order__order_type", "order__status", "order__created_at")
+
+
+def load_line(sender, instance, raw=False, **kwargs):
+    # Read on the write path (pre_save / pre_delete) like core.signals.load_state:
+    # loading lines remembers nothing
+    instance._rollup_state = (
+        None if instance._state.adding or raw
+        else OrderItem.objects.filter(pk=instance.pk).values(*LINE_STATE).first()
+    )
+
+
+def line_rollups(state, sign):
+    """
+    What a line adds to the rollups: {(metric, moment, dimension): amount}.
+    Units count once the order is completed (moment None: now, like the
+    completion itself).
+    """
+    order_type = state["order__order_type"]
+    amounts = {("order_value", state["order__created_at"], order_type): sign * state["quantity"] * state["price"]}
+    if state["order__status"] == "COMPLETED":
+        metric = "units_shipped" if order_type == "SALE" else "units_received"
+        amounts[(metric, None, "")] = sign * state["quantity"]
+    return amounts
+
+
+def add_lines(*changes):
+    totals = defaultdict(int)
+    for amounts in changes:
+        for key, amount in amounts.items():
+            totals[key] += amount
+    for (metric, moment, dimension), amount in totals.items():
+        rollups.add(metric, moment or timezone.now(), amount, dimension)
+
+
+def line_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    order = instance.order
+    new = {
+        "quantity": instance.quantity,
+        "price": instance.price,
+        "order__order_type": order.order_type,
+        "order__status": order.status,
+        "order__created_at": order.created_at,
+    }
+    old = None if created else getattr(instance, "_rollup_state", None)
+    add_lines(line_rollups(new, 1), line_rollups(old, -1) if old else {})
+
+
+def line_deleted(sender, instance, **kwargs):
+    # Also runs for each line when an order is deleted (cascade)
+    old = getattr(instance, "_rollup_state", None)
+    if old:
+        add_lines(line_rollups(old, -1))
+
+
+def movement_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.add("stock_movements", instance.created_at, 1, instance.reason)
+        rollups.add("stock_units", instance.created_at, instance.change, instance.reason)
+
+
+status_changed.connect(order_status_changed, sender=Order, dispatch_uid="rollups-order-status")
+pre_save.connect(load_line, sender=OrderItem, dispatch_uid="rollups-line-load")
+pre_delete.connect(load_line, sender=OrderItem, dispatch_uid="rollups-line-load-delete")
+post_save.connect(line_saved, sender=OrderItem, dispatch_uid="rollups-line-save")
+post_delete.connect(line_deleted, sender=OrderItem, dispatch_uid="rollups-line-delete")
+post_save.connect(movement_saved, sender=StockMovement, dispatch_uid="rollups-movement-save")
@@ -1,3 +1,66 @@
+from decimal import Decimal
+
+from django.db.models import Sum
 from django.test import TestCase
 
-# Create your tests here.
+from inventory.factories import ItemFactory
+from orders.models import Order, OrderItem
+from . import rollups
+from .models import KPIRollup
+
+
+class LineRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.item = ItemFactory(quantity=1000)
+
+    def totals(self):
+        rows = KPIRollup.objects.values("metric").annotate(total=Sum("value"))
+        return {row["metric"]: row["total"] for row in rows if row["total"]}
+
+    def assertRebuildAgrees(self, expected):
+        self.assertEqual(self.totals(), expected)
+        rollups.rebuild()
+        self.assertEqual(self.totals(), expected)
+
+    def completed_sale(self):
+        order = Order.objects.create(order_type="SALE")
+        line = OrderItem.objects.create(order=order, item=self.item, quantity=3, price=Decimal("2.00"))
+        order.refresh_from_db()
+        order.status = "COMPLETED"
+        order.save()
+        return order, line
+
+    def test_line_edited(self):
+        order = Order.objects.create(order_type="SALE")
+        line = OrderItem.objects.create(order=order, item=self.item, quantity=3, price=Decimal("2.00"))
+        line = OrderItem.objects.get(pk=line.pk)
+        line.quantity = 5
+        line.save()
+        self.assertRebuildAgrees({"orders": 1, "order_value": Decimal("10.00")})
+
+    def test_line_of_completed_order_edited_and_deleted(self):
+        order, line = self.completed_sale()
+        self.assertRebuildAgrees({"orders": 1, "order_value": Decimal("6.00"), "units_shipped": 3})
+
+        line.quantity = 4
+        line.save()
+        OrderItem.objects.create(order=order, item=self.item, quantity=1, price=Decimal("2.00"))
+        self.assertRebuildAgrees({"orders": 1, "order_value": Decimal("10.00"), "units_shipped": 5})
+
+        line.delete()
+        self.assertRebuildAgrees({"orders": 1, "order_value": Decimal("2.00"), "units_shipped": 1})
+
+    def test_completed_order_deleted(self):
+        order, _ = self.completed_sale()
+        Order.objects.filter(pk=order.pk).delete()
+        self.assertRebuildAgrees({})
+
+    def test_stale_copy_counts_once(self):
+        order = Order.objects.create(order_type="SALE")
+        line = OrderItem.objects.create(order=order, item=self.item, quantity=3, price=Decimal("2.00"))
+        stale = OrderItem.objects.get(pk=line.pk)
+        line.quantity = 5
+        line.save()
+        stale.delete()
+        self.assertRebuildAgrees({"orders": 1})
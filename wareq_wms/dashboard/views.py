@@ -1,30 +1,61 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db.models import DecimalField, F, Sum
 from django.shortcuts import render
+from django.utils import timezone
 from customers.models import Customer
 from suppliers.models import Supplier
 from inventory.models import Item
 from orders.models import Order
+from core.counters import aget_counts
+from . import rollups
 
-def index(request):
+async def index(request):
     """
     Dashboard view showing system overview and recent activity.
+    Counts come from the entity counters (one query), charts from the KPI
+    rollups; lists are lazy querysets, evaluated only when their cached
+    widget misses (core.fragments).
     """
+    counts = await aget_counts()
     stats = {
-        "customers_count": Customer.objects.count(),
-        "suppliers_count": Supplier.objects.count(),
-        "items_count": Item.objects.count(),
-        "orders_count": Order.objects.count(),
+        "customers_count": counts["customers"],
+        "suppliers_count": counts["suppliers"],
+        "items_count": counts["items"],
+        "orders_count": counts["orders"],
+    }
+
+    # Orders chart: rollups only, never a scan of Order
+    now = timezone.now()
+    query = sync_to_async(rollups.query)
+    orders_chart = {
+        "month": [
+            {"label": f"{point['bucket']:%b %d}", "value": int(point["value"])}
+            for point in await query("orders", now - timedelta(days=29), now, "day")
+        ],
+        "day": [
+            {"label": f"{point['bucket']:%H:00}", "value": int(point["value"])}
+            for point in await query("orders", now - timedelta(hours=23), now, "hour")
+        ],
     }
 
     # Recent activity
-    recent_orders = Order.objects.order_by("-created_at")[:5]
+    recent_orders = (
+        Order.objects.select_related("customer")
+        .annotate(total=Sum(F("items__quantity") * F("items__price"), output_field=DecimalField(max_digits=14, decimal_places=2)))
+        .order_by("-created_at")[:5]
+    )
     recent_customers = Customer.objects.order_by("-created_at")[:5]
     recent_items = Item.objects.order_by("-created_at")[:5]
 
-    return render(
+    # Rendered in a thread: the template reads the lazy request.user / session / messages
+    return await sync_to_async(render)(
         request,
         "dashboard/index.html",
         {
             "stats": stats,
+            "orders_chart": orders_chart,
             "recent_orders": recent_orders,
             "recent_customers": recent_customers,
             "recent_items": recent_items,
@@ -6,6 +6,7 @@ from django.db.models import Q
 from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required, permission_required
 
+from core.counters import get_counts
 from .models import Item, StockMovement
 from .forms import ItemForm, StockAdjustmentForm
 from django.db.models import Sum, Count
@@ -17,15 +18,16 @@ from django.db.models import Sum, Count
 @login_required
 def index(request):
     items = Item.objects.all()
-    low_stock = items.filter(quantity__lte=5).count()
+    counts = get_counts()
     out_of_stock = items.filter(quantity=0).count()
 
     movements = StockMovement.objects.select_related("item").order_by("-created_at")[:5]
 
+    # Lazy querysets: only evaluated when their cached widget misses (core.fragments)
     context = {
-        "items": items,
-        "total_items": items.count(),
-        "low_stock": low_stock,
+        "low_stock_items": items.filter(quantity__lte=5).select_related("supplier"),
+        "total_items": counts["items"],
+        "low_stock": counts["items_low_stock"],
         "out_of_stock": out_of_stock,
         "recent_movements": movements,
     }
@@ -143,11 +145,14 @@ def stock_report(request):
 # AJAX Endpoints
 # ----------------------------
 @login_required
-def search_items(request):
-    """Return JSON list of items for autocomplete search."""
+async def search_items(request):
+    """Return JSON list of items for autocomplete search (async ORM)."""
     q = request.GET.get("q", "")
     items = Item.objects.filter(Q(name__icontains=q) | Q(sku__icontains=q))[:10]
-    data = [{"id": i.id, "sku": i.sku, "name": i.name, "quantity": i.quantity, "price": str(i.price)} for i in items]
+    data = [
+        {"id": i.id, "sku": i.sku, "name": i.name, "quantity": i.quantity, "price": str(i.price)}
+        async for i in items
+    ]
     return JsonResponse(data, safe=False)
 
 
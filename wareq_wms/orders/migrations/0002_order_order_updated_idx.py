@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_customer_customer_updated_idx'),
+        ('orders', '0001_initial'),
+        ('suppliers', '0006_item_supplier_item_updated_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at', 'id'], name='order_updated_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from customers.models import Customer
 from suppliers.models import Supplier
 from inventory.models import Item
@@ -43,6 +44,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Delta-sync watermark (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="order_updated_idx"),
+        ]
+
     @property
     def total_amount(self):
         """Sum of all items inside this order."""
@@ -90,6 +97,8 @@ class Order(models.Model):
         """
         if self.pk:
             old = Order.objects.get(pk=self.pk)
+            # The status before this save, for orders.signals.status_changed
+            self._stored_status = old.status
 
             # No going back from COMPLETED/CANCELLED
             if old.status in ["COMPLETED", "CANCELLED"] and old.status != self.status:
@@ -124,12 +133,22 @@ class OrderItem(models.Model):
         if self.quantity <= 0:
             raise ValidationError("Quantity must be greater than zero.")
 
+    def touch_order(self):
+        """Line changes count as order changes (API ETags, total_amount)."""
+        Order.objects.filter(pk=self.order_id).update(updated_at=timezone.now())
+
     def save(self, *args, **kwargs):
         """Auto-fill price from inventory if missing."""
         if not self.price:
             self.price = self.item.price
         self.clean()
         super().save(*args, **kwargs)
+        self.touch_order()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_order()
+        return result
 
     def __str__(self):
         return f"{self.quantity} × {self.item.name} (Order {self.order.id})"
@@ -0,0 +1,78 @@
+"""
+Order status transitions.
+
+status_changed is sent once per write that moves an order between
+statuses, inside the writing transaction:
+
+    created     old=None, new=<status>
+    saved       old=<stored status>, new=<status>, only when they differ
+    deleted     old=<status>, new=None (before the cascade removes the lines)
+
+It is the one hook the status-driven figures subscribe to: entity counters
+(core.signals), KPI rollups (dashboard.signals), supplier scorecards
+(suppliers.signals) and customer lifetime figures (customers.signals).
+Order.save() already reads the stored row to guard the transition, so the
+status before a save comes from there: nothing is remembered when orders
+are loaded. Receivers that need the lines' totals share one aggregate
+through line_totals().
+
+Writes that skip signals (queryset.update(), bulk_create) send nothing; the
+figures' own rebuild / reconcile commands cover them.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import Signal
+
+from .models import Order
+
+# sender=Order; order, old, new (None before creation / after deletion)
+status_changed = Signal()
+
+money = DecimalField(max_digits=18, decimal_places=2)
+LINE_TOTALS = {
+    "units": Sum("quantity"),
+    "value": Sum(F("quantity") * F("price"), output_field=money),
+    "list_value": Sum(F("quantity") * F("item__price"), output_field=money),
+}
+
+
+def line_totals(order):
+    """
+    {"units", "value", "list_value" (at the items' current prices)} of an
+    order's lines: one query per transition, however many receivers ask.
+    """
+    if getattr(order, "_line_totals", None) is None:
+        totals = order.items.aggregate(**LINE_TOTALS)
+        order._line_totals = {
+            "units": totals["units"] or 0,
+            "value": totals["value"] or Decimal(0),
+            "list_value": totals["list_value"] or Decimal(0),
+        }
+    return order._line_totals
+
+
+def send(order, old, new):
+    order._line_totals = None
+    try:
+        status_changed.send(sender=Order, order=order, old=old, new=new)
+    finally:
+        order._line_totals = None
+
+
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, "_stored_status", instance.status)
+    if old != instance.status:
+        send(instance, old, instance.status)
+    instance._stored_status = instance.status
+
+
+def order_deleting(sender, instance, **kwargs):
+    send(instance, instance.status, None)
+
+
+post_save.connect(order_saved, sender=Order, dispatch_uid="order-status-save")
+pre_delete.connect(order_deleting, sender=Order, dispatch_uid="order-status-delete")
@@ -12,6 +12,7 @@ from django.template.loader import render_to_string
 from xhtml2pdf import pisa
 from io import BytesIO
 
+from core.counters import get_counts
 from .models import Order, OrderItem
 from .forms import OrderForm, OrderItemFormSet
 from inventory.models import Item
@@ -29,7 +30,7 @@ def index(request):
     context = {
         "sales_count": orders.filter(order_type="SALE").count(),
         "purchase_count": orders.filter(order_type="PURCHASE").count(),
-        "pending_count": orders.filter(status="PENDING").count(),
+        "pending_count": get_counts()["orders_pending"],
         "completed_count": orders.filter(status="COMPLETED").count(),
         "recent_orders": orders[:5],
     }
@@ -274,16 +275,16 @@ def update_status(request, pk):
         return JsonResponse({"success": False, "error": str(e)})
 
 
-def search_items(request):
+async def search_items(request):
     """
     AJAX endpoint for item autocomplete in order form.
-    Returns top 10 matching items.
+    Returns top 10 matching items (async ORM, doesn't hold a worker thread).
     """
     q = request.GET.get("q", "")
     items = Item.objects.filter(name__icontains=q)[:10]
 
     results = [
         {"id": item.id, "name": item.name, "price": str(item.price)}
-        for item in items
+        async for item in items
     ]
     return JsonResponse(results, safe=False)
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Supplier, Item
+from core.counters import reconcile
+from .models import PriceListImport, Supplier, Item
 
 @admin.register(Supplier)
 class SupplierAdmin(admin.ModelAdmin):
@@ -11,17 +12,38 @@ class SupplierAdmin(admin.ModelAdmin):
     actions = ["make_inactive", "make_active"]
     readonly_fields = ("created_at", "updated_at")
 
+    def get_queryset(self, request):
+        # item_count in the changelist without a COUNT per row
+        return super().get_queryset(request).with_catalog_stats()
+
     @admin.action(description="Deactivate selected suppliers")
     def make_inactive(self, request, queryset):
         queryset.update(is_active=False)
+        reconcile([Supplier])
 
     @admin.action(description="Reactivate selected suppliers")
     def make_active(self, request, queryset):
         queryset.update(is_active=True)
+        reconcile([Supplier])
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "sku", "supplier", "quantity", "price", "created_at")
+    list_display = ("id", "name", "sku", "supplier", "quantity", "price", "is_active", "created_at")
     search_fields = ("name", "sku", "supplier__name")
-    list_filter = ("supplier", "created_at")
+    list_filter = ("is_active", "supplier", "created_at")
     ordering = ("-created_at",)
+
+
+@admin.register(PriceListImport)
+class PriceListImportAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "supplier", "file_name", "status", "dry_run", "rows",
+        "created", "updated", "unchanged", "deactivated", "rejected", "rows_per_second", "started_at",
+    )
+    list_filter = ("status", "dry_run", "supplier")
+    search_fields = ("file_name", "supplier__name")
+    ordering = ("-started_at",)
+    readonly_fields = [field.name for field in PriceListImport._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suppliers'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (cached catalog stats, scorecards)
@@ -0,0 +1,93 @@
+"""
+Catalog figures and item pages for the supplier detail page.
+
+The stats (item count, catalog value, average price and latest item, over
+the active items) come from one aggregate query and are cached per
+supplier in the shared cache for SUPPLIER_STATS_TIMEOUT. suppliers.signals
+deletes a supplier's entry once a write to one of its items commits (both
+suppliers when an item moves), so the page never shows figures older than
+the last item change.
+Writes that skip signals (queryset.update(), suppliers.importer) call
+forget().
+
+Items are listed in SKU order, a page at a time, with keyset navigation
+(?after=<last sku> / ?before=<first sku>): a page costs one indexed range
+query however deep into the catalog it is.
+"""
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from api.cache import get_cache
+from .models import Item, Supplier
+
+STATS_TIMEOUT = getattr(settings, "SUPPLIER_STATS_TIMEOUT", 600)
+ITEMS_PAGE_SIZE = 25
+
+
+def stats_key(supplier_id):
+    return f"supplier-stats:{supplier_id}"
+
+
+def compute_stats(supplier_id):
+    latest = Item.objects.filter(supplier=OuterRef("pk"), is_active=True).order_by("-created_at", "-pk")
+    row = (
+        Supplier.objects.filter(pk=supplier_id)
+        .with_catalog_stats()
+        .annotate(
+            latest_item_id=Subquery(latest.values("pk")[:1]),
+            latest_item_name=Subquery(latest.values("name")[:1]),
+        )
+        .values("num_items", "catalog_total", "avg_price", "last_item_at", "latest_item_id", "latest_item_name")
+        .first()
+    )
+    if row is None:
+        return None
+    return {
+        "item_count": row["num_items"],
+        "catalog_value": row["catalog_total"],
+        "average_price": round(row["avg_price"], 2) if row["avg_price"] is not None else 0,
+        "latest_item": (
+            {"id": row["latest_item_id"], "name": row["latest_item_name"], "created_at": row["last_item_at"]}
+            if row["latest_item_id"] is not None else None
+        ),
+    }
+
+
+def get_stats(supplier_id):
+    """Cached catalog stats of a supplier (None if it doesn't exist)."""
+    cache = get_cache()
+    key = stats_key(supplier_id)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats(supplier_id)
+        if stats is not None:
+            cache.set(key, stats, STATS_TIMEOUT)
+    return stats
+
+
+def forget(supplier_ids):
+    get_cache().delete_many([stats_key(pk) for pk in set(supplier_ids) if pk is not None])
+
+
+def items_page(supplier, after=None, before=None, size=ITEMS_PAGE_SIZE):
+    """
+    (items, previous cursor, next cursor) for a page of the supplier's items
+    in SKU order. A cursor is the SKU to pass as ?before= / ?after=, or None
+    at either end of the catalog.
+    """
+    items = supplier.supplier_items.all()
+    if before:
+        rows = list(items.filter(sku__lt=before).order_by("-sku")[:size + 1])
+        has_previous = len(rows) > size
+        rows = rows[:size][::-1]
+        has_next = True
+    else:
+        if after:
+            items = items.filter(sku__gt=after)
+        rows = list(items.order_by("sku")[:size + 1])
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_previous = bool(after)
+    if not rows:
+        return rows, None, None
+    return rows, rows[0].sku if has_previous else None, rows[-1].sku if has_next else None
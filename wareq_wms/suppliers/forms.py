@@ -29,3 +29,20 @@ class ItemForm(forms.ModelForm):
             "quantity": forms.NumberInput(attrs={"class": "form-control", "min": "0"}),
             "price": forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0"}),
         }
+
+
+class PriceListImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV or XLSX with a header row: sku, price and optionally name, quantity, description.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.xlsx"}),
+    )
+    deactivate_missing = forms.BooleanField(
+        required=False, initial=True,
+        label="Deactivate items missing from the file",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Dry run (report the changes only)",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
@@ -0,0 +1,341 @@
+"""
+Supplier price-list import.
+
+A price list is a CSV or XLSX file with one item per row and a header row:
+
+    sku, price            required
+    name, quantity,       optional (new items without a name are named
+    description           after their SKU)
+
+The file is streamed (csv module / openpyxl read-only mode), never loaded
+whole. The supplier's items are preloaded once into an index by SKU, so
+matching a row costs no query. Rows are applied in chunks of CHUNK_SIZE,
+each chunk in its own transaction with one bulk_create for the new SKUs
+and one bulk_update for the changed ones:
+
+    created      SKU not in the supplier's catalog
+    updated      price / quantity / name / description changed, or a
+                 discontinued item is back on the list
+    unchanged    nothing to write
+    rejected     unreadable row, SKU repeated in the file, or SKU that
+                 belongs to another supplier (SKUs are unique)
+    deactivated  active items missing from the file (after the last chunk,
+                 only if the file had valid rows)
+
+Each run is recorded as a PriceListImport with these counts and the first
+MAX_ERRORS rejected rows. A run that fails part-way keeps the chunks it
+committed; importing the same file again is safe, since applied rows come
+out unchanged.
+
+Bulk writes don't send post_save, so the API / fragment caches and the
+supplier's catalog stats are invalidated once at the end.
+"""
+import csv
+import io
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from api import cache as response_cache
+from . import catalog
+from .models import Item, PriceListImport
+
+CHUNK_SIZE = 2000
+MAX_ERRORS = 100
+BULK_BATCH_SIZE = 500
+
+COLUMNS = ("sku", "price", "name", "quantity", "description")
+# Other header spellings seen in supplier files
+ALIASES = {
+    "item_code": "sku", "code": "sku", "article": "sku",
+    "unit_price": "price", "cost": "price",
+    "qty": "quantity", "stock": "quantity",
+    "item_name": "name", "product": "name", "item": "name",
+}
+MAX_PRICE = Decimal("99999999.99")  # Item.price: 10 digits, 2 decimals
+
+FIELD_LIMITS = {"sku": 100, "name": 200}
+
+
+class PriceListError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def column_name(header):
+    name = str(header or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return ALIASES.get(name, name)
+
+
+def read_header(header):
+    columns = [column_name(h) for h in header]
+    missing = [name for name in ("sku", "price") if name not in columns]
+    if missing:
+        raise PriceListError(f"Missing column(s): {', '.join(missing)}.")
+    return columns
+
+
+def csv_rows(source):
+    """(columns, iterator of (line, values)) for a binary CSV file."""
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    columns = read_header(next(reader, []))
+    return columns, ((reader.line_num, row) for row in reader)
+
+
+def xlsx_cell(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Excel stores numeric SKUs / quantities as floats
+    return "" if value is None else str(value)
+
+
+def xlsx_rows(source):
+    """(columns, iterator of (line, values)) for the first sheet of an XLSX file."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise PriceListError("Reading .xlsx files needs openpyxl (pip install openpyxl).")
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    try:
+        columns = read_header(next(rows, ()))
+    except PriceListError:
+        workbook.close()
+        raise
+
+    def values():
+        try:
+            for line, row in enumerate(rows, start=2):
+                yield line, [xlsx_cell(value) for value in row]
+        finally:
+            workbook.close()
+
+    return columns, values()
+
+
+def open_rows(source, file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension in (".xlsx", ".xlsm"):
+        return xlsx_rows(source)
+    if extension in (".csv", ".txt"):
+        return csv_rows(source)
+    raise PriceListError("Price lists must be .csv or .xlsx files.")
+
+
+def parse_number(text):
+    """Decimal of "1,234.50", "$12", "12,5" (decimal comma, as in ;-separated files)."""
+    text = text.replace("$", "").replace(" ", "")
+    if "," in text and "." not in text and len(text.rsplit(",", 1)[1]) != 3:
+        text = text.replace(",", ".")
+    value = Decimal(text.replace(",", ""))
+    if not value.is_finite():
+        raise InvalidOperation
+    return value
+
+
+def parse_row(columns, values):
+    """{column: value} of a row, only the columns present; raises PriceListError."""
+    raw = {}
+    for name, value in zip(columns, values):
+        if name in COLUMNS:
+            raw[name] = value.strip()
+
+    row = {"sku": raw.get("sku", "")}
+    if not row["sku"]:
+        raise PriceListError("Missing SKU.")
+
+    try:
+        row["price"] = parse_number(raw.get("price", "")).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise PriceListError(f"Invalid price '{raw.get('price', '')}'.")
+    if not 0 <= row["price"] <= MAX_PRICE:
+        raise PriceListError(f"Price out of range: {row['price']}.")
+
+    if raw.get("quantity"):
+        try:
+            row["quantity"] = int(parse_number(raw["quantity"]))
+        except InvalidOperation:
+            raise PriceListError(f"Invalid quantity '{raw['quantity']}'.")
+        if row["quantity"] < 0:
+            raise PriceListError("Quantity must be >= 0.")
+
+    if raw.get("name"):
+        row["name"] = raw["name"]
+    if "description" in raw:
+        row["description"] = raw["description"] or None
+
+    for field, limit in FIELD_LIMITS.items():
+        if field in row and len(row[field]) > limit:
+            raise PriceListError(f"{field} longer than {limit} characters.")
+    return row
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Importing
+# ---------------------------------------------------------------------------
+
+class PriceListImporter:
+    """Applies one price list to one supplier's items; see the module docstring."""
+
+    def __init__(self, supplier, *, deactivate_missing=True, dry_run=False, chunk_size=CHUNK_SIZE, progress=None):
+        self.supplier = supplier
+        self.deactivate_missing = deactivate_missing
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.progress = progress  # progress(run, seconds elapsed) after each chunk
+        self.index = {}
+        self.seen = set()
+        self.run = None
+
+    def load_index(self, columns):
+        """{sku: {"pk", fields...}} of the supplier's items, the compared fields only."""
+        fields = ["pk", "sku", "price", "quantity", "name", "is_active"]
+        if "description" in columns:
+            fields.append("description")
+        self.index = {row["sku"]: row for row in self.supplier.supplier_items.values(*fields).iterator(chunk_size=5000)}
+
+    def reject(self, line, sku, message):
+        run = self.run
+        run.rejected += 1
+        if len(run.errors) < MAX_ERRORS:
+            run.errors.append({"line": line, "sku": sku, "error": message})
+
+    def import_file(self, source, file_name):
+        self.run = run = PriceListImport.objects.create(
+            supplier=self.supplier, file_name=os.path.basename(file_name)[:255], dry_run=self.dry_run,
+        )
+        started = time.perf_counter()
+        try:
+            columns, rows = open_rows(source, file_name)
+            self.load_index(columns)
+            for chunk in chunked(rows, self.chunk_size):
+                self.apply_chunk(columns, chunk)
+                run.save()
+                if self.progress:
+                    self.progress(run, time.perf_counter() - started)
+
+            if self.deactivate_missing:
+                if not (run.created + run.updated + run.unchanged):
+                    raise PriceListError("No valid rows in the file: nothing imported or deactivated.")
+                self.deactivate()
+        except Exception as exc:
+            run.status = PriceListImport.FAILED
+            run.errors.append({"line": None, "sku": None, "error": str(exc)})
+            raise
+        else:
+            run.status = PriceListImport.COMPLETED
+        finally:
+            run.errors.sort(key=lambda error: error["line"] or 0)
+            run.finished_at = timezone.now()
+            run.save()
+            if not self.dry_run and (run.created or run.updated or run.deactivated):
+                # bulk writes skip post_save
+                response_cache.bump_generation(Item)
+                catalog.forget([self.supplier.pk])
+        return run
+
+    def apply_chunk(self, columns, chunk):
+        run = self.run
+        rows = []
+        sku_at = columns.index("sku")
+        for line, values in chunk:
+            if not any(value.strip() for value in values):
+                continue  # blank line
+            run.rows += 1
+            sku = values[sku_at].strip() if len(values) > sku_at else ""
+            if sku in self.seen:
+                self.reject(line, sku, "SKU repeated in the file.")
+                continue
+            if sku:
+                self.seen.add(sku)  # even if the row is invalid: it's still on the list, don't deactivate it
+            try:
+                rows.append((line, parse_row(columns, values)))
+            except PriceListError as exc:
+                self.reject(line, sku, str(exc))
+
+        # New SKUs already used by another supplier: one query per chunk
+        new_skus = [row["sku"] for _, row in rows if row["sku"] not in self.index]
+        taken = set(Item.objects.filter(sku__in=new_skus).values_list("sku", flat=True)) if new_skus else set()
+
+        now = timezone.now()
+        to_create, to_update, update_fields = [], [], set()
+        for line, row in rows:
+            sku = row["sku"]
+            current = self.index.get(sku)
+            if current is None:
+                if sku in taken:
+                    self.reject(line, sku, "SKU belongs to another supplier.")
+                    continue
+                to_create.append(Item(
+                    supplier=self.supplier,
+                    sku=sku,
+                    name=row.get("name") or sku,
+                    price=row["price"],
+                    quantity=row.get("quantity", 0),
+                    description=row.get("description"),
+                ))
+                continue
+
+            changes = {field: value for field, value in row.items() if field != "sku" and current[field] != value}
+            if not current["is_active"]:
+                changes["is_active"] = True
+            if not changes:
+                run.unchanged += 1
+                continue
+            current.update(changes)
+            update_fields.update(changes)
+            to_update.append(current)
+
+        if not self.dry_run:
+            with transaction.atomic():
+                Item.objects.bulk_create(to_create, batch_size=BULK_BATCH_SIZE)
+                if to_update:
+                    # bulk_update() skips auto_now
+                    fields = sorted(update_fields) + ["updated_at"]
+                    objs = [
+                        Item(pk=current["pk"], updated_at=now, **{field: current[field] for field in update_fields})
+                        for current in to_update
+                    ]
+                    Item.objects.bulk_update(objs, fields, batch_size=BULK_BATCH_SIZE)
+        run.created += len(to_create)
+        run.updated += len(to_update)
+
+    def deactivate(self):
+        missing = [row["pk"] for sku, row in self.index.items() if sku not in self.seen and row["is_active"]]
+        if not self.dry_run:
+            now = timezone.now()
+            for start in range(0, len(missing), self.chunk_size):
+                with transaction.atomic():
+                    Item.objects.filter(pk__in=missing[start:start + self.chunk_size]).update(
+                        is_active=False, updated_at=now
+                    )
+        self.run.deactivated = len(missing)
+
+
+def import_price_list(supplier, source, file_name, **options):
+    """Import a price list (binary file object) for a supplier; returns the PriceListImport."""
+    return PriceListImporter(supplier, **options).import_file(source, file_name)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from suppliers.importer import CHUNK_SIZE, PriceListError, import_price_list
+from suppliers.models import Supplier
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a supplier price list (CSV or XLSX with sku and price columns): "
+        "create new SKUs, update changed ones and deactivate the ones missing from the file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("supplier", type=int, help="Supplier id")
+        parser.add_argument("path", help=".csv or .xlsx file")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per transaction")
+        parser.add_argument("--keep-missing", action="store_true", help="Don't deactivate items missing from the file")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them")
+
+    def handle(self, *args, **options):
+        supplier = Supplier.objects.filter(pk=options["supplier"]).first()
+        if supplier is None:
+            raise CommandError(f"No supplier {options['supplier']}.")
+
+        def progress(run, seconds):
+            self.stdout.write(f"{run.rows} rows, {run.rows / seconds:.0f} rows/s")
+
+        try:
+            with open(options["path"], "rb") as source:
+                run = import_price_list(
+                    supplier, source, options["path"],
+                    chunk_size=options["chunk_size"],
+                    deactivate_missing=not options["keep_missing"],
+                    dry_run=options["dry_run"],
+                    progress=progress,
+                )
+        except (OSError, PriceListError) as exc:
+            raise CommandError(str(exc))
+
+        for error in run.errors:
+            self.stdout.write(self.style.WARNING(f"line {error['line']} ({error['sku']}): {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Dry run: ' if run.dry_run else ''}{run.rows} rows in {run.seconds:.1f}s "
+            f"({run.rows_per_second or 0} rows/s): {run.created} created, {run.updated} updated, "
+            f"{run.unchanged} unchanged, {run.deactivated} deactivated, {run.rejected} rejected."
+        ))
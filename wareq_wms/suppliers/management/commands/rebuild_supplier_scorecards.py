@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from suppliers.scorecards import REBUILD_BATCH_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the supplier scorecards from all closed purchase orders "
+        "(initial backfill, or after imports / deletes that skip signals)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE, help="Orders per batch")
+
+    def handle(self, *args, **options):
+        rows = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt supplier scorecards: {rows} supplier-days."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0007_item_is_active_pricelistimport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScoreDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Day the orders were completed / cancelled')),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('lead_time_seconds', models.BigIntegerField(default=0, help_text='Total over the completed orders')),
+                ('max_lead_time_seconds', models.BigIntegerField(default=0)),
+                ('units', models.BigIntegerField(default=0)),
+                ('spend', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('list_spend', models.DecimalField(decimal_places=2, default=0, help_text="The same units at the items' list prices", max_digits=18)),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_days', to='suppliers.supplier')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('supplier', 'day'), name='supplier_score_day_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_order_order_updated_idx'),
+        ('suppliers', '0008_supplierscoreday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScoreOrder',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='supplier_score', serialize=False, to='orders.order')),
+                ('day', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('lead_time_seconds', models.BigIntegerField(default=0)),
+                ('units', models.BigIntegerField(default=0)),
+                ('spend', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('list_spend', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='suppliers.supplier')),
+            ],
+        ),
+    ]
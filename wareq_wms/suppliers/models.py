@@ -1,4 +1,8 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Avg, Count, DecimalField, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, RegexValidator
 
 
@@ -9,6 +13,26 @@ phone_regex = RegexValidator(
 )
 
 
+class SupplierQuerySet(models.QuerySet):
+    def with_catalog_stats(self):
+        """
+        Per-supplier catalog figures in the same query (one join + GROUP BY):
+        num_items, catalog_total, avg_price, last_item_at. The item_count,
+        catalog_value and average_price properties use them when present.
+        """
+        money = DecimalField(max_digits=18, decimal_places=2)
+        active = Q(supplier_items__is_active=True)  # discontinued items aren't part of the catalog
+        return self.annotate(
+            num_items=Count("supplier_items", filter=active),
+            catalog_total=Coalesce(
+                Sum(F("supplier_items__quantity") * F("supplier_items__price"), output_field=money, filter=active),
+                Value(Decimal(0)), output_field=money,
+            ),
+            avg_price=Avg("supplier_items__price", filter=active),
+            last_item_at=Max("supplier_items__created_at", filter=active),
+        )
+
+
 class Supplier(models.Model):
     name = models.CharField(max_length=150)
     email = models.EmailField(unique=True, db_index=True)  # avoid duplicates
@@ -26,6 +50,8 @@ class Supplier(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)  
     updated_at = models.DateTimeField(auto_now=True)      
 
+    objects = SupplierQuerySet.as_manager()
+
     def deactivate(self):
         if self.is_active:
             self.is_active = False
@@ -36,27 +62,42 @@ class Supplier(models.Model):
             self.is_active = True
             self.save(update_fields=["is_active", "updated_at"])
 
+    # The properties below use the with_catalog_stats() annotations when the
+    # supplier was loaded with them, and query the items otherwise.
+
     @property
     def item_count(self):
-        return self.supplier_items.count()
+        if hasattr(self, "num_items"):
+            return self.num_items
+        return self.supplier_items.filter(is_active=True).count()
 
     @property
     def catalog_value(self):
-        return sum(i.quantity * i.price for i in self.supplier_items.all())
+        if hasattr(self, "catalog_total"):
+            return self.catalog_total
+        return sum(i.quantity * i.price for i in self.supplier_items.filter(is_active=True))
 
     @property
     def latest_item(self):
-        return self.supplier_items.order_by("-created_at").first()
+        return self.supplier_items.filter(is_active=True).order_by("-created_at").first()
 
     @property
     def average_price(self):
-        qs = self.supplier_items.all()
+        if hasattr(self, "avg_price"):
+            return round(self.avg_price, 2) if self.avg_price is not None else 0
+        qs = self.supplier_items.filter(is_active=True)
         return round(sum(i.price for i in qs) / qs.count(), 2) if qs.exists() else 0
 
     def __str__(self):
         status = "✅" if self.is_active else "❌"
         return f"{self.name} {status}"
 
+    class Meta:
+        indexes = [
+            # Delta-sync watermark (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="supplier_updated_idx"),
+        ]
+
 
 class Item(models.Model):
     supplier = models.ForeignKey(
@@ -78,6 +119,8 @@ class Item(models.Model):
         validators=[MinValueValidator(0)],
         help_text="Price per unit"
     )
+    # Cleared when the item drops out of the supplier's price list (suppliers.importer)
+    is_active = models.BooleanField(default=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -87,3 +130,95 @@ class Item(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.supplier.name})"
+
+    class Meta:
+        indexes = [
+            # Delta-sync watermark (updated_at, id)
+            models.Index(fields=["updated_at", "id"], name="supplier_item_updated_idx"),
+        ]
+
+
+class PriceListImport(models.Model):
+    """One run of a supplier price-list import and its diff summary (see suppliers.importer)."""
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    STATUS_CHOICES = [(RUNNING, "Running"), (COMPLETED, "Completed"), (FAILED, "Failed")]
+
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="price_list_imports")
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    dry_run = models.BooleanField(default=False)
+
+    rows = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    unchanged = models.PositiveIntegerField(default=0)
+    deactivated = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # [{"line": 12, "sku": ..., "error": ...}], first ones only
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def seconds(self):
+        return (self.finished_at - self.started_at).total_seconds() if self.finished_at else None
+
+    @property
+    def rows_per_second(self):
+        seconds = self.seconds
+        return round(self.rows / seconds) if seconds else None
+
+    def __str__(self):
+        return f"{self.supplier.name}: {self.file_name} ({self.status})"
+
+    class Meta:
+        ordering = ["-started_at"]
+
+
+class SupplierScoreDay(models.Model):
+    """
+    One supplier's purchase orders closed on one day, as sums (see
+    suppliers.scorecards): the rolling-window scorecards add these up.
+    """
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="score_days")
+    day = models.DateField(help_text="Day the orders were completed / cancelled")
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    lead_time_seconds = models.BigIntegerField(default=0, help_text="Total over the completed orders")
+    max_lead_time_seconds = models.BigIntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    spend = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    list_spend = models.DecimalField(
+        max_digits=18, decimal_places=2, default=0, help_text="The same units at the items' list prices"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["supplier", "day"], name="supplier_score_day_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id} {self.day}: {self.completed} completed, {self.cancelled} cancelled"
+
+
+class SupplierScoreOrder(models.Model):
+    """
+    What one closed purchase order added to its supplier's SupplierScoreDay,
+    so that deleting the order takes out exactly that (see suppliers.scorecards).
+    """
+    order = models.OneToOneField(
+        "orders.Order", on_delete=models.CASCADE, primary_key=True, related_name="supplier_score"
+    )
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    lead_time_seconds = models.BigIntegerField(default=0)
+    units = models.BigIntegerField(default=0)
+    spend = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    list_spend = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Order #{self.order_id} → {self.supplier_id} {self.day}"
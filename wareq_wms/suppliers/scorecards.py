@@ -0,0 +1,225 @@
+"""
+Supplier scorecards from PURCHASE order history.
+
+For each supplier, over rolling windows of WINDOWS days:
+
+    completed / cancelled   purchase orders closed in the window
+    fill_rate               % of closed orders that were completed rather
+                            than cancelled
+    avg / max lead time     days from placing an order to completing it
+    units, spend            received on the completed orders
+    price_variance          % paid above (+) or below (-) the items' list
+                            prices on those lines
+
+Closed orders are summed per supplier and day into SupplierScoreDay.
+suppliers.signals adds an order to the row of the day it is completed or
+cancelled (on orders.signals.status_changed, inside the writing
+transaction), so a scorecard reads at most max(WINDOWS) rows with one
+aggregate query, however many orders there are. An order created already
+closed is added once the creating transaction commits, with the lines
+saved along with it. What was added is kept per order
+(SupplierScoreOrder): deleting the order takes out exactly those figures
+on that day, whatever happened to the item prices or the order's
+updated_at since, and deleting an order that was never added takes out
+nothing.
+
+Orders don't store a completion time. Because a completed order can't be
+edited, its updated_at is the completion time, and both the signals and
+`manage.py rebuild_supplier_scorecards` use it. The list price is the
+inventory item's price at completion (signals) or its current price
+(rebuild).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from orders.signals import LINE_TOTALS, line_totals
+from .models import SupplierScoreDay, SupplierScoreOrder
+
+WINDOWS = (30, 90, 365)  # days
+CLOSED = ("COMPLETED", "CANCELLED")
+REBUILD_BATCH_SIZE = 5000  # orders per pair of queries
+
+SUMMED = ("completed", "cancelled", "lead_time_seconds", "units", "spend", "list_spend")
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def closed_figures(status, created_at, updated_at, lines):
+    """SupplierScoreDay amounts for one closed purchase order, from its line totals (orders.signals.LINE_TOTALS)."""
+    if status == "CANCELLED":
+        return {"cancelled": 1}
+    lead_time = int((updated_at - created_at).total_seconds())
+    return {
+        "completed": 1,
+        "lead_time_seconds": lead_time,
+        "max_lead_time_seconds": lead_time,
+        "units": lines.get("units") or 0,
+        "spend": lines.get("value") or Decimal(0),
+        "list_spend": lines.get("list_value") or Decimal(0),
+    }
+
+
+def order_figures(order):
+    """SupplierScoreDay amounts for one closed purchase order."""
+    lines = line_totals(order) if order.status == "COMPLETED" else {}
+    return closed_figures(order.status, order.created_at, order.updated_at, lines)
+
+
+def add(supplier_id, day, figures, sign=1):
+    """Add (sign=1) or take out (sign=-1) an order's figures on a supplier's day."""
+    summed = {name: sign * figures[name] for name in SUMMED if figures.get(name)}
+    changes = {name: F(name) + amount for name, amount in summed.items()}
+    longest = figures.get("max_lead_time_seconds")
+    if longest and sign > 0:
+        # A maximum can't be taken out again: removals leave it (the rebuild recomputes it)
+        changes["max_lead_time_seconds"] = Greatest(F("max_lead_time_seconds"), longest)
+    if not changes:
+        return
+    key = {"supplier_id": supplier_id, "day": day}
+    if SupplierScoreDay.objects.filter(**key).update(**changes):
+        return
+    initial = dict(summed, max_lead_time_seconds=longest if longest and sign > 0 else 0)
+    try:
+        with transaction.atomic():
+            SupplierScoreDay.objects.create(**key, **initial)
+    except IntegrityError:
+        # Created concurrently: add to that row
+        SupplierScoreDay.objects.filter(**key).update(**changes)
+
+
+def closed_day(order):
+    return timezone.localdate(order.updated_at)
+
+
+def score(order):
+    """Add a newly closed purchase order to its supplier's day, and keep what was added."""
+    day, figures = closed_day(order), order_figures(order)
+    add(order.supplier_id, day, figures)
+    SupplierScoreOrder.objects.create(
+        order=order, supplier_id=order.supplier_id, day=day, **{name: figures.get(name, 0) for name in SUMMED}
+    )
+
+
+def score_created(order_id):
+    """
+    Add a purchase order created closed, after the creating transaction
+    committed its lines. Nothing to do if the order is gone or was added
+    meanwhile (by a rebuild).
+    """
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None or order.order_type != "PURCHASE" or not order.supplier_id or order.status not in CLOSED:
+        return
+    try:
+        with transaction.atomic():
+            score(order)
+    except IntegrityError:
+        pass  # already kept: added by a concurrent rebuild
+
+
+def unscore(order):
+    """Take a closed purchase order out again (before it is deleted): exactly what it added, if it was added."""
+    kept = SupplierScoreOrder.objects.filter(order=order).first()
+    if kept is not None:
+        add(kept.supplier_id, kept.day, {name: getattr(kept, name) for name in SUMMED}, sign=-1)
+
+
+def rebuild(batch_size=REBUILD_BATCH_SIZE):
+    """
+    Recompute every SupplierScoreDay, and the kept figures of every closed
+    purchase order, from the orders. Orders are read in id ranges, each with
+    one query over the orders and one over their lines grouped per order, so
+    the cost is two queries per batch, not per order. Returns the number of
+    supplier-days written.
+    """
+    orders = Order.objects.filter(order_type="PURCHASE", status__in=CLOSED, supplier__isnull=False)
+    bounds = orders.aggregate(low=Min("pk"), high=Max("pk"))
+    rows = defaultdict(lambda: defaultdict(int))
+    SupplierScoreOrder.objects.all().delete()
+
+    start, high = (bounds["low"] or 1) - 1, bounds["high"] or 0
+    while start < high:
+        batch = orders.filter(pk__gt=start, pk__lte=start + batch_size).order_by()
+        lines = {
+            row.pop("order"): row
+            for row in OrderItem.objects.filter(order__in=batch.filter(status="COMPLETED"))
+            .values("order").annotate(**LINE_TOTALS).order_by()
+        }
+        kept = []
+        for pk, supplier_id, status, created_at, updated_at in batch.values_list(
+            "pk", "supplier_id", "status", "created_at", "updated_at"
+        ):
+            day = timezone.localdate(updated_at)
+            figures = closed_figures(status, created_at, updated_at, lines.get(pk, {}))
+            totals = rows[(supplier_id, day)]
+            for name in SUMMED:
+                totals[name] += figures.get(name, 0)
+            totals["max_lead_time_seconds"] = max(
+                totals["max_lead_time_seconds"], figures.get("max_lead_time_seconds", 0)
+            )
+            kept.append(SupplierScoreOrder(
+                order_id=pk, supplier_id=supplier_id, day=day, **{name: figures.get(name, 0) for name in SUMMED}
+            ))
+        # ignore_conflicts: orders closed meanwhile keep the figures their signal wrote
+        SupplierScoreOrder.objects.bulk_create(kept, batch_size=1000, ignore_conflicts=True)
+        start += batch_size
+
+    with transaction.atomic():
+        SupplierScoreDay.objects.all().delete()
+        SupplierScoreDay.objects.bulk_create(
+            [SupplierScoreDay(supplier_id=supplier_id, day=day, **figures) for (supplier_id, day), figures in rows.items()],
+            batch_size=1000,
+        )
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def percent(part, whole):
+    return round(Decimal(part) * 100 / Decimal(whole), 1) if whole else None
+
+
+def days(seconds):
+    return round(Decimal(seconds) / 86400, 1)
+
+
+def scorecard(supplier_id, today=None):
+    """{"<n>d": figures} for every window in WINDOWS, from one aggregate query."""
+    today = today or timezone.localdate()
+    starts = {window: today - timedelta(days=window - 1) for window in WINDOWS}
+    aggregates = {}
+    for window, start in starts.items():
+        in_window = Q(day__gte=start)
+        for name in SUMMED:
+            aggregates[f"{name}_{window}"] = Sum(name, filter=in_window)
+        aggregates[f"max_lead_time_seconds_{window}"] = Max("max_lead_time_seconds", filter=in_window)
+    totals = SupplierScoreDay.objects.filter(supplier_id=supplier_id, day__gte=min(starts.values())).aggregate(
+        **aggregates
+    )
+
+    card = {}
+    for window in WINDOWS:
+        value = {name: totals[f"{name}_{window}"] or 0 for name in SUMMED + ("max_lead_time_seconds",)}
+        completed = value["completed"]
+        card[f"{window}d"] = {
+            "start": starts[window],
+            "completed": completed,
+            "cancelled": value["cancelled"],
+            "fill_rate": percent(completed, completed + value["cancelled"]),
+            "avg_lead_time_days": days(Decimal(value["lead_time_seconds"]) / completed) if completed else None,
+            "max_lead_time_days": days(value["max_lead_time_seconds"]) if completed else None,
+            "units": value["units"],
+            "spend": Decimal(value["spend"]),
+            "price_variance": percent(value["spend"] - value["list_spend"], value["list_spend"]),
+        }
+    return card
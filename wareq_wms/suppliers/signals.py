@@ -0,0 +1,48 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from orders.models import Order
+from orders.signals import status_changed
+from . import catalog, scorecards
+from .models import Item
+
+
+def load_supplier(sender, instance, raw=False, **kwargs):
+    # The supplier as stored, read on the write path: an item moved to another
+    # supplier changes both catalogs
+    instance._catalog_supplier_id = (
+        None if instance._state.adding or raw
+        else Item.objects.filter(pk=instance.pk).values_list("supplier_id", flat=True).first()
+    )
+
+
+def forget_catalog_stats(sender, instance, using=None, **kwargs):
+    supplier_ids = {instance.supplier_id, getattr(instance, "_catalog_supplier_id", None)}
+    # After commit, so a concurrent request can't cache the figures from before the write
+    transaction.on_commit(partial(catalog.forget, supplier_ids), using=using)
+
+
+pre_save.connect(load_supplier, sender=Item, dispatch_uid="supplier-catalog-load")
+post_save.connect(forget_catalog_stats, sender=Item, dispatch_uid="supplier-catalog-save")
+post_delete.connect(forget_catalog_stats, sender=Item, dispatch_uid="supplier-catalog-delete")
+
+
+# Supplier scorecards (suppliers.scorecards): purchase orders count once closed
+
+def is_closed_purchase(order, status):
+    return order.order_type == "PURCHASE" and order.supplier_id and status in scorecards.CLOSED
+
+
+def score_order(sender, order, old, new, **kwargs):
+    if old is None and is_closed_purchase(order, new):
+        # Closed on creation: the lines are saved after the order, add it on commit
+        transaction.on_commit(partial(scorecards.score_created, order.pk))
+    elif old is not None and old not in scorecards.CLOSED and is_closed_purchase(order, new):
+        scorecards.score(order)
+    elif new is None and is_closed_purchase(order, old):
+        scorecards.unscore(order)
+
+
+status_changed.connect(score_order, sender=Order, dispatch_uid="supplier-scorecard-status")
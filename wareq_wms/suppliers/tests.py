@@ -1,3 +1,324 @@
+import io
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import caches
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.counters import get_counts
+from inventory.factories import ItemFactory as InventoryItemFactory
+from orders.models import Order, OrderItem
+from . import catalog, scorecards
+from .factories import ItemFactory, SupplierFactory
+from .importer import PriceListError, import_price_list, parse_number
+from .models import Item, PriceListImport, SupplierScoreDay, SupplierScoreOrder
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+class SupplierPageQueryTests(TestCase):
+    """A page costs the same queries whatever the number of suppliers or items."""
+
+    def setUp(self):
+        get_counts()  # creates the counter rows, so no measured request reconciles them
+
+    def queries(self, url):
+        clear_caches()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_supplier_list(self):
+        ItemFactory(supplier=SupplierFactory())
+        url = reverse("suppliers:supplier_list")
+        baseline = self.queries(url)
+
+        for supplier in SupplierFactory.create_batch(14):
+            ItemFactory.create_batch(3, supplier=supplier)
+        clear_caches()
+        with self.assertNumQueries(baseline):
+            self.client.get(url)
+
+    def test_supplier_detail(self):
+        supplier = SupplierFactory()
+        ItemFactory(supplier=supplier)
+        url = reverse("suppliers:supplier_detail", args=[supplier.pk])
+        baseline = self.queries(url)
+
+        ItemFactory.create_batch(30, supplier=supplier)  # more than one page
+        clear_caches()
+        with self.assertNumQueries(baseline):
+            response = self.client.get(url)
+        self.assertIsNotNone(response.context["next_cursor"])
+        self.assertEqual(
+            self.queries(f"{url}?after={response.context['next_cursor']}"), baseline
+        )
+
+
+class CatalogStatsTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.first, self.second = SupplierFactory(), SupplierFactory()
+        self.item = ItemFactory(supplier=self.first, is_active=True)
+
+    def item_counts(self):
+        return catalog.get_stats(self.first.pk)["item_count"], catalog.get_stats(self.second.pk)["item_count"]
+
+    def move(self, item, supplier):
+        with self.captureOnCommitCallbacks(execute=True):
+            item.supplier = supplier
+            item.save()
+
+    def test_moved_item_changes_both_catalogs(self):
+        self.assertEqual(self.item_counts(), (1, 0))
+        self.move(Item.objects.get(pk=self.item.pk), self.second)
+        self.assertEqual(self.item_counts(), (0, 1))
+
+    def test_stale_copy_forgets_the_stored_supplier(self):
+        stale = Item.objects.get(pk=self.item.pk)
+        self.move(Item.objects.get(pk=self.item.pk), self.second)
+        self.assertEqual(self.item_counts(), (0, 1))
+        # Saved back from a copy loaded before the move: the second catalog loses it
+        self.move(stale, self.first)
+        self.assertEqual(self.item_counts(), (1, 0))
+
+
+class ParseNumberTests(TestCase):
+    def test_formats(self):
+        cases = {
+            "1,234.50": Decimal("1234.50"),
+            "$12": Decimal("12"),
+            "12,5": Decimal("12.5"),
+            "1,234": Decimal("1234"),  # three digits after the comma: thousands
+            " 7 ": Decimal("7"),
+        }
+        for text, value in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_number(text), value)
+
+    def test_invalid(self):
+        for text in ("abc", "", "NaN", "Infinity", "1.2.3"):
+            with self.subTest(text=text):
+                with self.assertRaises(InvalidOperation):
+                    parse_number(text)
+
+
+class PriceListImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = SupplierFactory(is_active=True)
+        cls.other = SupplierFactory(is_active=True)
+        cls.kept = ItemFactory(supplier=cls.supplier, sku="A-1", name="Bolt", price=Decimal("1.00"), quantity=5)
+        cls.same = ItemFactory(supplier=cls.supplier, sku="A-2", name="Nut", price=Decimal("2.00"), quantity=5)
+        cls.inactive = ItemFactory(
+            supplier=cls.supplier, sku="A-3", name="Washer", price=Decimal("3.00"), quantity=5, is_active=False
+        )
+        cls.missing = ItemFactory(supplier=cls.supplier, sku="A-4", name="Screw", price=Decimal("4.00"))
+        cls.unreadable = ItemFactory(supplier=cls.supplier, sku="A-5", name="Pin", price=Decimal("5.00"))
+        cls.foreign = ItemFactory(supplier=cls.other, sku="B-1", price=Decimal("9.00"))
+
+    def run_import(self, text, **options):
+        return import_price_list(self.supplier, io.BytesIO(text.encode()), "prices.csv", **options)
+
+    PRICE_LIST = (
+        "sku,price,name,quantity\n"
+        "A-1,\"1,50\",Bolt,7\n"        # updated (decimal comma)
+        "A-2,2.00,Nut,5\n"              # unchanged
+        "A-1,9.99,Bolt,1\n"             # repeated: rejected
+        "A-3,3.00,Washer,5\n"           # back on the list: reactivated
+        "A-5,abc,Pin,1\n"               # invalid price: rejected, but still on the list
+        "B-1,1.00,Foreign,1\n"          # another supplier's SKU: rejected
+        "N-1,$12,New item,3\n"          # created
+        "N-2,4.25,,\n"                  # created, named after its SKU
+        "\n"
+    )
+
+    def test_upsert(self):
+        run = self.run_import(self.PRICE_LIST)
+
+        self.assertEqual(run.status, PriceListImport.COMPLETED)
+        self.assertEqual(
+            (run.rows, run.created, run.updated, run.unchanged, run.rejected, run.deactivated),
+            (8, 2, 2, 1, 3, 1),
+        )
+        self.assertEqual(
+            [(error["line"], error["sku"]) for error in run.errors], [(4, "A-1"), (6, "A-5"), (7, "B-1")]
+        )
+        self.assertIn("repeated", run.errors[0]["error"])
+        self.assertIn("another supplier", run.errors[2]["error"])
+
+        self.kept.refresh_from_db()
+        self.assertEqual((self.kept.price, self.kept.quantity), (Decimal("1.50"), 7))
+        self.inactive.refresh_from_db()
+        self.assertTrue(self.inactive.is_active)
+        self.missing.refresh_from_db()
+        self.assertFalse(self.missing.is_active)
+        self.unreadable.refresh_from_db()
+        self.assertTrue(self.unreadable.is_active)
+        self.assertEqual(self.unreadable.price, Decimal("5.00"))
+        self.foreign.refresh_from_db()
+        self.assertEqual((self.foreign.supplier, self.foreign.price), (self.other, Decimal("9.00")))
+
+        created = {item.sku: item for item in Item.objects.filter(sku__in=["N-1", "N-2"])}
+        self.assertEqual((created["N-1"].name, created["N-1"].price, created["N-1"].quantity), ("New item", 12, 3))
+        self.assertEqual((created["N-2"].name, created["N-2"].price), ("N-2", Decimal("4.25")))
+        self.assertTrue(all(item.supplier == self.supplier for item in created.values()))
+
+    def test_reimport_is_unchanged(self):
+        self.run_import(self.PRICE_LIST)
+        run = self.run_import(self.PRICE_LIST)
+        self.assertEqual((run.created, run.updated, run.deactivated), (0, 0, 0))
+        self.assertEqual(run.unchanged, 5)
+
+    def test_small_chunks(self):
+        run = self.run_import(self.PRICE_LIST, chunk_size=2)
+        self.assertEqual((run.created, run.updated, run.unchanged, run.rejected), (2, 2, 1, 3))
+
+    def test_keep_missing(self):
+        run = self.run_import("sku,price\nA-1,1.00\n", deactivate_missing=False)
+        self.assertEqual(run.deactivated, 0)
+        self.missing.refresh_from_db()
+        self.assertTrue(self.missing.is_active)
+
+    def test_dry_run(self):
+        run = self.run_import(self.PRICE_LIST, dry_run=True)
+        self.assertEqual((run.created, run.updated, run.deactivated), (2, 2, 1))
+        self.assertFalse(Item.objects.filter(sku="N-1").exists())
+        self.kept.refresh_from_db()
+        self.assertEqual(self.kept.price, Decimal("1.00"))
+        self.missing.refresh_from_db()
+        self.assertTrue(self.missing.is_active)
+
+    def test_no_valid_rows_deactivates_nothing(self):
+        with self.assertRaises(PriceListError):
+            self.run_import("sku,price\nA-1,abc\nB-1,1.00\n")
+        self.assertEqual(PriceListImport.objects.get().status, PriceListImport.FAILED)
+        self.assertEqual(Item.objects.filter(supplier=self.supplier, is_active=True).count(), 4)
+
+    def test_missing_column(self):
+        with self.assertRaisesMessage(PriceListError, "Missing column(s): price."):
+            self.run_import("sku,name\nA-1,Bolt\n")
+
+    def test_header_aliases_and_semicolons(self):
+        run = self.run_import("Item Code;Unit Price;Qty\nA-1;1,75;2\n", deactivate_missing=False)
+        self.assertEqual(run.updated, 1)
+        self.kept.refresh_from_db()
+        self.assertEqual((self.kept.price, self.kept.quantity), (Decimal("1.75"), 2))
+
+
+class ScorecardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.supplier = SupplierFactory()
+        cls.item = InventoryItemFactory(supplier=cls.supplier, price=Decimal("10.00"), quantity=0)
+
+    def purchase(self, status="PENDING", quantity=3, price=Decimal("12.00")):
+        order = Order.objects.create(order_type="PURCHASE", supplier=self.supplier, status=status)
+        OrderItem.objects.create(order=order, item=self.item, quantity=quantity, price=price)
+        order.refresh_from_db()
+        return order
+
+    def close(self, order, status):
+        order.status = status
+        order.save()
+        return order
+
+    def day(self):
+        return SupplierScoreDay.objects.get(supplier=self.supplier)
+
+    def test_completed_and_cancelled(self):
+        self.close(self.purchase(), "COMPLETED")
+        self.close(self.purchase(quantity=2), "COMPLETED")
+        self.close(self.purchase(), "CANCELLED")
+
+        day = self.day()
+        self.assertEqual((day.completed, day.cancelled, day.units), (2, 1, 5))
+        self.assertEqual((day.spend, day.list_spend), (Decimal("60.00"), Decimal("50.00")))
+        self.assertEqual(SupplierScoreOrder.objects.count(), 3)
+
+        card = scorecards.scorecard(self.supplier.pk)["30d"]
+        self.assertEqual((card["completed"], card["cancelled"], card["units"]), (2, 1, 5))
+        self.assertEqual(card["fill_rate"], Decimal("66.7"))
+        self.assertEqual(card["price_variance"], Decimal("20.0"))
+
+    def test_window(self):
+        self.close(self.purchase(), "COMPLETED")
+        later = timezone.localdate() + timedelta(days=45)
+        card = scorecards.scorecard(self.supplier.pk, today=later)
+        self.assertEqual(card["30d"]["completed"], 0)
+        self.assertIsNone(card["30d"]["fill_rate"])
+        self.assertEqual(card["90d"]["completed"], 1)
+
+    def test_not_counted(self):
+        # Still open, or a sale
+        self.purchase()
+        sale = Order.objects.create(order_type="SALE", status="PENDING")
+        self.close(sale, "CANCELLED")
+        self.assertFalse(SupplierScoreDay.objects.exists())
+
+    def test_created_closed_counts_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                completed = self.purchase(status="COMPLETED")
+                cancelled = self.purchase(status="CANCELLED")
+        day = self.day()
+        self.assertEqual((day.completed, day.cancelled, day.units, day.spend), (1, 1, 3, Decimal("36.00")))
+
+        fields = ("supplier", "day", *scorecards.SUMMED)
+        live = list(SupplierScoreDay.objects.values_list(*fields))
+        scorecards.rebuild()
+        self.assertEqual(list(SupplierScoreDay.objects.values_list(*fields)), live)
+
+        completed.delete()
+        cancelled.delete()
+        day = self.day()
+        self.assertEqual((day.completed, day.cancelled, day.units, day.spend), (0, 0, 0, 0))
+
+    def test_never_added_takes_nothing_out(self):
+        order = self.close(self.purchase(), "CANCELLED")
+        SupplierScoreOrder.objects.all().delete()  # as if closed before figures were kept
+        order.delete()
+        self.assertEqual(self.day().cancelled, 1)
+
+    def test_delete_takes_out_what_was_added(self):
+        kept = self.close(self.purchase(), "COMPLETED")
+        deleted = self.close(self.purchase(quantity=2), "COMPLETED")
+        cancelled = self.close(self.purchase(), "CANCELLED")
+        before = self.day()
+
+        # The list price moves after completion: the deletion still takes out what was added
+        self.item.price = Decimal("99.00")
+        self.item.save()
+        deleted.delete()
+        cancelled.delete()
+
+        day = self.day()
+        self.assertEqual((day.completed, day.cancelled, day.units), (1, 0, 3))
+        self.assertEqual(day.spend, before.spend - Decimal("24.00"))
+        self.assertEqual(day.list_spend, before.list_spend - Decimal("20.00"))
+        self.assertEqual(list(SupplierScoreOrder.objects.values_list("order", flat=True)), [kept.pk])
+
+        kept.delete()
+        day = self.day()
+        self.assertEqual((day.completed, day.units, day.spend, day.list_spend), (0, 0, 0, 0))
+
+    def test_rebuild_matches_the_signals(self):
+        self.close(self.purchase(), "COMPLETED")
+        self.close(self.purchase(quantity=5), "COMPLETED")
+        self.close(self.purchase(), "CANCELLED")
+        fields = ("supplier", "day", *scorecards.SUMMED, "max_lead_time_seconds")
+        live = list(SupplierScoreDay.objects.values_list(*fields))
+        kept = set(SupplierScoreOrder.objects.values_list("order", *scorecards.SUMMED))
 
-# Create your tests here.
+        self.assertEqual(scorecards.rebuild(batch_size=2), 1)
+        self.assertEqual(list(SupplierScoreDay.objects.values_list(*fields)), live)
+        self.assertEqual(set(SupplierScoreOrder.objects.values_list("order", *scorecards.SUMMED)), kept)
@@ -17,6 +17,7 @@ urlpatterns = [
 
     # Item management (under supplier)
     path("items/create/", views.item_create, name="item_create"),
+    path("<int:pk>/import/", views.price_list_import, name="price_list_import"),  # 🔹 bulk price list
 
     # JSON / AJAX APIs
     path("api/list/", views.api_list, name="api_list"),       # 🔹 list suppliers JSON
@@ -4,11 +4,15 @@ from django.urls import reverse
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.http import JsonResponse
-from django.db.models import Q, Sum, F
-from datetime import timedelta
+from django.db.models import Count, Q, Sum, F
+from django.core.cache import cache
 
+from core.counters import aget_counts, get_counts
+from core.stats import STATS_CACHE_TIMEOUT, amonthly_rows, month_starts, series
+from . import catalog, scorecards
+from .importer import PriceListError, import_price_list
 from .models import Supplier, Item
-from .forms import SupplierForm, ItemForm
+from .forms import SupplierForm, ItemForm, PriceListImportForm
 
 
 # ---------------------------
@@ -22,12 +26,13 @@ def index(request):
     recent_suppliers = suppliers.filter(
         created_at__year=now.year, created_at__month=now.month
     ).order_by("-created_at")[:5]
+    counts = get_counts()
 
     context = {
         "suppliers": suppliers,
-        "total_suppliers": suppliers.count(),
-        "active_suppliers": suppliers.filter(is_active=True).count(),
-        "inactive_suppliers": suppliers.filter(is_active=False).count(),
+        "total_suppliers": counts["suppliers"],
+        "active_suppliers": counts["suppliers_active"],
+        "inactive_suppliers": counts["suppliers"] - counts["suppliers_active"],
         "total_items": items.count(),
         "total_catalog_value": items.aggregate(
             total=Sum(F("quantity") * F("price"))
@@ -37,29 +42,84 @@ def index(request):
     return render(request, "suppliers/index.html", context)
 
 
+# ---------------------------
+# Supplier list (page + JSON)
+# ---------------------------
+SUPPLIER_SORTS = {
+    "newest": "-created_at",
+    "oldest": "created_at",
+    "name": "name",
+    "catalog_value": "-catalog_total",  # highest first
+    "items": "-num_items",
+    "latest_item": F("last_item_at").desc(nulls_last=True),
+}
+PAGE_SIZES = (10, 25, 50, 100)
+
+
+def supplier_page(request):
+    """
+    The requested page of suppliers: filters, sort and pagination on one
+    annotated queryset (catalog figures computed in SQL), so a page costs
+    the same few queries whatever its size.
+    """
+    search = request.GET.get("search", "")
+    active = request.GET.get("active", "")
+    sort = request.GET.get("sort", "newest")
+    try:
+        page_size = int(request.GET.get("page_size", PAGE_SIZES[0]))
+    except ValueError:
+        page_size = PAGE_SIZES[0]
+    page_size = page_size if page_size in PAGE_SIZES else PAGE_SIZES[0]
+
+    qs = Supplier.objects.with_catalog_stats()
+    if active == "1":
+        qs = qs.filter(is_active=True)
+    elif active == "0":
+        qs = qs.filter(is_active=False)
+
+    if search:
+        qs = qs.filter(
+            Q(name__icontains=search) |
+            Q(email__icontains=search) |
+            Q(phone__icontains=search)
+        )
+
+    # id as tie-breaker keeps pages stable when the sort key repeats
+    qs = qs.order_by(SUPPLIER_SORTS.get(sort, SUPPLIER_SORTS["newest"]), "-id")
+    return Paginator(qs, page_size).get_page(request.GET.get("page", 1))
+
+
 # ---------------------------
 # Supplier CRUD
 # ---------------------------
 def supplier_list(request):
-    suppliers = Supplier.objects.all().order_by("-created_at")
+    page_obj = supplier_page(request)
+    counts = get_counts()
     context = {
-        "suppliers": suppliers,
-        "total_suppliers": suppliers.count(),
-        "active_suppliers": suppliers.filter(is_active=True).count(),
+        "suppliers": page_obj,
+        "page_obj": page_obj,
+        "sorts": SUPPLIER_SORTS,
+        "page_sizes": PAGE_SIZES,
+        "total_suppliers": counts["suppliers"],
+        "active_suppliers": counts["suppliers_active"],
     }
     return render(request, "suppliers/supplier_list.html", context)
 
 
 def supplier_detail(request, pk):
     supplier = get_object_or_404(Supplier, pk=pk)
-    items = supplier.supplier_items.all()
+    stats = catalog.get_stats(supplier.pk)
+    scorecard = scorecards.scorecard(supplier.pk)
+    items, previous_cursor, next_cursor = catalog.items_page(
+        supplier, after=request.GET.get("after"), before=request.GET.get("before")
+    )
     context = {
         "supplier": supplier,
         "items": items,
-        "catalog_value": supplier.catalog_value,
-        "item_count": supplier.item_count,
-        "latest_item": supplier.latest_item,
-        "average_price": supplier.average_price,
+        "previous_cursor": previous_cursor,
+        "next_cursor": next_cursor,
+        "scorecard": scorecard,
+        **stats,
     }
     return render(request, "suppliers/supplier_detail.html", context)
 
@@ -128,30 +188,43 @@ def item_create(request):
     return render(request, "suppliers/item_form.html", {"form": form})
 
 
+def price_list_import(request, pk):
+    supplier = get_object_or_404(Supplier, pk=pk)
+    if request.method == "POST":
+        form = PriceListImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                run = import_price_list(
+                    supplier, upload.file, upload.name,
+                    deactivate_missing=form.cleaned_data["deactivate_missing"],
+                    dry_run=form.cleaned_data["dry_run"],
+                )
+            except PriceListError as exc:
+                messages.error(request, f"Import failed: {exc}")
+            else:
+                messages.success(
+                    request,
+                    f"{'Dry run: ' if run.dry_run else ''}{run.created} created, {run.updated} updated, "
+                    f"{run.unchanged} unchanged, {run.deactivated} deactivated, {run.rejected} rejected.",
+                )
+            return redirect(reverse("suppliers:price_list_import", args=[supplier.id]))
+        messages.error(request, "Please choose a file.")
+    else:
+        form = PriceListImportForm()
+    context = {
+        "supplier": supplier,
+        "form": form,
+        "imports": supplier.price_list_imports.all()[:10],
+    }
+    return render(request, "suppliers/price_list_import.html", context)
+
+
 # ---------------------------
 # JSON / AJAX Endpoints
 # ---------------------------
 def api_list(request):
-    search = request.GET.get("search", "")
-    active = request.GET.get("active", "")
-    page = int(request.GET.get("page", 1))
-    page_size = int(request.GET.get("page_size", 10))
-
-    qs = Supplier.objects.all().order_by("-created_at")
-    if active == "1":
-        qs = qs.filter(is_active=True)
-    elif active == "0":
-        qs = qs.filter(is_active=False)
-
-    if search:
-        qs = qs.filter(
-            Q(name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(phone__icontains=search)
-        )
-
-    paginator = Paginator(qs, page_size)
-    page_obj = paginator.get_page(page)
+    page_obj = supplier_page(request)
 
     data = {
         "results": [
@@ -165,6 +238,8 @@ def api_list(request):
                 "is_active": s.is_active,
                 "item_count": s.item_count,
                 "catalog_value": float(s.catalog_value),
+                "average_price": float(s.average_price),
+                "latest_item_at": s.last_item_at.isoformat() if s.last_item_at else None,
                 "detail_url": reverse("suppliers:supplier_detail", args=[s.id]),
                 "edit_url": reverse("suppliers:supplier_update", args=[s.id]),
                 "delete_url": reverse("suppliers:supplier_delete", args=[s.id]),
@@ -173,13 +248,14 @@ def api_list(request):
         ],
         "page": page_obj.number,
         "num_pages": page_obj.paginator.num_pages,
+        "count": page_obj.paginator.count,
         "has_next": page_obj.has_next(),
         "has_prev": page_obj.has_previous(),
     }
     return JsonResponse(data)
 
 
-def api_search(request):
+async def api_search(request):
     q = request.GET.get("q", "")
     qs = Supplier.objects.filter(is_active=True)
     if q:
@@ -188,41 +264,31 @@ def api_search(request):
         )
     qs = qs[:10]
     return JsonResponse(
-        [{"id": s.id, "name": s.name, "email": s.email} for s in qs],
+        [{"id": s.id, "name": s.name, "email": s.email} async for s in qs],
         safe=False
     )
 
 
-def api_stats(request):
-    now = timezone.now()
-    start = (now - timedelta(days=180)).replace(day=1)
-    monthly = {}
-    qs = Supplier.objects.filter(created_at__gte=start, is_active=True)
-
-    for s in qs:
-        key = s.created_at.strftime("%Y-%m")
-        monthly[key] = monthly.get(key, 0) + 1
-
-    labels, values = [], []
-    for i in range(5, -1, -1):
-        d = (now.replace(day=1) - timedelta(days=30 * i))
-        key = d.strftime("%Y-%m")
-        labels.append(d.strftime("%b %Y"))
-        values.append(monthly.get(key, 0))
-
-    data = {
-        "total": Supplier.objects.filter(is_active=True).count(),
-        "new_this_month": Supplier.objects.filter(
-            is_active=True, created_at__year=now.year, created_at__month=now.month
-        ).count(),
-        "labels": labels,
-        "values": values,
-        "items_total": Item.objects.count(),
-        "active_ratio": {
-            "active": Supplier.objects.filter(is_active=True).count(),
-            "inactive": Supplier.objects.filter(is_active=False).count(),
+async def api_stats(request):
+    data = await cache.aget("suppliers:api_stats")
+    if data is None:
+        # Active suppliers per calendar month (chart)
+        months = month_starts()
+        rows = await amonthly_rows(Supplier.objects.filter(is_active=True), months, active=Count("pk"))
+        labels, values = series(rows, months, "active")
+        counts = await aget_counts()
+        data = {
+            "total": counts["suppliers_active"],
+            "new_this_month": values[-1],
+            "labels": labels,
+            "values": values,
+            "items_total": counts["items"],
+            "active_ratio": {
+                "active": counts["suppliers_active"],
+                "inactive": counts["suppliers"] - counts["suppliers_active"],
+            }
         }
-    }
+        await cache.aset("suppliers:api_stats", data, STATS_CACHE_TIMEOUT)
     return JsonResponse(data)
 
 
@@ -71,7 +71,6 @@ INSTALLED_APPS = [
     "rest_framework_simplejwt",
     "drf_spectacular",
     "django_filters",
-    "drf_yasg",
     "corsheaders",
 
     "api",
@@ -87,19 +86,24 @@ REST_FRAMEWORK = {
 
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
 
+    # Token buckets in the database, shared by all workers (api.throttling)
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "api.throttling.AnonTokenBucketThrottle",
+        "api.throttling.PlanTokenBucketThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "50/hour",
         "user": "500/hour",
+        # Per Company.plan; users without a company get "user"
+        "plan_free": "500/hour",
+        "plan_pro": "5000/hour",
+        "plan_enterprise": "20000/hour",
     },
 }
 
@@ -108,8 +112,65 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Warms the API user cache when a token is issued
+    "TOKEN_OBTAIN_SERIALIZER": "api.authentication.CachingTokenObtainPairSerializer",
 }
 
+# ========================
+# CACHES
+# ========================
+# "api" is shared by all workers (DB table, run `manage.py createcachetable`)
+# so response-cache invalidation is seen everywhere.
+# "auth" is per worker: API users, read on every request without a query.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "api_cache",
+    },
+    "auth": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "api-auth",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+API_CACHE_ALIAS = "api"
+API_CACHE_TIMEOUT = 300  # seconds
+DASHBOARD_STATS_TIMEOUT = 60  # customers/suppliers api_stats (per worker)
+FRAGMENT_CACHE_TIMEOUT = 300  # cached dashboard widgets (core.fragments), on top of generation invalidation
+SUPPLIER_STATS_TIMEOUT = 600  # supplier detail catalog stats (suppliers.catalog), dropped on item changes
+
+# ========================
+# LIVE DASHBOARD (SSE)
+# ========================
+LIVE_POLL_INTERVAL = 1.0  # seconds between change-feed polls per worker (while streams are open)
+LIVE_HEARTBEAT = 15       # seconds between keep-alive comments on idle streams
+LIVE_EVENT_HOURS = 24     # `manage.py purge_live_events` keeps this much history
+
+# ========================
+# KPI ROLLUPS
+# ========================
+KPI_HOURLY_RETENTION_DAYS = 14  # older hours are compacted into daily rows (`manage.py compact_kpi_rollups`)
+
+# ========================
+# CUSTOMER SEGMENTS (RFM)
+# ========================
+CUSTOMER_RFM_FULL_EVERY_DAYS = 7  # `manage.py segment_customers` rebuilds fully this often, incrementally between
+
+# ========================
+# API DELTA SYNC
+# ========================
+SYNC_OVERLAP_SECONDS = 300  # caught-up cursors lag this far behind now
+SYNC_TOMBSTONE_DAYS = 90    # older cursors get 410 and must full-sync
+
+# ========================
+# API AUTH CACHE
+# ========================
+API_AUTH_CACHE_ALIAS = "auth"
+API_AUTH_CACHE_TIMEOUT = 60  # per-worker copy of each user (seconds); bounds staleness on other workers
+
 # ========================
 # CORS
 # ========================
@@ -131,6 +192,8 @@ SPECTACULAR_SETTINGS = {
         "displayRequestDuration": True,
     },
 }
+# Prebuilt schema / docs pages served by api.schema (`manage.py build_api_schema`)
+API_SCHEMA_DIR = os.path.join(BASE_DIR, "api_schema")
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"